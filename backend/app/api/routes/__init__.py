@@ -1,32 +1,14 @@
 """
 API para gerenciamento de projetos
 """
-import sqlite3
-import jwt
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from typing import List, Optional
-from app.core.config import get_settings
+from app.core.autenticacao import get_current_user
+from app.db.session import database, get_db_connection
 
-settings = get_settings()
 router = APIRouter(prefix="/projetos", tags=["Projetos"])
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
-
-def get_db_connection():
-    """Obter conexão com o banco de dados"""
-    conn = sqlite3.connect('database.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Obter usuário atual do token"""
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY or "fallback-secret", algorithms=["HS256"])
-        return payload
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Token inválido")
 
 # Models
 class ProjetoCadastro(BaseModel):
@@ -232,14 +214,15 @@ def criar_tabelas_edicoes_anteriores():
                 edital TEXT
             )
         """)
-        cursor.execute("""
+        cursor.execute(f"""
             CREATE TABLE IF NOT EXISTS projetos_edicao (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id {database.autoincrement_pk},
                 ano INTEGER,
                 titulo TEXT,
                 aluno TEXT,
                 orientador TEXT,
                 arquivo TEXT,
+                sha256 TEXT,
                 FOREIGN KEY (ano) REFERENCES edicoes_anteriores(ano)
             )
         """)
@@ -0,0 +1,32 @@
+"""
+Arquivos enviados (uploads), servidos pelo caminho lógico gravado no banco
+"""
+import mimetypes
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.core import downloads
+from app.core.blob_store import resolver_caminho
+from app.db.session import AsyncConnection, get_db
+
+router = APIRouter(prefix="/uploads", tags=["Arquivos"])
+
+
+@router.api_route("/{caminho:path}", methods=["GET", "HEAD"])
+async def servir_upload(
+    caminho: str,
+    exp: Optional[int] = None,
+    sig: Optional[str] = None,
+    conn: AsyncConnection = Depends(get_db)
+):
+    """Entrega o conteúdo de uploads/{caminho}, esteja ele no store deduplicado ou no caminho antigo"""
+    caminho_logico = f"uploads/{caminho}"
+    if downloads.DOWNLOADS_ASSINADOS and not downloads.assinatura_valida(caminho_logico, exp, sig):
+        raise HTTPException(status_code=403, detail="Link de download inválido ou expirado")
+    arquivo = await resolver_caminho(conn, caminho_logico)
+    if not arquivo:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    # O blob não tem extensão: o tipo vem do nome lógico
+    media_type = mimetypes.guess_type(caminho)[0] or "application/octet-stream"
+    return downloads.responder_arquivo(arquivo, media_type=media_type)
@@ -1,35 +1,34 @@
 """
 Rotas para autenticação com contas Microsoft do IBMEC
 """
+import logging
 import uuid
+import anyio
 import urllib.parse
-import httpx
 import jwt
-import sqlite3
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import RedirectResponse
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from typing import Dict, Any, Optional
+from fastapi.security import OAuth2PasswordRequestForm
+from typing import Dict, Any, Tuple
 
 # Importar as configurações
+from app.core.autenticacao import decodificar_token, oauth2_scheme
+from app.core.cache import estatisticas_cache, usuarios_cache
 from app.core.config import get_settings
+from app.core.http_cliente import cliente_http
+from app.core.oidc import MICROSOFT_GRAPH_URL, metadados_oidc
+from app.db.migrations import email_unico
+from app.db.session import Database, database
 
 # Obter o objeto settings
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Autenticação"])
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
-
 # =================== FUNÇÕES DE BANCO DE DADOS ===================
 
-def get_db_connection():
-    """Obter conexão com o banco de dados"""
-    conn = sqlite3.connect('database.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
 def determine_user_type(email: str) -> str:
     """Determina se é admin, professor ou aluno baseado no email"""
     if "202302129633" in email:
@@ -39,161 +38,126 @@ def determine_user_type(email: str) -> str:
     else:
         return "aluno"
 
-def check_user_exists(email: str, user_type: str) -> Optional[Dict[str, Any]]:
-    """
-    Verifica se o usuário existe na tabela correspondente
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def dados_professor(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Colunas do orientador criado no primeiro login, a partir dos dados da Microsoft"""
+    # Gerar código automático baseado no email
+    email_prefix = user_data.get('email', '').split('@')[0]
+    codigo = email_prefix.upper().replace('.', '')[:10]
     
-    try:
-        if user_type == "professor":
-            cursor.execute("SELECT * FROM orientadores WHERE email = ?", (email,))
-        elif user_type == "aluno":
-            cursor.execute("SELECT * FROM alunos WHERE email = ?", (email,))
-        elif user_type == "admin":
-            cursor.execute("SELECT * FROM alunos WHERE email = ?", (email,))  # Admin é um aluno especial
-        else:
-            return None
-        
-        user = cursor.fetchone()
-        
-        if user:
-            return dict(user)
-        return None
-        
-    finally:
-        conn.close()
+    # Determinar se é coordenador baseado no email/cargo
+    is_coordenador = any(word in user_data.get('email', '').lower() 
+                       for word in ['coord', 'diretor'])
+    
+    return {
+        "nome": user_data.get('display_name', user_data.get('name', '')),
+        "email": user_data.get('email', ''),
+        "telefone": user_data.get('mobile_phone', user_data.get('phone', '')),
+        "area_pesquisa": user_data.get('department', 'Não especificada'),
+        "codigo": codigo,
+        "titulacao": user_data.get('job_title', 'Professor'),
+        "lattes_url": '',  # lattes_url vazio por padrão
+        "is_coordenador": bool(is_coordenador),  # coluna Boolean no PostgreSQL: psycopg2 não converte int
+    }
 
-def create_professor_from_token(user_data: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Cria um professor/orientador baseado nos dados do token
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def dados_aluno(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Colunas do aluno criado no primeiro login, a partir dos dados da Microsoft"""
+    # Gerar matrícula automática baseada no email
+    email_prefix = user_data.get('email', '').split('@')[0]
+    matricula = email_prefix.upper().replace('.', '')[:15]
     
-    try:
-        # Gerar código automático baseado no email
-        email_prefix = user_data.get('email', '').split('@')[0]
-        codigo = email_prefix.upper().replace('.', '')[:10]
-        
-        # Determinar se é coordenador baseado no email/cargo
-        is_coordenador = any(word in user_data.get('email', '').lower() 
-                           for word in ['coord', 'diretor'])
-        
-        # Inserir orientador
-        cursor.execute("""
-            INSERT INTO orientadores (
-                nome, email, telefone, area_pesquisa, codigo, 
-                titulacao, lattes_url, is_coordenador
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            user_data.get('display_name', user_data.get('name', '')),
-            user_data.get('email', ''),
-            user_data.get('mobile_phone', user_data.get('phone', '')),
-            user_data.get('department', 'Não especificada'),
-            codigo,
-            user_data.get('job_title', 'Professor'),
-            '',  # lattes_url vazio por padrão
-            1 if is_coordenador else 0
-        ))
-        
-        # Obter o ID do usuário criado
-        user_id = cursor.lastrowid
-        conn.commit()
-        
-        # Retornar os dados do usuário criado
-        cursor.execute("SELECT * FROM orientadores WHERE id = ?", (user_id,))
-        new_user = cursor.fetchone()
-        
-        print(f"✅ Professor criado: {user_data.get('display_name')} (ID: {user_id})")
-        return dict(new_user)
-        
-    finally:
-        conn.close()
+    return {
+        "nome": user_data.get('display_name', user_data.get('name', '')),
+        "matricula": matricula,
+        "email": user_data.get('email', ''),
+        "data_nascimento": None,  # não disponível no token
+        "telefone": user_data.get('mobile_phone', user_data.get('phone', '')),
+        "curso": user_data.get('department', 'Não especificado'),
+        "semestre": 1,  # Valor padrão
+        "projeto_id": None,  # vazio inicialmente
+        "orientador_id": None,  # vazio inicialmente
+        "status": 'Ativo',
+    }
+
+# (URL do banco, tabela) -> a tabela tem índice único em email; decidido uma vez por processo
+_upsert_disponivel: Dict[Tuple[str, str], bool] = {}
+
 
-def create_aluno_from_token(user_data: Dict[str, Any]) -> Dict[str, Any]:
+def upsert_disponivel(tabela: str, db: Database = database) -> bool:
+    """Se o INSERT do login pode usar ON CONFLICT (email), ou seja, se criar_email_unico rodou"""
+    chave = (str(db.engine.url), tabela)
+    if chave not in _upsert_disponivel:
+        _upsert_disponivel[chave] = email_unico(db, tabela)
+        if not _upsert_disponivel[chave]:
+            logger.warning("⚠️ %s sem índice único em email (ver migração criar_email_unico): "
+                           "login insere sem ON CONFLICT", tabela)
+    return _upsert_disponivel[chave]
+
+
+def buscar_ou_criar_usuario(tabela: str, dados: Dict[str, Any], db: Database = database) -> Tuple[Dict[str, Any], bool]:
     """
-    Cria um aluno baseado nos dados do token
+    Busca o usuário pelo email e, se não existir, cria na mesma conexão.
+    Retorna (usuário, criado).
+
+    O caso comum (usuário já cadastrado) é um único SELECT, sem escrita nem
+    lock. A criação usa INSERT ... ON CONFLICT (email) DO NOTHING RETURNING *:
+    se dois primeiros logins do mesmo usuário chegarem juntos, só um insere
+    e o outro lê a linha criada, sem duplicar o cadastro. Sem o índice único
+    (banco em que a migração criar_email_unico não pôde criá-lo) o INSERT é
+    simples.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # Gerar matrícula automática baseada no email
-        email_prefix = user_data.get('email', '').split('@')[0]
-        matricula = email_prefix.upper().replace('.', '')[:15]
-        
-        # Tentar extrair semestre do email ou usar padrão
-        semestre = 1  # Valor padrão
-        
-        # Inserir aluno
-        cursor.execute("""
-            INSERT INTO alunos (
-                nome, matricula, email, data_nascimento, telefone, 
-                curso, semestre, projeto_id, orientador_id, status
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            user_data.get('display_name', user_data.get('name', '')),
-            matricula,
-            user_data.get('email', ''),
-            None,  # data_nascimento - não disponível no token
-            user_data.get('mobile_phone', user_data.get('phone', '')),
-            user_data.get('department', 'Não especificado'),
-            semestre,
-            None,  # projeto_id vazio inicialmente
-            None,  # orientador_id vazio inicialmente
-            'Ativo'
-        ))
-        
-        # Obter o ID do usuário criado
-        user_id = cursor.lastrowid
+    email = dados["email"]
+    colunas = ", ".join(dados)
+    marcadores = ", ".join("?" for _ in dados)
+    insert = f"INSERT INTO {tabela} ({colunas}) VALUES ({marcadores})"
+    if upsert_disponivel(tabela, db):
+        insert += " ON CONFLICT (email) DO NOTHING"
+    with db.connect() as conn:
+        user = conn.execute(f"SELECT * FROM {tabela} WHERE email = ?", (email,)).fetchone()
+        if user:
+            return dict(user), False
+        user = conn.execute(f"{insert} RETURNING *", tuple(dados.values())).fetchone()
         conn.commit()
-        
-        # Retornar os dados do usuário criado
-        cursor.execute("SELECT * FROM alunos WHERE id = ?", (user_id,))
-        new_user = cursor.fetchone()
-        
-        print(f"✅ Aluno criado: {user_data.get('display_name')} (ID: {user_id})")
-        return dict(new_user)
-        
-    finally:
-        conn.close()
+        if user:
+            return dict(user), True
+        # Outro login do mesmo usuário criou a linha entre o SELECT e o INSERT
+        user = conn.execute(f"SELECT * FROM {tabela} WHERE email = ?", (email,)).fetchone()
+        return dict(user), False
 
-def get_or_create_user(user_data: Dict[str, Any]) -> Dict[str, Any]:
+async def get_or_create_user(user_data: Dict[str, Any], db: Database = database) -> Dict[str, Any]:
     """
     Função principal: verifica se usuário existe, se não, cria automaticamente
     """
     email = user_data.get('email', '')
     user_type = determine_user_type(email)
     
-    print(f"🔍 Verificando usuário: {email} (Tipo: {user_type})")
+    logger.debug("🔍 Verificando usuário: %s (Tipo: %s)", email, user_type)
     
-    # Verificar se já existe
-    existing_user = check_user_exists(email, user_type)
-    
-    if existing_user:
-        print(f"✅ Usuário existente encontrado: {existing_user.get('nome')}")
-        return {
-            **existing_user,
-            "user_type": user_type,
-            "is_new_user": False
-        }
-    
-    # Se não existe, criar
-    print(f"🆕 Criando novo usuário...")
+    # Logins repetidos em sequência (início de semestre) não voltam ao banco
+    cached_user = usuarios_cache.get(email)
+    if cached_user is not None:
+        return {**cached_user, "user_type": user_type, "is_new_user": False}
     
     if user_type == "professor":
-        new_user = create_professor_from_token(user_data)
+        tabela, dados = "orientadores", dados_professor(user_data)
     elif user_type == "aluno" or user_type == "admin":
-        new_user = create_aluno_from_token(user_data)
+        tabela, dados = "alunos", dados_aluno(user_data)  # Admin é um aluno especial
     else:
         raise Exception("Tipo de usuário desconhecido")
     
+    versao = usuarios_cache.versao
+    user, is_new_user = await anyio.to_thread.run_sync(buscar_ou_criar_usuario, tabela, dados, db)
+    usuarios_cache.set(user, chave=email, versao=versao)
+    
+    if is_new_user:
+        estatisticas_cache.invalidate()
+        logger.info("✅ Usuário criado: %s (ID: %s)", user.get("nome"), user["id"], extra={"user_type": user_type})
+    else:
+        logger.debug("✅ Usuário existente encontrado: %s", user.get("nome"))
+    
     return {
-        **new_user,
+        **user,
         "user_type": user_type,
-        "is_new_user": True
+        "is_new_user": is_new_user
     }
 
 # =================== FUNÇÕES DE TOKEN ===================
@@ -230,7 +194,8 @@ async def microsoft_login():
         "state": state
     }
     
-    auth_url = f"https://login.microsoftonline.com/{settings.MICROSOFT_TENANT_ID}/oauth2/v2.0/authorize?{urllib.parse.urlencode(params)}"
+    metadados = await metadados_oidc()
+    auth_url = f"{metadados['authorization_endpoint']}?{urllib.parse.urlencode(params)}"
     return RedirectResponse(auth_url)
 
 @router.get("/callback")
@@ -239,10 +204,10 @@ async def microsoft_callback(code: str, state: str = None):
     Callback completo: Microsoft → Verificar/Criar usuário → Redirecionar
     """
     try:
-        print(f"🔄 Processando callback - Código: {code[:20]}...")
+        logger.debug("🔄 Processando callback")
         
         # 1. Trocar código por token da Microsoft
-        token_url = f"https://login.microsoftonline.com/{settings.MICROSOFT_TENANT_ID}/oauth2/v2.0/token"
+        token_url = (await metadados_oidc())["token_endpoint"]
         
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
         data = {
@@ -253,27 +218,26 @@ async def microsoft_callback(code: str, state: str = None):
             "redirect_uri": settings.MICROSOFT_REDIRECT_URI
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(token_url, data=data, headers=headers)
+        response = await cliente_http().post(token_url, data=data, headers=headers)
         
         if response.status_code != 200:
             error_detail = response.text
-            print(f"❌ Erro Microsoft: {error_detail}")
+            logger.error("❌ Erro Microsoft: %s", error_detail, extra={"status": response.status_code})
             raise HTTPException(status_code=400, detail="Erro ao obter token da Microsoft")
         
         token_data = response.json()
         access_token = token_data["access_token"]
-        print(f"✅ Token Microsoft obtido")
+        logger.debug("✅ Token Microsoft obtido")
         
         # 2. Obter dados do usuário da Microsoft
-        user_url = "https://graph.microsoft.com/v1.0/me"
+        user_url = f"{MICROSOFT_GRAPH_URL}/me"
         headers = {"Authorization": f"Bearer {access_token}"}
         
-        async with httpx.AsyncClient() as client:
-            user_response = await client.get(user_url, headers=headers)
+        user_response = await cliente_http().get(user_url, headers=headers)
         
         if user_response.status_code != 200:
-            print(f"❌ Erro ao obter dados do usuário: {user_response.text}")
+            logger.error("❌ Erro ao obter dados do usuário: %s", user_response.text,
+                         extra={"status": user_response.status_code})
             raise HTTPException(status_code=400, detail="Erro ao obter dados do usuário")
         
         user_data = user_response.json()
@@ -292,7 +256,7 @@ async def microsoft_callback(code: str, state: str = None):
             "phone": user_data.get("mobilePhone", "")
         }
         
-        print(f"📧 Email obtido: {user_info['email']}")
+        logger.debug("📧 Email obtido: %s", user_info["email"])
           # Verificar se é email IBMEC (habilitar em produção)
         if not user_info["email"] or "ibmec.edu.br" not in user_info["email"].lower():
             # Para testes, permitir alguns emails específicos
@@ -301,7 +265,7 @@ async def microsoft_callback(code: str, state: str = None):
                 raise HTTPException(status_code=403, detail="Email do IBMEC necessário")
         
         # 4. Verificar/Criar usuário no banco local
-        db_user = get_or_create_user(user_info)
+        db_user = await get_or_create_user(user_info)
         
         # 5. Criar token JWT interno com todas as informações
         token_payload = {
@@ -334,9 +298,8 @@ async def microsoft_callback(code: str, state: str = None):
         # Criar token JWT
         internal_token = create_access_token(token_payload)
         
-        print(f"✅ Login processado: {db_user['nome']} ({db_user['user_type']})")
-        if db_user["is_new_user"]:
-            print(f"🆕 Novo usuário criado no banco!")
+        logger.info("✅ Login processado: %s (%s)", db_user["nome"], db_user["user_type"],
+                    extra={"user_id": db_user["id"], "novo_usuario": db_user["is_new_user"]})
         
         # 6. Redirecionar usando a função que já existe no main.py
         redirect_url = f"/auth/redirect?token={internal_token}&email={db_user['email']}"
@@ -346,9 +309,7 @@ async def microsoft_callback(code: str, state: str = None):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"💥 Erro inesperado: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("💥 Erro inesperado no callback: %s", e)
         raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
 
 @router.get("/verify-token")
@@ -357,7 +318,7 @@ async def verify_token(token: str = Depends(oauth2_scheme)):
     Verifica se o token ainda é válido
     """
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY or "fallback-secret", algorithms=["HS256"])
+        payload = decodificar_token(token)
         email = payload.get("email")
         if email is None:
             raise HTTPException(
@@ -382,7 +343,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     Retorna informações do usuário autenticado
     """
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY or "fallback-secret", algorithms=["HS256"])
+        payload = decodificar_token(token)
         email = payload.get("email")
         if email is None:
             raise HTTPException(
@@ -0,0 +1,37 @@
+"""
+API de busca textual em projetos, orientadores e edições anteriores
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
+from app.core.autenticacao import get_current_user
+from app.db.busca import TIPOS, buscar, termos_da_consulta
+from app.db.session import AsyncConnection, get_db
+
+router = APIRouter(prefix="/busca", tags=["Busca"])
+
+@router.get("")
+async def buscar_texto(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    tipo: Optional[List[str]] = Query(None),
+    limite: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: dict = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
+):
+    """
+    Busca por relevância em projetos, orientadores, projetos de edições
+    anteriores e no texto dos documentos enviados
+
+    `tipo` (repetível) restringe a projeto, orientador, edicao e/ou documento.
+    O total de resultados vai no header X-Total-Count. Projetos pendentes e
+    documentos só aparecem para o admin e para o aluno/orientador do projeto.
+    """
+    if not termos_da_consulta(q):
+        raise HTTPException(status_code=400, detail="Informe ao menos um termo de busca")
+    invalidos = set(tipo or []) - set(TIPOS)
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Tipo de busca inválido: {', '.join(sorted(invalidos))}")
+    total, resultados = await buscar(conn, q, current_user, tipos=tipo, limite=limite, offset=offset)
+    response.headers["X-Total-Count"] = str(total)
+    return resultados
@@ -1,33 +1,18 @@
 """
 API para gerenciamento de documentos e comentários
 """
-import sqlite3
-import jwt
 import os
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Query, Response
 from pydantic import BaseModel
 from typing import List, Optional
-from app.core.config import get_settings
+from app.core.blob_store import adicionar_referencia, guardar_upload
+from app.core.autenticacao import get_current_user
+from app.core.downloads import assinar_url
+from app.core.indexacao import indexar_documento
+from app.db.session import AsyncConnection, get_db
 
-settings = get_settings()
 router = APIRouter(prefix="/documentos", tags=["Documentos"])
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
-
-def get_db_connection():
-    """Obter conexão com o banco de dados"""
-    conn = sqlite3.connect('database.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Obter usuário atual do token"""
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY or "fallback-secret", algorithms=["HS256"])
-        return payload
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Token inválido")
 
 # Models
 class ComentarioModel(BaseModel):
@@ -44,192 +29,225 @@ class DocumentoResponse(BaseModel):
 @router.post("/upload/{projeto_id}")
 async def upload_documento(
     projeto_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     comentario: str = Form(""),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
 ):
     """Upload de documento para um projeto"""
     if current_user.get('user_type') != 'aluno':
         raise HTTPException(status_code=403, detail="Apenas alunos podem fazer upload de documentos")
     
-    conn = get_db_connection()
     cursor = conn.cursor()
+    # Verificar se o projeto é do aluno
+    await cursor.execute("SELECT * FROM projetos WHERE id = ? AND aluno_id = ?", (projeto_id, current_user['user_id']))
+    projeto = await cursor.fetchone()
     
-    try:
-        # Verificar se o projeto é do aluno
-        cursor.execute("SELECT * FROM projetos WHERE id = ? AND aluno_id = ?", (projeto_id, current_user['user_id']))
-        projeto = cursor.fetchone()
-        
-        if not projeto:
-            raise HTTPException(status_code=404, detail="Projeto não encontrado")
-        
-        # Corrigido: Verificar se existe pelo menos uma atividade para este projeto (não filtrar por aluno_id e orientador_id)
-        cursor.execute("""
-            SELECT COUNT(*) as total_atividades
-            FROM atividades
-            WHERE projeto_id = ?
-        """, (projeto_id,))
-        atividades = cursor.fetchone()
-        if not atividades or atividades['total_atividades'] == 0:
-            raise HTTPException(status_code=403, detail="Você só pode enviar documentos quando o professor criar uma entrega para este projeto.")
+    if not projeto:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    
+    # Corrigido: Verificar se existe pelo menos uma atividade para este projeto (não filtrar por aluno_id e orientador_id)
+    await cursor.execute("""
+        SELECT COUNT(*) as total_atividades
+        FROM atividades
+        WHERE projeto_id = ?
+    """, (projeto_id,))
+    atividades = await cursor.fetchone()
+    if not atividades or atividades['total_atividades'] == 0:
+        raise HTTPException(status_code=403, detail="Você só pode enviar documentos quando o professor criar uma entrega para este projeto.")
 
-        # Criar diretório se não existir
-        upload_dir = f"uploads/projeto_{projeto_id}"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Salvar arquivo
-        file_path = f"{upload_dir}/{file.filename}"
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Salvar no banco
-        cursor.execute("""
-            INSERT INTO documentos (projeto_id, nome_arquivo, caminho_arquivo, tipo_arquivo, tamanho_arquivo, data_upload, comentario_aluno)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            projeto_id, file.filename, file_path, file.content_type, 
-            len(content), datetime.now().isoformat(), comentario
-        ))
-        
-        documento_id = cursor.lastrowid
-        conn.commit()
-        
-        return {"message": "Documento enviado com sucesso", "documento_id": documento_id}
-    finally:
-        conn.close()
+    # Guardar o conteúdo no store deduplicado; o caminho lógico continua o mesmo
+    upload_dir = f"uploads/projeto_{projeto_id}"
+    file_path = f"{upload_dir}/{os.path.basename(file.filename)}"
+    arquivo_salvo = await guardar_upload(file)
+    
+    # Salvar no banco
+    data_upload = datetime.now().isoformat()
+    await cursor.execute("""
+        INSERT INTO documentos (projeto_id, nome_arquivo, caminho_arquivo, tipo_arquivo, tamanho_arquivo, data_upload, comentario_aluno, sha256)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        RETURNING id
+    """, (
+        projeto_id, file.filename, file_path, file.content_type, 
+        arquivo_salvo.tamanho, data_upload, comentario, arquivo_salvo.sha256
+    ))
+    
+    documento_id = (await cursor.fetchone())[0]
+    await adicionar_referencia(cursor, arquivo_salvo)
+    
+    # Atualizar o resumo do projeto na mesma transação
+    await cursor.execute("""
+        UPDATE projetos
+        SET documentos_count = documentos_count + 1,
+            ultima_postagem = CASE
+                WHEN ultima_postagem IS NULL OR ultima_postagem < ? THEN ?
+                ELSE ultima_postagem
+            END
+        WHERE id = ?
+    """, (data_upload, data_upload, projeto_id))
+    await conn.commit()
+    
+    # Extrair o texto para a busca depois da resposta, no pool de processos
+    background_tasks.add_task(indexar_documento, documento_id)
+    
+    return {"message": "Documento enviado com sucesso", "documento_id": documento_id}
 
 @router.get("/projeto/{projeto_id}")
-async def listar_documentos(projeto_id: int, current_user: dict = Depends(get_current_user)):
-    """Lista documentos de um projeto"""
+async def listar_documentos(
+    projeto_id: int,
+    response: Response,
+    limite: Optional[int] = Query(None, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    limite_comentarios: Optional[int] = Query(None, ge=1, le=200),
+    current_user: dict = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
+):
+    """
+    Lista documentos de um projeto com seus comentários
+
+    Paginação opcional: `limite`/`offset` para os documentos (total no header
+    X-Total-Count) e `limite_comentarios` para trazer só os N comentários mais
+    recentes de cada documento (o total fica em `comentarios_total`).
+    """
     if current_user.get('user_type') not in ('aluno', 'professor', 'admin', 'admin_professor'):
         raise HTTPException(status_code=403, detail="Sem permissão para acessar este projeto")
     
-    conn = get_db_connection()
     cursor = conn.cursor()
+    # Permitir admin ver qualquer projeto
+    if current_user.get('user_type') == 'aluno':
+        await cursor.execute("SELECT * FROM projetos WHERE id = ? AND aluno_id = ?", (projeto_id, current_user['user_id']))
+    elif current_user.get('user_type') in ('professor', 'admin_professor'):
+        await cursor.execute("SELECT * FROM projetos WHERE id = ? AND orientador_id = ?", (projeto_id, current_user['user_id']))
+    elif current_user.get('user_type') == 'admin':
+        await cursor.execute("SELECT * FROM projetos WHERE id = ?", (projeto_id,))
+    else:
+        raise HTTPException(status_code=403, detail="Sem permissão para acessar este projeto")
+    
+    projeto = await cursor.fetchone()
+    if not projeto:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
     
-    try:
-        # Permitir admin ver qualquer projeto
-        if current_user.get('user_type') == 'aluno':
-            cursor.execute("SELECT * FROM projetos WHERE id = ? AND aluno_id = ?", (projeto_id, current_user['user_id']))
-        elif current_user.get('user_type') in ('professor', 'admin_professor'):
-            cursor.execute("SELECT * FROM projetos WHERE id = ? AND orientador_id = ?", (projeto_id, current_user['user_id']))
-        elif current_user.get('user_type') == 'admin':
-            cursor.execute("SELECT * FROM projetos WHERE id = ?", (projeto_id,))
-        else:
-            raise HTTPException(status_code=403, detail="Sem permissão para acessar este projeto")
-        
-        projeto = cursor.fetchone()
-        if not projeto:
-            raise HTTPException(status_code=404, detail="Projeto não encontrado")
-        
-        # Listar documentos
-        cursor.execute("""
-            SELECT * FROM documentos 
-            WHERE projeto_id = ?
-            ORDER BY data_upload DESC
-        """, (projeto_id,))
-        
-        documentos = []
-        for row in cursor.fetchall():
-            doc = dict(row)
-            
-            # Buscar comentários do documento
-            cursor.execute("""
-                SELECT c.*, 
-                       CASE 
-                           WHEN c.usuario_tipo = 'aluno' THEN a.nome
-                           ELSE o.nome
-                       END as usuario_nome
-                FROM comentarios c
-                LEFT JOIN alunos a ON c.usuario_id = a.id AND c.usuario_tipo = 'aluno'
-                LEFT JOIN orientadores o ON c.usuario_id = o.id AND c.usuario_tipo = 'professor'
-                WHERE c.documento_id = ?
-                ORDER BY c.data_comentario ASC
-            """, (doc['id'],))
-            
-            comentarios = [dict(c) for c in cursor.fetchall()]
-            doc['comentarios'] = comentarios
-            documentos.append(doc)
-        
+    # Listar documentos
+    sql = """
+        SELECT * FROM documentos 
+        WHERE projeto_id = ?
+        ORDER BY data_upload DESC, id DESC
+    """
+    params = [projeto_id]
+    if limite is not None:
+        await cursor.execute("SELECT COUNT(*) FROM documentos WHERE projeto_id = ?", (projeto_id,))
+        response.headers["X-Total-Count"] = str((await cursor.fetchone())[0])
+        sql += " LIMIT ? OFFSET ?"
+        params += [limite, offset]
+    await cursor.execute(sql, params)
+    documentos = [dict(row) for row in await cursor.fetchall()]
+    if not documentos:
         return documentos
-    finally:
-        conn.close()
+    # Link de download assinado e de curta duração (ver app/core/downloads.py)
+    for doc in documentos:
+        doc["url_download"] = assinar_url(doc["caminho_arquivo"])
+    
+    # Buscar os comentários de todos os documentos da página em uma única consulta
+    placeholders = ", ".join("?" for _ in documentos)
+    await cursor.execute(f"""
+        SELECT * FROM (
+            SELECT c.*, 
+                   CASE 
+                       WHEN c.usuario_tipo = 'aluno' THEN a.nome
+                       ELSE o.nome
+                   END as usuario_nome,
+                   ROW_NUMBER() OVER (PARTITION BY c.documento_id ORDER BY c.data_comentario DESC, c.id DESC) as posicao,
+                   COUNT(*) OVER (PARTITION BY c.documento_id) as comentarios_total
+            FROM comentarios c
+            LEFT JOIN alunos a ON c.usuario_id = a.id AND c.usuario_tipo = 'aluno'
+            LEFT JOIN orientadores o ON c.usuario_id = o.id AND c.usuario_tipo = 'professor'
+            WHERE c.documento_id IN ({placeholders})
+        ) comentarios_numerados
+        WHERE ? IS NULL OR posicao <= ?
+        ORDER BY data_comentario ASC, id ASC
+    """, [doc['id'] for doc in documentos] + [limite_comentarios, limite_comentarios])
+    
+    comentarios_por_documento = {doc['id']: [] for doc in documentos}
+    totais = {}
+    for row in await cursor.fetchall():
+        comentario = dict(row)
+        comentario.pop('posicao')
+        totais[comentario['documento_id']] = comentario.pop('comentarios_total')
+        comentarios_por_documento[comentario['documento_id']].append(comentario)
+    
+    for doc in documentos:
+        doc['comentarios'] = comentarios_por_documento[doc['id']]
+        doc['comentarios_total'] = totais.get(doc['id'], 0)
+    
+    return documentos
 
 @router.post("/comentar/{documento_id}")
 async def comentar_documento(
     documento_id: int, 
     comentario: ComentarioModel, 
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
 ):
     """Adiciona comentário a um documento"""
     if current_user.get('user_type') not in ('aluno', 'professor', 'admin', 'admin_professor'):
         raise HTTPException(status_code=403, detail="Sem permissão para comentar")
     
-    conn = get_db_connection()
     cursor = conn.cursor()
+    # Verificar se o documento existe e se o usuário tem acesso
+    await cursor.execute("""
+        SELECT d.*, p.aluno_id, p.orientador_id 
+        FROM documentos d
+        JOIN projetos p ON d.projeto_id = p.id
+        WHERE d.id = ?
+    """, (documento_id,))
     
-    try:
-        # Verificar se o documento existe e se o usuário tem acesso
-        cursor.execute("""
-            SELECT d.*, p.aluno_id, p.orientador_id 
-            FROM documentos d
-            JOIN projetos p ON d.projeto_id = p.id
-            WHERE d.id = ?
-        """, (documento_id,))
-        
-        documento = cursor.fetchone()
-        if not documento:
-            raise HTTPException(status_code=404, detail="Documento não encontrado")
-        
-        # Verificar permissão
-        if current_user.get('user_type') == 'aluno' and documento['aluno_id'] != current_user['user_id']:
-            raise HTTPException(status_code=403, detail="Sem permissão para comentar")
-        elif current_user.get('user_type') in ('professor', 'admin_professor') and documento['orientador_id'] != current_user['user_id']:
-            raise HTTPException(status_code=403, detail="Sem permissão para comentar")
-        
-        # Inserir comentário
-        cursor.execute("""
-            INSERT INTO comentarios (documento_id, usuario_id, usuario_tipo, comentario, data_comentario)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            documento_id, current_user['user_id'], current_user['user_type'], 
-            comentario.comentario, datetime.now().isoformat()
-        ))
-        
-        conn.commit()
-        return {"message": "Comentário adicionado com sucesso"}
-    finally:
-        conn.close()
+    documento = await cursor.fetchone()
+    if not documento:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    
+    # Verificar permissão
+    if current_user.get('user_type') == 'aluno' and documento['aluno_id'] != current_user['user_id']:
+        raise HTTPException(status_code=403, detail="Sem permissão para comentar")
+    elif current_user.get('user_type') in ('professor', 'admin_professor') and documento['orientador_id'] != current_user['user_id']:
+        raise HTTPException(status_code=403, detail="Sem permissão para comentar")
+    
+    # Inserir comentário
+    await cursor.execute("""
+        INSERT INTO comentarios (documento_id, usuario_id, usuario_tipo, comentario, data_comentario)
+        VALUES (?, ?, ?, ?, ?)
+    """, (
+        documento_id, current_user['user_id'], current_user['user_type'], 
+        comentario.comentario, datetime.now().isoformat()
+    ))
+    
+    await conn.commit()
+    return {"message": "Comentário adicionado com sucesso"}
 
 @router.get("/projeto/{projeto_id}/atividades")
-async def listar_atividades_projeto(projeto_id: int, current_user: dict = Depends(get_current_user)):
+async def listar_atividades_projeto(projeto_id: int, current_user: dict = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
     """
     Lista as atividades criadas pelo professor para o projeto (visível para aluno e professor)
     """
-    conn = get_db_connection()
     cursor = conn.cursor()
-    try:
-        # Permitir aluno ver apenas se for dele, professor se for orientador, admin tudo
-        if current_user.get('user_type') == 'aluno':
-            cursor.execute("SELECT * FROM projetos WHERE id = ? AND aluno_id = ?", (projeto_id, current_user['user_id']))
-        elif current_user.get('user_type') in ('professor', 'admin_professor'):
-            cursor.execute("SELECT * FROM projetos WHERE id = ? AND orientador_id = ?", (projeto_id, current_user['user_id']))
-        elif current_user.get('user_type') == 'admin':
-            cursor.execute("SELECT * FROM projetos WHERE id = ?", (projeto_id,))
-        else:
-            raise HTTPException(status_code=403, detail="Sem permissão para acessar este projeto")
-        projeto = cursor.fetchone()
-        if not projeto:
-            raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    # Permitir aluno ver apenas se for dele, professor se for orientador, admin tudo
+    if current_user.get('user_type') == 'aluno':
+        await cursor.execute("SELECT * FROM projetos WHERE id = ? AND aluno_id = ?", (projeto_id, current_user['user_id']))
+    elif current_user.get('user_type') in ('professor', 'admin_professor'):
+        await cursor.execute("SELECT * FROM projetos WHERE id = ? AND orientador_id = ?", (projeto_id, current_user['user_id']))
+    elif current_user.get('user_type') == 'admin':
+        await cursor.execute("SELECT * FROM projetos WHERE id = ?", (projeto_id,))
+    else:
+        raise HTTPException(status_code=403, detail="Sem permissão para acessar este projeto")
+    projeto = await cursor.fetchone()
+    if not projeto:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
-        cursor.execute("""
-            SELECT id, titulo, descricao, data_criacao, aluno_id
-            FROM atividades
-            WHERE projeto_id = ?
-            ORDER BY data_criacao ASC
-        """, (projeto_id,))
-        atividades = [dict(a) for a in cursor.fetchall()]
-        return atividades
-    finally:
-        conn.close()
\ No newline at end of file
+    await cursor.execute("""
+        SELECT id, titulo, descricao, data_criacao, aluno_id
+        FROM atividades
+        WHERE projeto_id = ?
+        ORDER BY data_criacao ASC
+    """, (projeto_id,))
+    atividades = [dict(a) for a in await cursor.fetchall()]
+    return atividades
\ No newline at end of file
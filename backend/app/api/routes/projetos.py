@@ -1,15 +1,21 @@
 """
 API para gerenciamento de projetos
 """
-import sqlite3
-import jwt
+import hashlib
+import logging
+import mimetypes
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
-from app.core.config import get_settings
-from fastapi.responses import FileResponse
+from app.core.blob_store import adicionar_referencia, guardar_upload, remover_referencias, resolver_caminho
+from app.core.cache import ESTATISTICAS_CACHE_TTL, estatisticas_cache
+from app.core.autenticacao import get_current_user
+from app.core.downloads import responder_arquivo
+from app.core.respostas import resposta_json, resposta_linhas
+from app.core.settings_store import EDICOES_TEXTS, HOME_TEXTS, INSCRICAO_PERIODO, settings_store
+from app.db.paginacao import LIMITE_MAXIMO, LIMITE_PADRAO, decodificar_cursor, estimar_linhas, pagina_keyset
+from app.db.session import AsyncConnection, get_db, get_db_connection
 import os
 import json
 from fastapi import UploadFile, File, Form
@@ -17,49 +23,22 @@ from fastapi import UploadFile, File, Form
 from database_setup import setup_database
 setup_database()
 
-settings = get_settings()
 router = APIRouter(prefix="/projetos", tags=["Projetos"])
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+logger = logging.getLogger(__name__)
 
-INSCRICAO_FILE = "inscricao_periodo.json"
-HOME_TEXTS_FILE = "home_texts.json"
-EDICOES_TEXTS_FILE = "edicoes_texts.json"
+async def get_inscricao_periodo():
+    return await settings_store.get(INSCRICAO_PERIODO, {"data_limite": None, "aberto": True})
 
-def get_db_connection():
-    """Obter conexão com o banco de dados"""
-    conn = sqlite3.connect('database.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+async def set_inscricao_periodo(data_limite, aberto):
+    await settings_store.set(INSCRICAO_PERIODO, {"data_limite": data_limite, "aberto": aberto})
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Obter usuário atual do token"""
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY or "fallback-secret", algorithms=["HS256"])
-        return payload
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Token inválido")
-
-def get_inscricao_periodo():
-    if os.path.exists(INSCRICAO_FILE):
-        with open(INSCRICAO_FILE, "r") as f:
-            return json.load(f)
-    return {"data_limite": None, "aberto": True}
-
-def set_inscricao_periodo(data_limite, aberto):
-    with open(INSCRICAO_FILE, "w") as f:
-        json.dump({"data_limite": data_limite, "aberto": aberto}, f)
-
-def load_texts(file_path, default_data):
-    """Carrega textos de um arquivo JSON ou retorna dados padrão"""
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            return json.load(f)
-    return default_data
-
-def save_texts(file_path, data):
-    """Salva textos em um arquivo JSON"""
-    with open(file_path, "w") as f:
-        json.dump(data, f)
+async def load_texts(chave, default_data):
+    """Carrega textos das configurações ou retorna dados padrão"""
+    return await settings_store.get(chave, default_data)
+
+async def save_texts(chave, data):
+    """Salva textos nas configurações"""
+    await settings_store.set(chave, data)
 
 # Models
 class ProjetoCadastro(BaseModel):
@@ -77,6 +56,36 @@ class ProjetoResponse(BaseModel):
     data_submissao: str
     data_aprovacao: Optional[str] = None
 
+class OrientadorResumo(BaseModel):
+    id: int
+    nome: str
+    email: str
+    area_pesquisa: Optional[str] = None
+    titulacao: Optional[str] = None
+    areas_interesse: Optional[str] = None
+    projetos_ativos: int
+    areas: List[str]
+
+class ProjetoAdmin(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    id: int
+    codigo: Optional[str] = None
+    titulo: str
+    descricao: Optional[str] = None
+    area_pesquisa: Optional[str] = None
+    palavras_chave: Optional[str] = None
+    orientador_id: Optional[int] = None
+    aluno_id: Optional[int] = None
+    status: Optional[str] = None
+    data_submissao: Optional[str] = None
+    data_aprovacao: Optional[str] = None
+    documentos_count: Optional[int] = None
+    ultima_postagem: Optional[str] = None
+    aluno_nome: Optional[str] = None
+    matricula: Optional[str] = None
+    orientador_nome: Optional[str] = None
+
 class AtividadeCadastro(BaseModel):
     titulo: str
     descricao: str
@@ -117,236 +126,222 @@ EDICOES_ANTERIORES = [
     }
 ]
 
-@router.get("/orientadores", response_model=List[dict])
-async def listar_orientadores(current_user: dict = Depends(get_current_user)):
+def _com_areas(orientador: dict) -> dict:
+    orientador['areas'] = orientador['areas_interesse'].split(',') if orientador['areas_interesse'] else []
+    return orientador
+
+@router.get("/orientadores", response_model=List[OrientadorResumo])
+async def listar_orientadores(current_user: dict = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
     """Lista todos os orientadores disponíveis"""
-    conn = get_db_connection()
     cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            SELECT id, nome, email, area_pesquisa, titulacao, areas_interesse,
-                   (SELECT COUNT(*) FROM projetos WHERE orientador_id = orientadores.id AND status = 'ativo') as projetos_ativos
-            FROM orientadores
-            ORDER BY nome
-        """)
-        orientadores = []
-        for row in cursor.fetchall():
-            orientador = dict(row)
-            orientador['areas'] = orientador['areas_interesse'].split(',') if orientador['areas_interesse'] else []
-            orientadores.append(orientador)
-        return orientadores
-    finally:
-        conn.close()
+    await cursor.execute("""
+        SELECT id, nome, email, area_pesquisa, titulacao, areas_interesse,
+               (SELECT COUNT(*) FROM projetos WHERE orientador_id = orientadores.id AND status = 'ativo') as projetos_ativos
+        FROM orientadores
+        ORDER BY nome
+    """)
+    return await resposta_linhas(cursor, transformar=_com_areas)
 
 @router.post("/cadastrar")
-async def cadastrar_projeto(projeto: ProjetoCadastro, current_user: dict = Depends(get_current_user)):
+async def cadastrar_projeto(projeto: ProjetoCadastro, current_user: dict = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
     """Cadastra um novo projeto"""
     if current_user.get('user_type') not in ('aluno', 'admin'):
         raise HTTPException(status_code=403, detail="Apenas alunos ou admin podem cadastrar projetos")
-    periodo = get_inscricao_periodo()
+    periodo = await get_inscricao_periodo()
     if not periodo.get("aberto", True):
         raise HTTPException(status_code=403, detail="Inscrições estão fechadas no momento.")
     if periodo.get("data_limite") and datetime.now() > datetime.fromisoformat(periodo["data_limite"]):
         raise HTTPException(status_code=403, detail="O período de inscrição já foi encerrado.")
-    conn = get_db_connection()
     cursor = conn.cursor()
+    # Gerar código do projeto
+    codigo = f"IC{datetime.now().year}{projeto.orientador_id:03d}{current_user['user_id']:03d}"
     
-    try:
-        # Gerar código do projeto
-        codigo = f"IC{datetime.now().year}{projeto.orientador_id:03d}{current_user['user_id']:03d}"
-        
-        # Inserir projeto
-        cursor.execute("""
-            INSERT INTO projetos (codigo, titulo, descricao, orientador_id, aluno_id, status, data_submissao)
-            VALUES (?, ?, ?, ?, ?, 'pendente', ?)
-        """, (codigo, projeto.titulo, projeto.descricao, projeto.orientador_id, current_user['user_id'], datetime.now().isoformat()))
-        
-        projeto_id = cursor.lastrowid
-        conn.commit()
-        
-        return {"message": "Projeto cadastrado com sucesso", "projeto_id": projeto_id}
-    finally:
-        conn.close()
+    # Inserir projeto
+    await cursor.execute("""
+        INSERT INTO projetos (codigo, titulo, descricao, orientador_id, aluno_id, status, data_submissao)
+        VALUES (?, ?, ?, ?, ?, 'pendente', ?)
+        RETURNING id
+    """, (codigo, projeto.titulo, projeto.descricao, projeto.orientador_id, current_user['user_id'], datetime.now().isoformat()))
+    
+    projeto_id = (await cursor.fetchone())[0]
+    await conn.commit()
+    estatisticas_cache.invalidate()
+    
+    return {"message": "Projeto cadastrado com sucesso", "projeto_id": projeto_id}
 
 @router.get("/meus-projetos")
-async def meus_projetos(current_user: dict = Depends(get_current_user)):
-    """Cadastra um novo projeto"""
+async def meus_projetos(current_user: dict = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
+    """Lista projetos do aluno logado, incluindo atividades"""
     if current_user.get('user_type') != 'aluno':
         raise HTTPException(status_code=403, detail="Endpoint apenas para alunos")
     
-    conn = get_db_connection()
     cursor = conn.cursor()
+    await cursor.execute("""
+        SELECT p.*, o.nome as orientador_nome
+        FROM projetos p
+        JOIN orientadores o ON p.orientador_id = o.id
+        WHERE p.aluno_id = ?
+        ORDER BY p.data_submissao DESC
+    """, (current_user['user_id'],))
     
-    try:
-        cursor.execute("""
-            SELECT p.*, o.nome as orientador_nome,
-                   (SELECT COUNT(*) FROM documentos WHERE projeto_id = p.id) as documentos_count,
-                   (SELECT MAX(data_upload) FROM documentos WHERE projeto_id = p.id) as ultima_postagem
-            FROM projetos p
-            JOIN orientadores o ON p.orientador_id = o.id
-            WHERE p.aluno_id = ?
-            ORDER BY p.data_submissao DESC
-        """, (current_user['user_id'],))
-        
-        projetos = []
-        for row in cursor.fetchall():
-            projeto = dict(row)
-            # Buscar atividades vinculadas a este projeto
-            cursor.execute("""
-                SELECT id, titulo, descricao, data_criacao
-                FROM atividades
-                WHERE projeto_id = ?
-                ORDER BY data_criacao ASC
-            """, (projeto["id"],))
-            atividades = [dict(a) for a in cursor.fetchall()]
-            projeto["atividades"] = atividades
-            projetos.append(projeto)
-        
+    projetos = [dict(row) for row in await cursor.fetchall()]
+    if not projetos:
         return projetos
-    finally:
-        conn.close()
+
+    # Buscar as atividades de todos os projetos do aluno em uma única consulta
+    await cursor.execute("""
+        SELECT id, titulo, descricao, data_criacao, projeto_id
+        FROM atividades
+        WHERE projeto_id IN (SELECT id FROM projetos WHERE aluno_id = ?)
+        ORDER BY data_criacao ASC
+    """, (current_user['user_id'],))
+    atividades_por_projeto = {projeto["id"]: [] for projeto in projetos}
+    for row in await cursor.fetchall():
+        atividade = dict(row)
+        projeto_id = atividade.pop("projeto_id")
+        if projeto_id in atividades_por_projeto:
+            atividades_por_projeto[projeto_id].append(atividade)
+
+    for projeto in projetos:
+        projeto["atividades"] = atividades_por_projeto[projeto["id"]]
+    
+    return projetos
 
 @router.get("/pendentes")
-async def projetos_pendentes(current_user: dict = Depends(get_current_user)):
+async def projetos_pendentes(current_user: dict = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
     """Lista projetos pendentes para o orientador"""
     if current_user.get('user_type') not in ('professor', 'admin'):
         raise HTTPException(status_code=403, detail="Endpoint apenas para professores ou admin")
     
-    conn = get_db_connection()
     cursor = conn.cursor()
+    await cursor.execute("""
+        SELECT p.*, a.nome as aluno_nome, a.matricula
+        FROM projetos p
+        JOIN alunos a ON p.aluno_id = a.id
+        WHERE p.orientador_id = ? AND p.status = 'pendente'
+        ORDER BY p.data_submissao DESC
+    """, (current_user['user_id'],))
     
-    try:
-        cursor.execute("""
-            SELECT p.*, a.nome as aluno_nome, a.matricula
-            FROM projetos p
-            JOIN alunos a ON p.aluno_id = a.id
-            WHERE p.orientador_id = ? AND p.status = 'pendente'
-            ORDER BY p.data_submissao DESC
-        """, (current_user['user_id'],))
-        
-        projetos = []
-        for row in cursor.fetchall():
-            projeto = dict(row)
-            projetos.append(projeto)
-        
-        return projetos
-    finally:
-        conn.close()
+    projetos = []
+    for row in await cursor.fetchall():
+        projeto = dict(row)
+        projetos.append(projeto)
+    
+    return projetos
 
 @router.get("/ativos")
-async def projetos_ativos(current_user: dict = Depends(get_current_user)):
+async def projetos_ativos(current_user: dict = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
     """Lista projetos ativos do orientador"""
     if current_user.get('user_type') not in ('professor', 'admin'):
         raise HTTPException(status_code=403, detail="Endpoint apenas para professores ou admin")
     
-    conn = get_db_connection()
     cursor = conn.cursor()
+    await cursor.execute("""
+        SELECT p.*, a.nome as aluno_nome, a.matricula
+        FROM projetos p
+        JOIN alunos a ON p.aluno_id = a.id
+        WHERE p.orientador_id = ? AND p.status = 'ativo'
+        ORDER BY p.data_aprovacao DESC
+    """, (current_user['user_id'],))
     
-    try:
-        cursor.execute("""
-            SELECT p.*, a.nome as aluno_nome, a.matricula,
-                   (SELECT COUNT(*) FROM documentos WHERE projeto_id = p.id) as documentos_count,
-                   (SELECT MAX(data_upload) FROM documentos WHERE projeto_id = p.id) as ultima_postagem
-            FROM projetos p
-            JOIN alunos a ON p.aluno_id = a.id
-            WHERE p.orientador_id = ? AND p.status = 'ativo'
-            ORDER BY p.data_aprovacao DESC
-        """, (current_user['user_id'],))
-        
-        projetos = []
-        for row in cursor.fetchall():
-            projeto = dict(row)
-            projetos.append(projeto)
-        
-        return projetos
-    finally:
-        conn.close()
+    projetos = []
+    for row in await cursor.fetchall():
+        projeto = dict(row)
+        projetos.append(projeto)
+    
+    return projetos
 
 @router.post("/aprovar/{projeto_id}")
-async def aprovar_projeto(projeto_id: int, current_user: dict = Depends(get_current_user)):
+async def aprovar_projeto(projeto_id: int, current_user: dict = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
     """Aprova um projeto"""
     if current_user.get('user_type') not in ('professor', 'admin'):
         raise HTTPException(status_code=403, detail="Apenas orientadores ou admin podem aprovar projetos")
     
-    conn = get_db_connection()
     cursor = conn.cursor()
+    # Verificar se o projeto é do orientador
+    await cursor.execute("SELECT * FROM projetos WHERE id = ? AND orientador_id = ?", (projeto_id, current_user['user_id']))
+    projeto = await cursor.fetchone()
     
-    try:
-        # Verificar se o projeto é do orientador
-        cursor.execute("SELECT * FROM projetos WHERE id = ? AND orientador_id = ?", (projeto_id, current_user['user_id']))
-        projeto = cursor.fetchone()
-        
-        if not projeto:
-            raise HTTPException(status_code=404, detail="Projeto não encontrado")
-        
-        # Aprovar projeto
-        cursor.execute("""
-            UPDATE projetos 
-            SET status = 'ativo', data_aprovacao = ?
-            WHERE id = ?
-        """, (datetime.now().isoformat(), projeto_id))
-        
-        conn.commit()
-        return {"message": "Projeto aprovado com sucesso"}
-    finally:
-        conn.close()
+    if not projeto:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    
+    # Aprovar projeto
+    await cursor.execute("""
+        UPDATE projetos 
+        SET status = 'ativo', data_aprovacao = ?
+        WHERE id = ?
+    """, (datetime.now().isoformat(), projeto_id))
+    
+    await conn.commit()
+    estatisticas_cache.invalidate()
+    return {"message": "Projeto aprovado com sucesso"}
+
+# Consulta base das listagens do admin (pendentes e ativos)
+CONSULTA_PROJETOS_ADMIN = """
+    SELECT p.*, a.nome as aluno_nome, a.matricula, o.nome as orientador_nome
+    FROM projetos p
+    JOIN alunos a ON p.aluno_id = a.id
+    JOIN orientadores o ON p.orientador_id = o.id
+"""
 
-@router.get("/todos-pendentes")
-async def todos_projetos_pendentes(current_user: dict = Depends(get_current_user)):
-    """Lista todos os projetos pendentes (admin)"""
-    if current_user.get('user_type') not in ('admin',):
-        raise HTTPException(status_code=403, detail="Apenas admin pode acessar todos os projetos pendentes")
-    conn = get_db_connection()
+async def listar_projetos_admin(conn: AsyncConnection, consulta: str, filtro: str, coluna: str,
+                                limite: Optional[int], cursor_pagina: Optional[str], estimar: bool) -> Response:
+    """
+    Sem `limite`/`cursor` retorna a lista inteira, como antes. Com eles,
+    retorna uma página por keyset (app/db/paginacao.py), com o cursor da
+    próxima página no header X-Next-Cursor e, se `estimar_total`, o total
+    aproximado em X-Total-Count-Estimate. O JSON é gerado direto das linhas
+    (app/core/respostas.py).
+    """
     cursor = conn.cursor()
+    if limite is None and cursor_pagina is None:
+        await cursor.execute(f"{consulta} WHERE {filtro} ORDER BY {coluna} DESC")
+        return await resposta_linhas(cursor)
     try:
-        cursor.execute("""
-            SELECT p.*, a.nome as aluno_nome, a.matricula, o.nome as orientador_nome
-            FROM projetos p
-            JOIN alunos a ON p.aluno_id = a.id
-            JOIN orientadores o ON p.orientador_id = o.id
-            WHERE p.status = 'pendente'
-            ORDER BY p.data_submissao DESC
-        """)
-        projetos = []
-        for row in cursor.fetchall():
-            projeto = dict(row)
-            projetos.append(projeto)
-        return projetos
-    finally:
-        conn.close()
-
-@router.get("/todos-ativos")
-async def todos_projetos_ativos(current_user: dict = Depends(get_current_user)):
-    """Lista todos os projetos ativos (admin)"""
+        apos = decodificar_cursor(cursor_pagina) if cursor_pagina else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+    projetos, proximo = await pagina_keyset(cursor, consulta, filtro, [], coluna, limite or LIMITE_PADRAO, apos)
+    headers = {}
+    if proximo:
+        headers["X-Next-Cursor"] = proximo
+    if estimar:
+        headers["X-Total-Count-Estimate"] = str(await estimar_linhas(conn, "projetos", filtro))
+    return resposta_json(projetos, headers=headers)
+
+@router.get("/todos-pendentes", response_model=List[ProjetoAdmin])
+async def todos_projetos_pendentes(
+    limite: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO),
+    cursor_pagina: Optional[str] = Query(None, alias="cursor"),
+    estimar_total: bool = False,
+    current_user: dict = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
+):
+    """Lista todos os projetos pendentes (admin), paginável por cursor em (data_submissao, id)"""
+    if current_user.get('user_type') not in ('admin',):
+        raise HTTPException(status_code=403, detail="Apenas admin pode acessar todos os projetos pendentes")
+    return await listar_projetos_admin(conn, CONSULTA_PROJETOS_ADMIN, "p.status = 'pendente'",
+                                       "p.data_submissao", limite, cursor_pagina, estimar_total)
+
+@router.get("/todos-ativos", response_model=List[ProjetoAdmin])
+async def todos_projetos_ativos(
+    limite: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO),
+    cursor_pagina: Optional[str] = Query(None, alias="cursor"),
+    estimar_total: bool = False,
+    current_user: dict = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
+):
+    """Lista todos os projetos ativos (admin), paginável por cursor em (data_aprovacao, id)"""
     if current_user.get('user_type') not in ('admin',):
         raise HTTPException(status_code=403, detail="Apenas admin pode acessar todos os projetos ativos")
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            SELECT p.*, a.nome as aluno_nome, a.matricula, o.nome as orientador_nome,
-                   (SELECT COUNT(*) FROM documentos WHERE projeto_id = p.id) as documentos_count,
-                   (SELECT MAX(data_upload) FROM documentos WHERE projeto_id = p.id) as ultima_postagem
-            FROM projetos p
-            JOIN alunos a ON p.aluno_id = a.id
-            JOIN orientadores o ON p.orientador_id = o.id
-            WHERE p.status = 'ativo'
-            ORDER BY p.data_aprovacao DESC
-        """)
-        projetos = []
-        for row in cursor.fetchall():
-            projeto = dict(row)
-            projetos.append(projeto)
-        return projetos
-    finally:
-        conn.close()
+    return await listar_projetos_admin(conn, CONSULTA_PROJETOS_ADMIN, "p.status = 'ativo'",
+                                       "p.data_aprovacao", limite, cursor_pagina, estimar_total)
 
 @router.post("/enviar-atividade")
-async def enviar_atividade(atividade: AtividadeCadastro, current_user: dict = Depends(get_current_user)):
+async def enviar_atividade(atividade: AtividadeCadastro, current_user: dict = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
     """Professor cria e envia uma atividade para um aluno vinculado a um projeto"""
     if current_user.get('user_type') not in ('professor', 'orientador', 'admin_professor'):
         raise HTTPException(status_code=403, detail="Apenas professores podem criar atividades")
-    conn = get_db_connection()
     cursor = conn.cursor()
     try:
         projeto_id = atividade.projeto_id
@@ -356,17 +351,17 @@ async def enviar_atividade(atividade: AtividadeCadastro, current_user: dict = De
             except Exception:
                 raise HTTPException(status_code=400, detail="ID do projeto inválido")
         # Busca o projeto e o aluno vinculado
-        cursor.execute("SELECT * FROM projetos WHERE id = ? AND orientador_id = ?", (projeto_id, current_user['user_id']))
-        projeto = cursor.fetchone()
+        await cursor.execute("SELECT * FROM projetos WHERE id = ? AND orientador_id = ?", (projeto_id, current_user['user_id']))
+        projeto = await cursor.fetchone()
         if not projeto:
             raise HTTPException(status_code=400, detail="Projeto não encontrado ou não pertence ao professor")
         aluno_id = projeto['aluno_id']
         if not aluno_id:
             raise HTTPException(status_code=400, detail="Projeto não possui aluno vinculado")
-        # Log para depuração
-        print(f"Inserindo atividade: titulo={atividade.titulo}, projeto_id={projeto_id}, aluno_id={aluno_id}, orientador_id={current_user['user_id']}")
+        logger.debug("Inserindo atividade: %s", atividade.titulo,
+                     extra={"projeto_id": projeto_id, "aluno_id": aluno_id, "orientador_id": current_user['user_id']})
         # Cria a atividade
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO atividades (titulo, descricao, projeto_id, aluno_id, orientador_id, data_criacao)
             VALUES (?, ?, ?, ?, ?, ?)
         """, (
@@ -377,13 +372,11 @@ async def enviar_atividade(atividade: AtividadeCadastro, current_user: dict = De
             current_user['user_id'],
             datetime.now().isoformat()
         ))
-        conn.commit()
+        await conn.commit()
         return {"message": "Atividade criada e enviada para o aluno"}
     except Exception as e:
-        print("Erro ao enviar atividade:", e)
+        logger.exception("❌ Erro ao enviar atividade: %s", e)
         raise HTTPException(status_code=500, detail=f"Erro interno ao enviar atividade: {e}")
-    finally:
-        conn.close()
 
 @router.get("/edicoes-anteriores")
 async def listar_edicoes_anteriores():
@@ -417,17 +410,19 @@ async def listar_projetos_edicao(ano: int):
     return []
 
 @router.get("/edicoes-anteriores/{ano}/edital")
-async def baixar_edital_edicao(ano: int):
+async def baixar_edital_edicao(ano: int, conn: AsyncConnection = Depends(get_db)):
     """
     Baixa o edital de uma edição específica
     """
     for ed in EDICOES_ANTERIORES:
         if ed["ano"] == ano:
-            return FileResponse(ed["edital"], filename=f"edital-ic-{ano}.pdf", media_type="application/pdf")
+            arquivo = await resolver_caminho(conn, ed["edital"])
+            if arquivo:
+                return responder_arquivo(arquivo, filename=f"edital-ic-{ano}.pdf", media_type="application/pdf")
     return {"detail": "Edital não encontrado"}
 
 @router.get("/edicoes-anteriores/{ano}/projeto/{projeto_idx}")
-async def baixar_projeto_edicao(ano: int, projeto_idx: int):
+async def baixar_projeto_edicao(ano: int, projeto_idx: int, conn: AsyncConnection = Depends(get_db)):
     """
     Baixa o arquivo de um projeto de uma edição específica
     """
@@ -436,13 +431,17 @@ async def baixar_projeto_edicao(ano: int, projeto_idx: int):
             projetos = ed.get("projetos", [])
             if 0 <= projeto_idx < len(projetos):
                 proj = projetos[projeto_idx]
-                return FileResponse(proj["arquivo"], filename=proj["arquivo"].split("/")[-1])
+                arquivo = await resolver_caminho(conn, proj["arquivo"])
+                if arquivo:
+                    filename = proj["arquivo"].split("/")[-1]
+                    return responder_arquivo(arquivo, filename=filename,
+                                             media_type=mimetypes.guess_type(filename)[0])
     return {"detail": "Projeto não encontrado"}
 
 @router.get("/inscricao-periodo")
 async def get_periodo_inscricao():
     """Retorna o período de inscrição e status"""
-    return get_inscricao_periodo()
+    return await get_inscricao_periodo()
 
 @router.post("/inscricao-periodo")
 async def set_periodo_inscricao(data: dict, current_user: dict = Depends(get_current_user)):
@@ -451,7 +450,7 @@ async def set_periodo_inscricao(data: dict, current_user: dict = Depends(get_cur
         raise HTTPException(status_code=403, detail="Apenas admin ou admin_professor podem definir o período de inscrição")
     data_limite = data.get("data_limite")
     aberto = data.get("aberto", True)
-    set_inscricao_periodo(data_limite, aberto)
+    await set_inscricao_periodo(data_limite, aberto)
     return {"message": "Período de inscrição atualizado", "data_limite": data_limite, "aberto": aberto}
 
 @router.post("/abrir-inscricao")
@@ -460,8 +459,8 @@ async def abrir_inscricao(current_user: dict = Depends(get_current_user)):
     if current_user.get('user_type') not in ('admin',):
         raise HTTPException(status_code=403, detail="Apenas admin pode abrir inscrições")
     
-    periodo = get_inscricao_periodo()
-    set_inscricao_periodo(periodo.get("data_limite"), True)
+    periodo = await get_inscricao_periodo()
+    await set_inscricao_periodo(periodo.get("data_limite"), True)
     return {"message": "Inscrições reabertas com sucesso"}
 
 @router.post("/fechar-inscricao")
@@ -470,8 +469,8 @@ async def fechar_inscricao(current_user: dict = Depends(get_current_user)):
     if current_user.get('user_type') not in ('admin',):
         raise HTTPException(status_code=403, detail="Apenas admin pode fechar inscrições")
     
-    periodo = get_inscricao_periodo()
-    set_inscricao_periodo(periodo.get("data_limite"), False)
+    periodo = await get_inscricao_periodo()
+    await set_inscricao_periodo(periodo.get("data_limite"), False)
     return {"message": "Inscrições fechadas"}
 
 @router.post("/definir-data-limite")
@@ -484,29 +483,26 @@ async def definir_data_limite(data: dict, current_user: dict = Depends(get_curre
     if not data_limite:
         raise HTTPException(status_code=400, detail="Data limite é obrigatória")
     
-    set_inscricao_periodo(data_limite, True)
+    await set_inscricao_periodo(data_limite, True)
     return {"message": "Data limite definida com sucesso", "data_limite": data_limite}
 
-@router.get("/todos-projetos")
-async def listar_todos_projetos(current_user: dict = Depends(get_current_user)):
-    """Admin lista todos os projetos no banco de dados"""
+@router.get("/todos-projetos", response_model=List[ProjetoAdmin])
+async def listar_todos_projetos(
+    limite: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO),
+    cursor_pagina: Optional[str] = Query(None, alias="cursor"),
+    estimar_total: bool = False,
+    current_user: dict = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
+):
+    """Admin lista todos os projetos no banco de dados, paginável por cursor em (data_submissao, id)"""
     if current_user.get('user_type') not in ('admin',):
         raise HTTPException(status_code=403, detail="Apenas admin pode visualizar todos os projetos")
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            SELECT p.*, a.nome as aluno_nome, o.nome as orientador_nome
-            FROM projetos p
-            LEFT JOIN alunos a ON p.aluno_id = a.id
-            LEFT JOIN orientadores o ON p.orientador_id = o.id
-            ORDER BY p.data_submissao DESC
-        """)
-        projetos = [dict(row) for row in cursor.fetchall()]
-        return projetos
-    finally:
-        conn.close()
+    return await listar_projetos_admin(conn, """
+        SELECT p.*, a.nome as aluno_nome, o.nome as orientador_nome
+        FROM projetos p
+        LEFT JOIN alunos a ON p.aluno_id = a.id
+        LEFT JOIN orientadores o ON p.orientador_id = o.id
+    """, "1 = 1", "p.data_submissao", limite, cursor_pagina, estimar_total)
 
 @router.get("/home-texts")
 async def get_home_texts():
@@ -516,7 +512,7 @@ async def get_home_texts():
         "subtitulo": "Conecte-se com orientadores, desenvolva projetos inovadores e dê os primeiros passos na sua carreira de pesquisador.",
         "texto_pict": ""
     }
-    return load_texts(HOME_TEXTS_FILE, default_data)
+    return await load_texts(HOME_TEXTS, default_data)
 
 @router.post("/home-texts")
 async def update_home_texts(data: dict, current_user: dict = Depends(get_current_user)):
@@ -528,7 +524,7 @@ async def update_home_texts(data: dict, current_user: dict = Depends(get_current
         "subtitulo": data.get("subtitulo", ""),
         "texto_pict": data.get("texto_pict", "")
     }
-    save_texts(HOME_TEXTS_FILE, updated_data)
+    await save_texts(HOME_TEXTS, updated_data)
     return {"message": "Textos da Home atualizados com sucesso"}
 
 # Remover o uso do arquivo edicoes_texts.json para projetos/edições anteriores e usar o banco de dados
@@ -546,33 +542,29 @@ async def update_home_texts(data: dict, current_user: dict = Depends(get_current
 # );
 
 @router.get("/edicoes-texts")
-async def get_edicoes_texts():
+async def get_edicoes_texts(conn: AsyncConnection = Depends(get_db)):
     """Retorna os textos e edições da página de Edições Anteriores"""
     default_data = {
         "titulo": "Conheça Projetos de Edições Anteriores",
         "subtitulo": "Veja exemplos de projetos já realizados e acesse os editais das últimas edições do programa de Iniciação Científica.",
         "edicoes": []
     }
-    textos = load_texts(EDICOES_TEXTS_FILE, default_data)
-    conn = get_db_connection()
+    textos = await load_texts(EDICOES_TEXTS, default_data)
     cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT ano, edital FROM edicoes_anteriores ORDER BY ano DESC")
-        edicoes = []
-        for row in cursor.fetchall():
-            ano = row["ano"]
-            edital = row["edital"]
-            cursor.execute("SELECT titulo, aluno, orientador, arquivo FROM projetos_edicao WHERE ano = ? ORDER BY id ASC", (ano,))
-            projetos = [dict(p) for p in cursor.fetchall()]
-            edicoes.append({
-                "ano": ano,
-                "edital": edital,
-                "projetos": projetos
-            })
-        textos["edicoes"] = edicoes
-        return textos
-    finally:
-        conn.close()
+    await cursor.execute("SELECT ano, edital FROM edicoes_anteriores ORDER BY ano DESC")
+    edicoes = []
+    for row in await cursor.fetchall():
+        ano = row["ano"]
+        edital = row["edital"]
+        await cursor.execute("SELECT titulo, aluno, orientador, arquivo FROM projetos_edicao WHERE ano = ? ORDER BY id ASC", (ano,))
+        projetos = [dict(p) for p in await cursor.fetchall()]
+        edicoes.append({
+            "ano": ano,
+            "edital": edital,
+            "projetos": projetos
+        })
+    textos["edicoes"] = edicoes
+    return textos
 
 @router.post("/edicoes-texts")
 async def update_edicoes_texts(data: dict, current_user: dict = Depends(get_current_user)):
@@ -583,11 +575,11 @@ async def update_edicoes_texts(data: dict, current_user: dict = Depends(get_curr
         "titulo": data.get("titulo", ""),
         "subtitulo": data.get("subtitulo", "")
     }
-    save_texts(EDICOES_TEXTS_FILE, updated_data)
+    await save_texts(EDICOES_TEXTS, updated_data)
     return {"message": "Textos da página de Edições Anteriores atualizados com sucesso"}
 
 @router.post("/edicoes-anteriores")
-async def add_edicao(data: dict, current_user: dict = Depends(get_current_user)):
+async def add_edicao(data: dict, current_user: dict = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
     """Adiciona um novo ano de edição"""
     if current_user.get('user_type') != 'admin':
         raise HTTPException(status_code=403, detail="Apenas admin pode adicionar edições")
@@ -595,17 +587,13 @@ async def add_edicao(data: dict, current_user: dict = Depends(get_current_user))
     edital = data.get("edital", None)
     if not ano:
         raise HTTPException(status_code=400, detail="Ano é obrigatório")
-    conn = get_db_connection()
     cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT 1 FROM edicoes_anteriores WHERE ano = ?", (ano,))
-        if cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Ano já existe")
-        cursor.execute("INSERT INTO edicoes_anteriores (ano, edital) VALUES (?, ?)", (ano, edital))
-        conn.commit()
-        return {"message": "Edição adicionada com sucesso"}
-    finally:
-        conn.close()
+    await cursor.execute("SELECT 1 FROM edicoes_anteriores WHERE ano = ?", (ano,))
+    if await cursor.fetchone():
+        raise HTTPException(status_code=400, detail="Ano já existe")
+    await cursor.execute("INSERT INTO edicoes_anteriores (ano, edital) VALUES (?, ?)", (ano, edital))
+    await conn.commit()
+    return {"message": "Edição adicionada com sucesso"}
 
 @router.post("/edicoes-anteriores/projetos")
 async def add_projeto_to_edicao(
@@ -614,7 +602,8 @@ async def add_projeto_to_edicao(
     aluno: str = Form(...),
     orientador: str = Form(...),
     arquivo: UploadFile = File(None),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
 ):
     """
     Adiciona um novo projeto a uma edição existente, aceitando upload de arquivo.
@@ -623,114 +612,115 @@ async def add_projeto_to_edicao(
     if current_user.get('user_type') != 'admin':
         raise HTTPException(status_code=403, detail="Apenas admin pode adicionar projetos")
 
-    # Salvar arquivo se enviado
+    cursor = conn.cursor()
+    await cursor.execute("SELECT 1 FROM edicoes_anteriores WHERE ano = ?", (ano,))
+    if not await cursor.fetchone():
+        raise HTTPException(status_code=404, detail="Ano não encontrado")
+    # Evita duplicidade
+    await cursor.execute(
+        "SELECT 1 FROM projetos_edicao WHERE ano = ? AND titulo = ? AND aluno = ? AND orientador = ?",
+        (ano, titulo.strip(), aluno.strip(), orientador.strip())
+    )
+    if await cursor.fetchone():
+        raise HTTPException(status_code=409, detail="Projeto já cadastrado para esta edição")
+
+    # Guardar arquivo se enviado (depois das validações, para não gravar à toa)
     arquivo_path = ""
+    arquivo_salvo = None
     if arquivo and arquivo.filename:
         pasta = f"uploads/edicoes_anteriores/{ano}"
-        os.makedirs(pasta, exist_ok=True)
-        arquivo_path = os.path.join(pasta, arquivo.filename)
-        contents = await arquivo.read()
-        with open(arquivo_path, "wb") as f:
-            f.write(contents)
-
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT 1 FROM edicoes_anteriores WHERE ano = ?", (ano,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Ano não encontrado")
-        # Evita duplicidade
-        cursor.execute(
-            "SELECT 1 FROM projetos_edicao WHERE ano = ? AND titulo = ? AND aluno = ? AND orientador = ?",
-            (ano, titulo.strip(), aluno.strip(), orientador.strip())
-        )
-        if cursor.fetchone():
-            raise HTTPException(status_code=409, detail="Projeto já cadastrado para esta edição")
-        cursor.execute(
-            "INSERT INTO projetos_edicao (ano, titulo, aluno, orientador, arquivo) VALUES (?, ?, ?, ?, ?)",
-            (ano, titulo.strip(), aluno.strip(), orientador.strip(), arquivo_path)
-        )
-        conn.commit()
-        return {"message": "Projeto adicionado com sucesso"}
-    finally:
-        conn.close()
+        arquivo_path = os.path.join(pasta, os.path.basename(arquivo.filename))
+        arquivo_salvo = await guardar_upload(arquivo)
+
+    await cursor.execute(
+        "INSERT INTO projetos_edicao (ano, titulo, aluno, orientador, arquivo, sha256) VALUES (?, ?, ?, ?, ?, ?)",
+        (ano, titulo.strip(), aluno.strip(), orientador.strip(), arquivo_path,
+         arquivo_salvo.sha256 if arquivo_salvo else None)
+    )
+    if arquivo_salvo:
+        await adicionar_referencia(cursor, arquivo_salvo)
+    await conn.commit()
+    return {"message": "Projeto adicionado com sucesso"}
 
 @router.post("/edicoes-anteriores/remover")
-async def remover_edicao(data: dict, current_user: dict = Depends(get_current_user)):
+async def remover_edicao(data: dict, current_user: dict = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
     """Remove uma edição (ano) e todos os projetos associados"""
     if current_user.get('user_type') != 'admin':
         raise HTTPException(status_code=403, detail="Apenas admin pode remover edições")
     ano = data.get("ano")
-    conn = get_db_connection()
     cursor = conn.cursor()
-    try:
-        cursor.execute("DELETE FROM projetos_edicao WHERE ano = ?", (ano,))
-        cursor.execute("DELETE FROM edicoes_anteriores WHERE ano = ?", (ano,))
-        conn.commit()
-        return {"message": "Edição removida com sucesso"}
-    finally:
-        conn.close()
+    await cursor.execute("SELECT sha256 FROM projetos_edicao WHERE ano = ?", (ano,))
+    await remover_referencias(cursor, [row[0] for row in await cursor.fetchall()])
+    await cursor.execute("DELETE FROM projetos_edicao WHERE ano = ?", (ano,))
+    await cursor.execute("DELETE FROM edicoes_anteriores WHERE ano = ?", (ano,))
+    await conn.commit()
+    return {"message": "Edição removida com sucesso"}
 
 @router.post("/edicoes-anteriores/remover-projeto")
-async def remover_projeto_edicao(data: dict, current_user: dict = Depends(get_current_user)):
+async def remover_projeto_edicao(data: dict, current_user: dict = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
     """Remove um projeto de uma edição"""
     if current_user.get('user_type') != 'admin':
         raise HTTPException(status_code=403, detail="Apenas admin pode remover projetos")
     ano = data.get("ano")
     idx = data.get("idx")
-    conn = get_db_connection()
     cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT id FROM projetos_edicao WHERE ano = ? ORDER BY id ASC", (ano,))
-        projetos = cursor.fetchall()
-        if idx < 0 or idx >= len(projetos):
-            raise HTTPException(status_code=400, detail="Projeto não encontrado")
-        projeto_id = projetos[idx][0]
-        cursor.execute("DELETE FROM projetos_edicao WHERE id = ?", (projeto_id,))
-        conn.commit()
-        return {"message": "Projeto removido com sucesso"}
-    finally:
-        conn.close()
+    await cursor.execute("SELECT id, sha256 FROM projetos_edicao WHERE ano = ? ORDER BY id ASC", (ano,))
+    projetos = await cursor.fetchall()
+    if idx < 0 or idx >= len(projetos):
+        raise HTTPException(status_code=400, detail="Projeto não encontrado")
+    projeto_id = projetos[idx][0]
+    await remover_referencias(cursor, [projetos[idx][1]])
+    await cursor.execute("DELETE FROM projetos_edicao WHERE id = ?", (projeto_id,))
+    await conn.commit()
+    return {"message": "Projeto removido com sucesso"}
 
 @router.get("/estatisticas")
-async def estatisticas_portal():
+async def estatisticas_portal(request: Request, conn: AsyncConnection = Depends(get_db)):
     """
     Retorna estatísticas para a home:
     - projetos_total: projetos em andamento + finalizados
     - orientadores_total: professores cadastrados
     - alunos_total: alunos cadastrados
     - projetos_finalizados: projetos finalizados
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        # Projetos em andamento (status = 'ativo')
-        cursor.execute("SELECT COUNT(*) FROM projetos WHERE status = 'ativo'")
-        projetos_ativos = cursor.fetchone()[0] or 0
-
-        # Projetos finalizados (status = 'finalizado')
-        cursor.execute("SELECT COUNT(*) FROM projetos WHERE status = 'finalizado'")
-        projetos_finalizados = cursor.fetchone()[0] or 0
-
-        # Total de projetos (ativos + finalizados)
-        projetos_total = projetos_ativos + projetos_finalizados
 
-        # Orientadores cadastrados
-        cursor.execute("SELECT COUNT(*) FROM orientadores")
-        orientadores_total = cursor.fetchone()[0] or 0
-
-        # Alunos cadastrados
-        cursor.execute("SELECT COUNT(*) FROM alunos")
-        alunos_total = cursor.fetchone()[0] or 0
-
-        return {
-            "projetos_total": projetos_total,
-            "orientadores_total": orientadores_total,
-            "alunos_total": alunos_total,
+    O resultado fica em cache por ESTATISTICAS_CACHE_TTL segundos e é
+    invalidado pelas rotas que cadastram projetos, mudam status ou criam usuários.
+    """
+    cached = estatisticas_cache.get()
+    if cached is None:
+        versao = estatisticas_cache.versao
+        cursor = conn.cursor()
+        await cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM projetos WHERE status = 'ativo') as projetos_ativos,
+                (SELECT COUNT(*) FROM projetos WHERE status = 'finalizado') as projetos_finalizados,
+                (SELECT COUNT(*) FROM orientadores) as orientadores_total,
+                (SELECT COUNT(*) FROM alunos) as alunos_total
+        """)
+        row = await cursor.fetchone()
+        projetos_ativos = row["projetos_ativos"] or 0
+        projetos_finalizados = row["projetos_finalizados"] or 0
+        estatisticas = {
+            # Total de projetos (ativos + finalizados)
+            "projetos_total": projetos_ativos + projetos_finalizados,
+            "orientadores_total": row["orientadores_total"] or 0,
+            "alunos_total": row["alunos_total"] or 0,
             "projetos_finalizados": projetos_finalizados
         }
-    finally:
-        conn.close()
+        corpo = json.dumps(estatisticas, separators=(",", ":")).encode()
+        etag = '"' + hashlib.sha256(corpo).hexdigest()[:32] + '"'
+        cached = (corpo, etag)
+        estatisticas_cache.set(cached, versao=versao)
+
+    corpo, etag = cached
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={int(ESTATISTICAS_CACHE_TTL)}",
+    }
+    if_none_match = [valor.strip() for valor in request.headers.get("if-none-match", "").split(",")]
+    if etag in if_none_match or "*" in if_none_match:
+        return Response(status_code=304, headers=headers)
+    return Response(content=corpo, media_type="application/json", headers=headers)
 
 def criar_projetos_finalizados_para_testes():
     """
@@ -790,7 +780,8 @@ def criar_projetos_finalizados_para_testes():
                 f"{proj['ano']}-12-31T00:00:00"
             ))
         conn.commit()
-        print("Projetos finalizados de teste inseridos com sucesso!")
+        estatisticas_cache.invalidate()
+        logger.info("✅ Projetos finalizados de teste inseridos com sucesso!")
     finally:
         conn.close()
 
@@ -0,0 +1,98 @@
+"""
+Verificação dos tokens de acesso (JWT) das rotas autenticadas
+
+Todas as rotas usam a mesma dependência get_current_user. O token é
+verificado (HMAC + JSON) uma vez só: as claims decodificadas ficam em um LRU
+limitado, indexado pelo sha256 do token, até o `exp` do próprio token. Assim
+o polling dos painéis não refaz a verificação a cada requisição, e um token
+expirado nunca é aceito a partir do cache.
+
+Cada processo do uvicorn tem o seu cache; estatisticas_tokens() expõe os
+acertos e as faltas.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import jwt
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+
+from app.core.config import get_settings
+
+settings = get_settings()
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+
+TOKEN_CACHE_TAMANHO = int(os.getenv("TOKEN_CACHE_TAMANHO", "4096"))
+
+
+class ClaimsCache:
+    """LRU de claims por token, com expiração no `exp` de cada token"""
+
+    def __init__(self, tamanho: int):
+        self.tamanho = tamanho
+        self._lock = threading.Lock()
+        self._itens: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self.acertos = 0
+        self.faltas = 0
+
+    def get(self, chave: bytes, agora: Optional[float] = None) -> Optional[dict]:
+        agora = time.time() if agora is None else agora
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None or agora >= item[0]:
+                if item is not None:
+                    del self._itens[chave]
+                self.faltas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[1]
+
+    def set(self, chave: bytes, expira_em: float, claims: dict):
+        with self._lock:
+            self._itens[chave] = (expira_em, claims)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.acertos = self.faltas = 0
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {"acertos": self.acertos, "faltas": self.faltas,
+                    "tamanho": len(self._itens), "capacidade": self.tamanho}
+
+
+claims_cache = ClaimsCache(TOKEN_CACHE_TAMANHO)
+
+
+def decodificar_token(token: str) -> dict:
+    """Claims do token; levanta jwt.ExpiredSignatureError / jwt.PyJWTError como jwt.decode"""
+    chave = hashlib.sha256(token.encode()).digest()
+    claims = claims_cache.get(chave)
+    if claims is None:
+        claims = jwt.decode(token, settings.SECRET_KEY or "fallback-secret", algorithms=["HS256"])
+        # Tokens sem exp não são guardados: não há como saber até quando valem
+        if isinstance(claims.get("exp"), (int, float)):
+            claims_cache.set(chave, claims["exp"], claims)
+    # Cópia: uma rota que altere o dict não muda o que está no cache
+    return dict(claims)
+
+
+def estatisticas_tokens() -> Dict[str, int]:
+    return claims_cache.estatisticas()
+
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+    """Obter usuário atual do token"""
+    try:
+        return decodificar_token(token)
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
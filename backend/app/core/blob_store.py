@@ -0,0 +1,158 @@
+"""
+Armazenamento de uploads endereçado por conteúdo (deduplicado)
+
+O conteúdo de cada arquivo é gravado uma única vez em
+uploads/blobs/<2 primeiros caracteres do hash>/<sha256>. As linhas de
+documentos (caminho_arquivo) e projetos_edicao (arquivo) continuam com o
+caminho lógico de antes (uploads/projeto_{id}/{nome}) e guardam o sha256 do
+conteúdo; resolver_caminho() traduz o caminho lógico para o blob e, para
+arquivos ainda não migrados, para o arquivo antigo em disco.
+
+A tabela blobs conta quantas linhas de documentos/projetos_edicao apontam
+para cada hash. O contador é atualizado na mesma transação que insere ou
+remove a linha; os arquivos sem referência são apagados por coletar_blobs()
+(migrate_uploads_to_blobs.py --coletar), com uma carência para não apagar um
+blob gravado por um upload cuja transação ainda não terminou.
+"""
+import os
+import time
+from datetime import datetime
+from typing import BinaryIO, Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import UploadFile
+
+from app.core.uploads import UPLOAD_MAX_BYTES, ArquivoSalvo, copiar_para_temporario, gravar_upload
+from app.db.session import AsyncConnection, AsyncCursor, Connection, Database
+
+UPLOADS_DIR = "uploads"
+BLOBS_DIR = os.path.join(UPLOADS_DIR, "blobs")
+CARENCIA_COLETA = 3600
+
+SQL_ADICIONAR_REFERENCIA = """
+    INSERT INTO blobs (sha256, tamanho, referencias, criado_em)
+    VALUES (?, ?, 1, ?)
+    ON CONFLICT (sha256) DO UPDATE SET referencias = blobs.referencias + 1
+"""
+SQL_REMOVER_REFERENCIA = "UPDATE blobs SET referencias = referencias - 1 WHERE sha256 = ? AND referencias > 0"
+SQL_RESOLVER = """
+    SELECT sha256 FROM (
+        SELECT sha256, id FROM documentos WHERE caminho_arquivo = ?
+        UNION ALL
+        SELECT sha256, id FROM projetos_edicao WHERE arquivo = ?
+    ) referencias
+    ORDER BY id DESC
+    LIMIT 1
+"""
+
+
+def caminho_blob(sha256: str) -> str:
+    return os.path.join(BLOBS_DIR, sha256[:2], sha256)
+
+
+def guardar_conteudo(origem: BinaryIO, limite: int = UPLOAD_MAX_BYTES) -> ArquivoSalvo:
+    """Grava o conteúdo no store; se o hash já existe, descarta a cópia nova"""
+    temporario, tamanho, sha256 = copiar_para_temporario(origem, BLOBS_DIR, limite)
+    destino = caminho_blob(sha256)
+    try:
+        if os.path.exists(destino):
+            os.unlink(temporario)
+            # Renova o mtime para a coleta não apagar um blob que acabou de ganhar referência
+            os.utime(destino)
+        else:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.unlink(temporario)
+        raise
+    return ArquivoSalvo(destino, tamanho, sha256)
+
+
+async def guardar_upload(arquivo: UploadFile, limite: int = UPLOAD_MAX_BYTES) -> ArquivoSalvo:
+    """Grava o upload no store em blocos, fora do loop de eventos"""
+    return await gravar_upload(arquivo, guardar_conteudo, limite)
+
+
+async def adicionar_referencia(cursor: AsyncCursor, arquivo: ArquivoSalvo):
+    await cursor.execute(SQL_ADICIONAR_REFERENCIA, (arquivo.sha256, arquivo.tamanho, datetime.now().isoformat()))
+
+
+async def remover_referencias(cursor: AsyncCursor, hashes: Iterable[Optional[str]]):
+    """Decrementa uma referência por hash (um hash repetido conta várias vezes)"""
+    parametros = [(sha256,) for sha256 in hashes if sha256]
+    if parametros:
+        await cursor.executemany(SQL_REMOVER_REFERENCIA, parametros)
+
+
+def caminho_legado(caminho: str) -> Optional[str]:
+    """Caminho em disco de um arquivo ainda não migrado, sem sair de uploads/ nem expor blobs/"""
+    normalizado = os.path.normpath(caminho.lstrip("/"))
+    if normalizado.split(os.sep)[0] != UPLOADS_DIR or normalizado.startswith(BLOBS_DIR + os.sep):
+        return None
+    return normalizado if os.path.isfile(normalizado) else None
+
+
+class ArquivoResolvido(NamedTuple):
+    caminho: str
+    sha256: Optional[str]  # None para arquivos ainda fora do store
+
+
+def _resolver(sha256: Optional[str], caminho: str) -> Optional[ArquivoResolvido]:
+    if sha256:
+        blob = caminho_blob(sha256)
+        if os.path.isfile(blob):
+            return ArquivoResolvido(blob, sha256)
+    legado = caminho_legado(caminho)
+    return ArquivoResolvido(legado, None) if legado else None
+
+
+async def resolver_caminho(conn: AsyncConnection, caminho: str) -> Optional[ArquivoResolvido]:
+    """Arquivo em disco que guarda o conteúdo do caminho lógico (ou None)"""
+    cursor = conn.cursor()
+    await cursor.execute(SQL_RESOLVER, (caminho, caminho))
+    row = await cursor.fetchone()
+    return _resolver(row[0] if row else None, caminho)
+
+
+def resolver_caminho_sync(conn: Connection, caminho: str) -> Optional[ArquivoResolvido]:
+    row = conn.execute(SQL_RESOLVER, (caminho, caminho)).fetchone()
+    return _resolver(row[0] if row else None, caminho)
+
+
+def recontar_referencias(conn: Connection):
+    """Recalcula blobs.referencias a partir das linhas de documentos e projetos_edicao"""
+    conn.execute("""
+        UPDATE blobs SET referencias = (
+            (SELECT COUNT(*) FROM documentos d WHERE d.sha256 = blobs.sha256)
+            + (SELECT COUNT(*) FROM projetos_edicao p WHERE p.sha256 = blobs.sha256)
+        )
+    """)
+
+
+def coletar_blobs(db: Database, carencia: float = CARENCIA_COLETA) -> Tuple[int, int]:
+    """Apaga blobs sem referência (e temporários abandonados); retorna (arquivos, bytes)
+
+    Só considera arquivos sem modificação há mais de `carencia` segundos: um
+    upload que reaproveita um blob existente atualiza o mtime dele.
+    """
+    limite = time.time() - carencia
+    removidos, liberados = 0, 0
+    if not os.path.isdir(BLOBS_DIR):
+        return removidos, liberados
+    with db.connect() as conn:
+        conhecidos = {row["sha256"] for row in conn.execute("SELECT sha256 FROM blobs").fetchall()}
+        for pasta, _, arquivos in os.walk(BLOBS_DIR):
+            for nome in arquivos:
+                caminho = os.path.join(pasta, nome)
+                if os.path.getmtime(caminho) >= limite:
+                    continue
+                if nome in conhecidos:
+                    # Remove a linha só se continuar sem referência, atomicamente
+                    cursor = conn.execute("DELETE FROM blobs WHERE sha256 = ? AND referencias <= 0", (nome,))
+                    conn.commit()
+                    if cursor.rowcount != 1:
+                        continue
+                liberados += os.path.getsize(caminho)
+                os.unlink(caminho)
+                removidos += 1
+    return removidos, liberados
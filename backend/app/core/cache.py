@@ -0,0 +1,73 @@
+"""
+Cache em memória com expiração (TTL) para respostas caras e muito acessadas
+
+Cada processo do uvicorn tem o seu cache. As rotas que alteram os dados chamam
+invalidate() depois do commit; nos demais workers o TTL limita o tempo em que
+um valor antigo pode ser servido.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Cache chave/valor com expiração e contador de versão
+
+    A versão muda a cada invalidate(). Quem calcula um valor lê a versão antes
+    de consultar o banco e passa para set(): se houve invalidação no meio,
+    o valor (possivelmente antigo) é descartado em vez de ficar em cache.
+
+    Com `tamanho`, guarda no máximo esse número de chaves e descarta as usadas
+    há mais tempo (LRU), como o ClaimsCache: um cache por chave aberta (email)
+    não cresce sem limite com valores expirados que nunca voltam a ser lidos.
+    """
+
+    def __init__(self, ttl: float, tamanho: Optional[int] = None):
+        self.ttl = ttl
+        self.tamanho = tamanho
+        self._lock = threading.Lock()
+        self._valores: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.versao = 0
+
+    def get(self, chave: Hashable = None) -> Optional[Any]:
+        with self._lock:
+            item = self._valores.get(chave)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if time.monotonic() >= expira_em:
+                del self._valores[chave]
+                return None
+            self._valores.move_to_end(chave)
+            return valor
+
+    def set(self, valor: Any, chave: Hashable = None, versao: Optional[int] = None):
+        with self._lock:
+            if versao is not None and versao != self.versao:
+                return
+            self._valores[chave] = (time.monotonic() + self.ttl, valor)
+            self._valores.move_to_end(chave)
+            if self.tamanho is not None:
+                while len(self._valores) > self.tamanho:
+                    self._valores.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._valores)
+
+    def invalidate(self):
+        """Descarta todos os valores e avança a versão"""
+        with self._lock:
+            self._valores.clear()
+            self.versao += 1
+
+
+# Estatísticas públicas da home (/projetos/estatisticas)
+ESTATISTICAS_CACHE_TTL = float(os.getenv("ESTATISTICAS_CACHE_TTL", "60"))
+estatisticas_cache = TTLCache(ttl=ESTATISTICAS_CACHE_TTL)
+
+# Usuários por email no login (auth.get_or_create_user); perfis.py invalida ao editar
+USUARIOS_CACHE_TTL = float(os.getenv("USUARIOS_CACHE_TTL", "60"))
+USUARIOS_CACHE_TAMANHO = int(os.getenv("USUARIOS_CACHE_TAMANHO", "10000"))
+usuarios_cache = TTLCache(ttl=USUARIOS_CACHE_TTL, tamanho=USUARIOS_CACHE_TAMANHO)
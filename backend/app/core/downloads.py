@@ -0,0 +1,221 @@
+"""
+Resposta de download com requisições condicionais e por intervalo (Range)
+
+DownloadResponse estende o FileResponse do Starlette com:
+- ETag forte a partir do sha256 do conteúdo guardado no store de uploads
+  (arquivos antigos, sem hash, recebem um ETag fraco de mtime/tamanho);
+- If-None-Match → 304 Not Modified;
+- Range de um único intervalo (bytes=a-b, bytes=a-, bytes=-n) → 206, validado
+  por If-Range; intervalo impossível → 416. Pedidos com vários intervalos são
+  respondidos com o arquivo inteiro, o que o RFC 9110 permite;
+- cópia sem passar pelo Python (extensão ASGI "http.response.zerocopy", que
+  usa os.sendfile) quando o servidor oferece; senão, leitura em blocos em
+  thread, como o FileResponse.
+
+Com DOWNLOAD_OFFLOAD=x-accel-redirect (nginx) ou x-sendfile (Apache/lighttpd)
+a aplicação responde só com o cabeçalho de redirecionamento interno e o proxy
+entrega o arquivo (ver nginx.conf.example). Com DOWNLOADS_ASSINADOS=1 a rota
+/uploads exige a URL assinada (HMAC, expira em DOWNLOAD_URL_TTL segundos)
+emitida pelas rotas de documentos.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import stat
+import time
+from email.utils import formatdate
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.blob_store import UPLOADS_DIR, ArquivoResolvido
+from app.core.config import get_settings
+
+DOWNLOADS_ASSINADOS = os.getenv("DOWNLOADS_ASSINADOS", "0") == "1"
+DOWNLOAD_URL_TTL = int(os.getenv("DOWNLOAD_URL_TTL", "300"))
+DOWNLOAD_OFFLOAD = os.getenv("DOWNLOAD_OFFLOAD", "").lower()
+# location "internal" do nginx que aponta para o diretório uploads/
+DOWNLOAD_ACCEL_PREFIX = os.getenv("DOWNLOAD_ACCEL_PREFIX", "/_uploads_internos/")
+
+
+def _etag_corresponde(etag: str, valores: str) -> bool:
+    """Comparação fraca (If-None-Match): ignora o prefixo W/"""
+    etag = etag.removeprefix("W/")
+    for valor in valores.split(","):
+        valor = valor.strip()
+        if valor == "*" or valor.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def interpretar_range(valor: str, tamanho: int) -> Optional[Tuple[int, int]]:
+    """Converte 'bytes=a-b' em (início, fim inclusivo)
+
+    Retorna None quando o cabeçalho deve ser ignorado (sintaxe inválida ou
+    vários intervalos) e levanta ValueError quando o intervalo é impossível.
+    """
+    unidade, _, intervalos = valor.partition("=")
+    if unidade.strip().lower() != "bytes" or "," in intervalos:
+        return None
+    inicio_txt, sep, fim_txt = intervalos.strip().partition("-")
+    if not sep or not all(t == "" or t.isdigit() for t in (inicio_txt, fim_txt)):
+        return None
+    if inicio_txt == "":
+        # Sufixo: os últimos n bytes
+        if fim_txt == "":
+            return None
+        sufixo = int(fim_txt)
+        if sufixo == 0 or tamanho == 0:
+            raise ValueError("intervalo vazio")
+        return max(tamanho - sufixo, 0), tamanho - 1
+    inicio = int(inicio_txt)
+    fim = int(fim_txt) if fim_txt else tamanho - 1
+    if fim_txt and fim < inicio:
+        return None
+    if inicio >= tamanho:
+        raise ValueError("intervalo fora do arquivo")
+    return inicio, min(fim, tamanho - 1)
+
+
+class DownloadResponse(FileResponse):
+    """FileResponse com ETag do conteúdo, 304 e Range (ver docstring do módulo)"""
+
+    def __init__(self, path: str, sha256: Optional[str] = None, **kwargs):
+        self.sha256 = sha256
+        super().__init__(path, **kwargs)
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        if self.sha256:
+            etag = f'"{self.sha256}"'
+        else:
+            etag = f'W/"{int(stat_result.st_mtime):x}-{stat_result.st_size:x}"'
+        self.headers.setdefault("content-length", str(stat_result.st_size))
+        self.headers.setdefault("last-modified", formatdate(stat_result.st_mtime, usegmt=True))
+        self.headers.setdefault("etag", etag)
+        self.headers.setdefault("accept-ranges", "bytes")
+
+    def _range_aplicavel(self, pedido: Headers) -> bool:
+        if_range = pedido.get("if-range")
+        if if_range is None:
+            return True
+        etag = self.headers["etag"]
+        # If-Range só vale com validador forte: ETag forte idêntico ou a data exata
+        if if_range.startswith('"'):
+            return not etag.startswith("W/") and if_range == etag
+        return if_range == self.headers["last-modified"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+        except FileNotFoundError:
+            raise RuntimeError(f"File at path {self.path} does not exist.")
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise RuntimeError(f"File at path {self.path} is not a file.")
+        self.set_stat_headers(stat_result)
+        tamanho = stat_result.st_size
+        pedido = Headers(scope=scope)
+
+        if_none_match = pedido.get("if-none-match")
+        if if_none_match and _etag_corresponde(self.headers["etag"], if_none_match):
+            cabecalhos = {k: v for k, v in self.headers.items()
+                          if k in ("etag", "last-modified", "accept-ranges", "cache-control")}
+            await Response(status_code=304, headers=cabecalhos)(scope, receive, send)
+            return
+
+        inicio, fim = 0, tamanho - 1
+        if "range" in pedido and self._range_aplicavel(pedido):
+            try:
+                intervalo = interpretar_range(pedido["range"], tamanho)
+            except ValueError:
+                await Response(status_code=416, headers={
+                    "content-range": f"bytes */{tamanho}",
+                    "etag": self.headers["etag"],
+                })(scope, receive, send)
+                return
+            if intervalo is not None:
+                inicio, fim = intervalo
+                self.status_code = 206
+                self.headers["content-range"] = f"bytes {inicio}-{fim}/{tamanho}"
+                self.headers["content-length"] = str(fim - inicio + 1)
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        restante = fim - inicio + 1
+        if self.send_header_only or scope.get("method") == "HEAD" or restante <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopy" in scope.get("extensions", {}):
+            with open(self.path, "rb") as arquivo:
+                await send({"type": "http.response.zerocopy", "file": arquivo,
+                            "offset": inicio, "count": restante, "more_body": False})
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as arquivo:
+                await arquivo.seek(inicio)
+                while restante > 0:
+                    bloco = await arquivo.read(min(self.chunk_size, restante))
+                    if not bloco:
+                        break
+                    restante -= len(bloco)
+                    await send({"type": "http.response.body", "body": bloco, "more_body": restante > 0})
+                if restante > 0:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+# =================== URLS ASSINADAS E OFFLOAD PARA O PROXY ===================
+
+def _chave_assinatura() -> bytes:
+    # Chave própria para downloads, derivada da SECRET_KEY dos tokens
+    return hashlib.sha256(b"downloads:" + get_settings().SECRET_KEY.encode()).digest()
+
+
+def _assinatura(caminho: str, expira_em: int) -> str:
+    mac = hmac.new(_chave_assinatura(), f"{caminho}\n{expira_em}".encode(), hashlib.sha256)
+    return base64.urlsafe_b64encode(mac.digest()).decode().rstrip("=")
+
+
+def assinar_url(caminho: str, ttl: int = None, agora: float = None) -> str:
+    """URL de download de um caminho lógico (uploads/...) válida por ttl segundos"""
+    expira_em = int(agora if agora is not None else time.time()) + (ttl if ttl is not None else DOWNLOAD_URL_TTL)
+    return f"/{quote(caminho)}?exp={expira_em}&sig={_assinatura(caminho, expira_em)}"
+
+
+def assinatura_valida(caminho: str, expira_em: Optional[int], assinatura: Optional[str], agora: float = None) -> bool:
+    if expira_em is None or not assinatura:
+        return False
+    if expira_em < (agora if agora is not None else time.time()):
+        return False
+    return hmac.compare_digest(_assinatura(caminho, expira_em), assinatura)
+
+
+def _content_disposition(filename: str) -> str:
+    nome = quote(filename)
+    if nome != filename:
+        return f"attachment; filename*=utf-8''{nome}"
+    return f'attachment; filename="{filename}"'
+
+
+def resposta_offload(arquivo: ArquivoResolvido, media_type: str = None, filename: str = None) -> Response:
+    """Resposta vazia com X-Accel-Redirect/X-Sendfile; o proxy envia o arquivo"""
+    headers = {"content-type": media_type or "application/octet-stream"}
+    if arquivo.sha256:
+        headers["etag"] = f'"{arquivo.sha256}"'
+    if filename:
+        headers["content-disposition"] = _content_disposition(filename)
+    if DOWNLOAD_OFFLOAD == "x-sendfile":
+        headers["x-sendfile"] = os.path.abspath(arquivo.caminho)
+    else:
+        relativo = os.path.relpath(arquivo.caminho, UPLOADS_DIR).replace(os.sep, "/")
+        headers["x-accel-redirect"] = DOWNLOAD_ACCEL_PREFIX + quote(relativo)
+    return Response(status_code=200, headers=headers)
+
+
+def responder_arquivo(arquivo: ArquivoResolvido, media_type: str = None, filename: str = None) -> Response:
+    """Entrega o arquivo pelo proxy (se configurado) ou pela própria aplicação"""
+    if DOWNLOAD_OFFLOAD in ("x-accel-redirect", "x-sendfile"):
+        return resposta_offload(arquivo, media_type=media_type, filename=filename)
+    return DownloadResponse(arquivo.caminho, sha256=arquivo.sha256, media_type=media_type, filename=filename)
@@ -0,0 +1,119 @@
+"""
+Extração do texto de documentos enviados (PDF, DOCX e texto puro)
+
+As funções deste módulo rodam nos processos do pool de extração
+(app/core/indexacao.py) e no comando indexar_documentos.py, por isso só
+dependem da biblioteca padrão e do pypdf, que é opcional: sem ele os PDFs
+ficam com status 'sem_extrator' e são reprocessados pelo backfill quando a
+dependência for instalada. O DOCX é lido direto do XML dentro do zip.
+"""
+import hashlib
+import os
+import re
+import zipfile
+from typing import NamedTuple, Optional
+from xml.etree import ElementTree
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # dependência opcional
+    PdfReader = None
+
+# Incrementar quando a extração mudar, para o backfill reprocessar tudo
+EXTRATOR_VERSAO = 1
+# Limite do texto guardado por documento (o tsvector do PostgreSQL aceita até 1 MB)
+EXTRACAO_MAX_CARACTERES = int(os.getenv("EXTRACAO_MAX_CARACTERES", "200000"))
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class FormatoNaoSuportado(Exception):
+    pass
+
+
+class ResultadoExtracao(NamedTuple):
+    documento_id: int
+    nome_arquivo: str
+    sha256: Optional[str]
+    status: str  # ok | vazio | nao_suportado | sem_extrator | ausente | erro
+    texto: Optional[str] = None
+    erro: Optional[str] = None
+
+
+def _texto_pdf(caminho: str) -> str:
+    if PdfReader is None:
+        raise FormatoNaoSuportado("pypdf não instalado")
+    partes, total = [], 0
+    for pagina in PdfReader(caminho).pages:
+        texto = pagina.extract_text() or ""
+        partes.append(texto)
+        total += len(texto)
+        if total >= EXTRACAO_MAX_CARACTERES:
+            break
+    return "\n".join(partes)
+
+
+def _texto_docx(caminho: str) -> str:
+    partes, total = [], 0
+    with zipfile.ZipFile(caminho) as docx, docx.open("word/document.xml") as xml:
+        for evento, elemento in ElementTree.iterparse(xml, events=("end",)):
+            if elemento.tag == f"{_W}t" and elemento.text:
+                partes.append(elemento.text)
+                total += len(elemento.text)
+            elif elemento.tag == f"{_W}tab":
+                partes.append("\t")
+            elif elemento.tag in (f"{_W}br", f"{_W}cr", f"{_W}p"):
+                partes.append("\n")
+                if elemento.tag == f"{_W}p":
+                    elemento.clear()
+            if total >= EXTRACAO_MAX_CARACTERES:
+                break
+    return "".join(partes)
+
+
+def _texto_simples(caminho: str) -> str:
+    with open(caminho, "rb") as f:
+        return f.read(EXTRACAO_MAX_CARACTERES * 4).decode("utf-8", errors="replace")
+
+
+EXTRATORES = {
+    ".pdf": _texto_pdf,
+    ".docx": _texto_docx,
+    ".txt": _texto_simples,
+    ".md": _texto_simples,
+}
+
+
+def normalizar(texto: str) -> str:
+    """Junta espaços repetidos, remove NUL (recusado pelo PostgreSQL) e corta no limite"""
+    texto = texto.replace("\x00", "")
+    texto = re.sub(r"[ \t\r\f\v]+", " ", texto)
+    texto = re.sub(r"\s*\n\s*", "\n", texto)
+    return texto.strip()[:EXTRACAO_MAX_CARACTERES]
+
+
+def hash_arquivo(caminho: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+
+def extrair_documento(documento_id: int, nome_arquivo: str, caminho: str,
+                      sha256: Optional[str] = None) -> ResultadoExtracao:
+    """Extrai o texto de um arquivo; nunca levanta (o erro vai no resultado)"""
+    extensao = os.path.splitext(nome_arquivo)[1].lower()
+    extrator = EXTRATORES.get(extensao)
+    try:
+        if sha256 is None:
+            sha256 = hash_arquivo(caminho)
+        if extrator is None:
+            return ResultadoExtracao(documento_id, nome_arquivo, sha256, "nao_suportado",
+                                     erro=f"extensão '{extensao}' não suportada")
+        texto = normalizar(extrator(caminho))
+    except FormatoNaoSuportado as e:
+        return ResultadoExtracao(documento_id, nome_arquivo, sha256, "sem_extrator", erro=str(e))
+    except Exception as e:
+        return ResultadoExtracao(documento_id, nome_arquivo, sha256, "erro", erro=f"{type(e).__name__}: {e}"[:500])
+    return ResultadoExtracao(documento_id, nome_arquivo, sha256, "ok" if texto else "vazio", texto=texto)
@@ -0,0 +1,61 @@
+"""
+Cliente HTTP compartilhado para as chamadas externas (login Microsoft, Graph)
+
+Um único httpx.AsyncClient por processo, criado no startup e fechado no
+shutdown (main.py). As conexões ficam abertas entre as requisições
+(keep-alive), então um login não paga de novo o handshake TCP + TLS com
+login.microsoftonline.com e graph.microsoft.com. Com o pacote h2 instalado
+o cliente usa HTTP/2 e multiplexa as chamadas na mesma conexão.
+"""
+import logging
+import os
+from typing import Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (habilita http2=True no httpx)
+    HTTP2_DISPONIVEL = True
+except ImportError:  # dependência opcional
+    HTTP2_DISPONIVEL = False
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONEXOES = int(os.getenv("HTTP_MAX_CONEXOES", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_SEGUNDOS = float(os.getenv("HTTP_KEEPALIVE_SEGUNDOS", "60"))
+HTTP_TIMEOUT_SEGUNDOS = float(os.getenv("HTTP_TIMEOUT_SEGUNDOS", "10"))
+
+_cliente: Optional[httpx.AsyncClient] = None
+
+
+def _criar_cliente() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_DISPONIVEL,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONEXOES,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_SEGUNDOS,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT_SEGUNDOS, connect=5.0),
+    )
+
+
+def cliente_http() -> httpx.AsyncClient:
+    """Cliente do processo; criado aqui se o startup ainda não rodou (scripts, testes)"""
+    global _cliente
+    if _cliente is None or _cliente.is_closed:
+        _cliente = _criar_cliente()
+    return _cliente
+
+
+async def iniciar_cliente_http():
+    cliente_http()
+    logger.info("✅ Cliente HTTP compartilhado iniciado (HTTP/2: %s)", "sim" if HTTP2_DISPONIVEL else "não")
+
+
+async def encerrar_cliente_http():
+    global _cliente
+    if _cliente is not None:
+        await _cliente.aclose()
+        _cliente = None
@@ -0,0 +1,146 @@
+"""
+Indexação do texto dos documentos enviados
+
+Depois do upload (BackgroundTasks em documentos.upload_documento), o texto é
+extraído em um ProcessPoolExecutor, fora do loop de eventos e do GIL do
+worker, e gravado em documentos_texto; os triggers do índice de busca
+(app/db/busca.py) atualizam a busca na mesma transação.
+
+A indexação é incremental: um documento só é reprocessado quando não tem
+texto, quando o sha256 do conteúdo mudou, quando a versão do extrator
+(EXTRATOR_VERSAO) aumentou ou quando faltava o extrator (pypdf). Conteúdo
+idêntico (mesmo sha256, comum com o store deduplicado) reaproveita o texto
+já extraído. indexar_documentos.py faz o backfill em paralelo.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterable, List, Optional, Union
+
+import anyio
+
+from app.core.blob_store import resolver_caminho_sync
+from app.core.extracao import EXTRATOR_VERSAO, ResultadoExtracao, extrair_documento
+from app.db.session import Connection, Database, database
+
+logger = logging.getLogger(__name__)
+
+EXTRACAO_WORKERS = int(os.getenv("EXTRACAO_WORKERS", "1"))
+
+SQL_PENDENTES = """
+    SELECT d.id, d.nome_arquivo, d.caminho_arquivo, d.sha256
+    FROM documentos d
+    LEFT JOIN documentos_texto t ON t.documento_id = d.id
+    WHERE t.documento_id IS NULL
+       OR t.versao < ?
+       OR t.status = 'sem_extrator'
+       OR (d.sha256 IS NOT NULL AND t.sha256 IS DISTINCT FROM d.sha256)
+    ORDER BY d.id
+"""
+SQL_SALVAR = """
+    INSERT INTO documentos_texto (documento_id, nome_arquivo, sha256, versao, status, texto, erro, extraido_em)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (documento_id) DO UPDATE SET
+        nome_arquivo = excluded.nome_arquivo,
+        sha256 = excluded.sha256,
+        versao = excluded.versao,
+        status = excluded.status,
+        texto = excluded.texto,
+        erro = excluded.erro,
+        extraido_em = excluded.extraido_em
+"""
+SQL_REAPROVEITAR = """
+    SELECT status, texto FROM documentos_texto
+    WHERE sha256 = ? AND versao = ? AND status IN ('ok', 'vazio')
+    LIMIT 1
+"""
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def pool_extracao() -> ProcessPoolExecutor:
+    """Pool de processos do worker, criado no primeiro uso"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: o worker do uvicorn tem threads, e fork com threads ativas não é seguro
+            _pool = ProcessPoolExecutor(max_workers=EXTRACAO_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def encerrar_pool_extracao():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def preparar_extracao(conn: Connection, documento_id: int, nome_arquivo: str, caminho_arquivo: str,
+                      sha256: Optional[str], reaproveitar: bool = True) -> Union[tuple, ResultadoExtracao]:
+    """Argumentos de extrair_documento, ou o resultado direto (arquivo ausente ou texto reaproveitado)"""
+    arquivo = resolver_caminho_sync(conn, caminho_arquivo)
+    if arquivo is None:
+        return ResultadoExtracao(documento_id, nome_arquivo, sha256, "ausente", erro="arquivo não encontrado")
+    sha256 = sha256 or arquivo.sha256
+    if sha256 and reaproveitar:
+        row = conn.execute(SQL_REAPROVEITAR, (sha256, EXTRATOR_VERSAO)).fetchone()
+        if row:
+            return ResultadoExtracao(documento_id, nome_arquivo, sha256, row["status"], texto=row["texto"])
+    return documento_id, nome_arquivo, arquivo.caminho, sha256
+
+
+def salvar_resultados(conn: Connection, resultados: Iterable[ResultadoExtracao]):
+    agora = datetime.now().isoformat()
+    conn.cursor().executemany(SQL_SALVAR, [
+        (r.documento_id, r.nome_arquivo, r.sha256, EXTRATOR_VERSAO, r.status, r.texto, r.erro, agora)
+        for r in resultados
+    ])
+
+
+def documentos_pendentes(conn: Connection, todos: bool = False) -> List:
+    if todos:
+        return conn.execute("SELECT id, nome_arquivo, caminho_arquivo, sha256 FROM documentos ORDER BY id").fetchall()
+    return conn.execute(SQL_PENDENTES, (EXTRATOR_VERSAO,)).fetchall()
+
+
+def _preparar_documento(db: Database, documento_id: int) -> Union[tuple, ResultadoExtracao, None]:
+    with db.connect() as conn:
+        doc = conn.execute(
+            "SELECT id, nome_arquivo, caminho_arquivo, sha256 FROM documentos WHERE id = ?", (documento_id,)
+        ).fetchone()
+        if doc is None:
+            return None
+        return preparar_extracao(conn, doc["id"], doc["nome_arquivo"], doc["caminho_arquivo"], doc["sha256"])
+
+
+def _salvar(db: Database, resultado: ResultadoExtracao):
+    with db.connect() as conn:
+        salvar_resultados(conn, [resultado])
+        conn.commit()
+
+
+async def indexar_documento(documento_id: int, db: Database = database,
+                            executor: Optional[ProcessPoolExecutor] = None):
+    """Tarefa em segundo plano: extrai e indexa o texto de um documento recém-enviado"""
+    try:
+        tarefa = await anyio.to_thread.run_sync(_preparar_documento, db, documento_id)
+        if tarefa is None:
+            return
+        if isinstance(tarefa, ResultadoExtracao):
+            resultado = tarefa
+        else:
+            loop = asyncio.get_running_loop()
+            resultado = await loop.run_in_executor(executor or pool_extracao(), extrair_documento, *tarefa)
+        await anyio.to_thread.run_sync(_salvar, db, resultado)
+        if resultado.status not in ("ok", "vazio"):
+            logger.warning("⚠️ Documento %s sem texto indexado (%s): %s",
+                           documento_id, resultado.status, resultado.erro)
+    except Exception:
+        logger.exception("❌ Erro ao indexar o documento %s", documento_id)
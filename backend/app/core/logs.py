@@ -0,0 +1,211 @@
+"""
+Logs estruturados sem bloquear as requisições
+
+configurar_logs() troca os handlers do logger raiz por um handler de fila:
+quem chama logger.info() só monta o registro e o coloca na fila, e uma
+thread (QueueListener) escreve no stdout e, se LOG_ARQUIVO estiver
+definido, em arquivo. Se o pipe do gunicorn encher, quem espera é essa
+thread, não o loop de eventos. Com a fila cheia (LOG_FILA_TAMANHO) os
+registros novos são descartados e contados em logs_descartados().
+
+Cada registro leva o id da requisição (X-Request-ID recebido ou gerado pelo
+RequisicaoIdMiddleware, devolvido no mesmo cabeçalho), então as linhas de
+um login ou de um upload podem ser agrupadas. LOG_FORMATO=json (padrão)
+escreve uma linha JSON por registro com os campos passados em `extra=`;
+LOG_FORMATO=texto é o formato legível para desenvolvimento.
+
+Níveis: LOG_NIVEL para o raiz e LOG_NIVEIS por módulo, por exemplo
+"app.db.instrumentacao=DEBUG,httpx=WARNING".
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
+
+LOG_NIVEL = os.getenv("LOG_NIVEL", "INFO").upper()
+LOG_NIVEIS = os.getenv("LOG_NIVEIS", "httpx=WARNING")
+LOG_FORMATO = os.getenv("LOG_FORMATO", "json")
+LOG_ARQUIVO = os.getenv("LOG_ARQUIVO", "")
+LOG_FILA_TAMANHO = int(os.getenv("LOG_FILA_TAMANHO", "10000"))
+
+CABECALHO_REQUEST_ID = "X-Request-ID"
+
+id_requisicao: ContextVar[Optional[str]] = ContextVar("id_requisicao", default=None)
+
+# Atributos de todo LogRecord; o que sobrar veio de `extra=` e vai para o JSON
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+
+def niveis_por_modulo(texto: str) -> Dict[str, str]:
+    """"httpx=WARNING,app.db=DEBUG" -> {"httpx": "WARNING", "app.db": "DEBUG"}"""
+    niveis = {}
+    for item in texto.split(","):
+        if "=" in item:
+            modulo, nivel = item.split("=", 1)
+            niveis[modulo.strip()] = nivel.strip().upper()
+    return niveis
+
+
+class FiltroRequisicao(logging.Filter):
+    """Anota o registro com o id da requisição (roda na thread de quem registra)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = id_requisicao.get()
+        return True
+
+
+class FilaHandler(QueueHandler):
+    """QueueHandler que não bloqueia nem imprime erro quando a fila enche"""
+
+    def __init__(self, fila: queue.Queue):
+        super().__init__(fila)
+        self.descartados = 0
+        self.addFilter(FiltroRequisicao())
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Só junta a mensagem com os argumentos; a formatação fica com a thread de escrita
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro, com os campos de `extra=`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            dados["request_id"] = record.request_id
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                dados[chave] = valor
+        if record.exc_text:
+            dados["excecao"] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FormatadorTexto(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        return super().format(record)
+
+
+class SaidaPadraoHandler(logging.StreamHandler):
+    """StreamHandler que sempre escreve no sys.stdout atual (trocado por testes e pelo gunicorn)"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, valor):
+        pass
+
+
+_handler: Optional[FilaHandler] = None
+_listener: Optional[QueueListener] = None
+_destinos: List[logging.Handler] = []
+
+
+def _iniciar_listener():
+    global _listener
+    _handler.queue = queue.Queue(LOG_FILA_TAMANHO)
+    _listener = QueueListener(_handler.queue, *_destinos, respect_handler_level=True)
+    _listener.start()
+
+
+def configurar_logs():
+    """Instala o handler de fila no logger raiz (idempotente)"""
+    global _handler
+    if _handler is not None:
+        return
+    formatador = FormatadorJSON() if LOG_FORMATO == "json" else FormatadorTexto()
+    _destinos.append(SaidaPadraoHandler())
+    if LOG_ARQUIVO:
+        _destinos.append(logging.FileHandler(LOG_ARQUIVO, encoding="utf-8"))
+    for destino in _destinos:
+        destino.setFormatter(formatador)
+
+    _handler = FilaHandler(queue.Queue(LOG_FILA_TAMANHO))
+    raiz = logging.getLogger()
+    for antigo in list(raiz.handlers):
+        raiz.removeHandler(antigo)
+    raiz.addHandler(_handler)
+    raiz.setLevel(LOG_NIVEL)
+    for modulo, nivel in niveis_por_modulo(LOG_NIVEIS).items():
+        logging.getLogger(modulo).setLevel(nivel)
+
+    _iniciar_listener()
+    # Com preload_app o gunicorn importa a aplicação antes do fork e a thread
+    # de escrita não passa para o worker: cada processo filho cria a sua
+    os.register_at_fork(after_in_child=_iniciar_listener)
+    atexit.register(encerrar_logs)
+
+
+def encerrar_logs():
+    """Escreve o que ainda está na fila e para a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logs_descartados() -> int:
+    return _handler.descartados if _handler is not None else 0
+
+
+class RequisicaoIdMiddleware:
+    """Define o id da requisição (X-Request-ID recebido ou novo) e o devolve na resposta"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recebido = dict(scope["headers"]).get(CABECALHO_REQUEST_ID.lower().encode())
+        valor = recebido.decode("latin-1")[:64] if recebido else uuid.uuid4().hex
+        token = id_requisicao.set(valor)
+
+        async def send_com_id(mensagem):
+            if mensagem["type"] == "http.response.start":
+                mensagem["headers"] = [*mensagem.get("headers", []),
+                                       (CABECALHO_REQUEST_ID.lower().encode(), valor.encode("latin-1"))]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, send_com_id)
+        finally:
+            id_requisicao.reset(token)
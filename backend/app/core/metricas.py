@@ -0,0 +1,321 @@
+"""
+Métricas da aplicação no formato de exposição de texto do Prometheus (/metrics)
+
+O MetricasMiddleware mede cada requisição HTTP: latência até o último byte
+da resposta, requisições em andamento, tamanho da resposta e status. A
+requisição roda dentro de escopo_consultas (app/db/instrumentacao.py), que
+soma cada execute/executemany da camada de dados na requisição corrente.
+Assim cada requisição também registra quantas consultas fez e quanto tempo
+passou no banco.
+
+Os rótulos são o router (auth, projetos, perfis, documentos, busca, uploads,
+health...), o template da rota (/api/v1/projetos/{projeto_id}, nunca o
+caminho com ids) e o método. Router e rota vêm da rota encontrada pelo
+roteamento; uma requisição que não casa com nenhuma rota fica com
+"desconhecida" nos dois, então caminhos arbitrários não criam séries novas.
+As requisições em andamento não têm rótulo: quando entram no middleware a
+rota ainda não foi resolvida. As métricas são por processo: o gunicorn.conf.py
+roda um worker, então /metrics já mostra o processo inteiro.
+
+O prometheus_client não é dependência do projeto; os três tipos usados
+(contador, gauge e histograma) são implementados aqui.
+"""
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import get_settings
+from app.db import session
+from app.db.instrumentacao import consultas_atuais, escopo_consultas
+
+settings = get_settings()
+
+CONTENT_TYPE_METRICAS = "text/plain; version=0.0.4; charset=utf-8"
+
+# Se definido, /metrics exige "Authorization: Bearer <METRICAS_TOKEN>"
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN", "")
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_TAMANHO = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _formatar_rotulos(nomes: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class _Metrica(ABC):
+    tipo = ""
+
+    def __init__(self, nome: str, descricao: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+
+    def _chave(self, rotulos: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(rotulos.get(nome, "")) for nome in self.rotulos)
+
+    @abstractmethod
+    def _amostras(self) -> Iterable[str]:
+        """Linhas de amostra no formato de texto, depois de # HELP e # TYPE"""
+
+    def exportar(self) -> List[str]:
+        return [f"# HELP {self.nome} {_escapar(self.descricao)}", f"# TYPE {self.nome} {self.tipo}",
+                *self._amostras()]
+
+
+class Contador(_Metrica):
+    """Valor que só cresce (total de requisições, de consultas...)"""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Sequence[str] = ()):
+        super().__init__(nome, descricao, rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, valor: float = 1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def valor(self, **rotulos) -> float:
+        with self._lock:
+            return self._valores.get(self._chave(rotulos), 0)
+
+    def _amostras(self):
+        with self._lock:
+            itens = sorted(self._valores.items())
+        for chave, valor in itens:
+            yield f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(valor)}"
+
+
+class Gauge(Contador):
+    """Valor que sobe e desce (requisições em andamento)"""
+
+    tipo = "gauge"
+
+    def dec(self, valor: float = 1, **rotulos):
+        self.inc(-valor, **rotulos)
+
+
+class Histograma(_Metrica):
+    """Distribuição em buckets cumulativos, com soma e contagem"""
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Sequence[str] = (), buckets: Sequence[float] = ()):
+        super().__init__(nome, descricao, rotulos)
+        self.buckets = tuple(sorted(buckets))
+        # chave -> [contagens por bucket (+Inf no fim), soma]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def contagem(self, **rotulos) -> int:
+        with self._lock:
+            serie = self._series.get(self._chave(rotulos))
+            return sum(serie[0]) if serie else 0
+
+    def soma(self, **rotulos) -> float:
+        with self._lock:
+            serie = self._series.get(self._chave(rotulos))
+            return serie[1] if serie else 0.0
+
+    def _amostras(self):
+        with self._lock:
+            itens = sorted((chave, (list(contagens), soma)) for chave, (contagens, soma) in self._series.items())
+        for chave, (contagens, soma) in itens:
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float("inf"),), contagens):
+                acumulado += contagem
+                rotulos = _formatar_rotulos(self.rotulos, chave, f'le="{_formatar_numero(limite)}"')
+                yield f"{self.nome}_bucket{rotulos} {acumulado}"
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            yield f"{self.nome}_sum{rotulos} {_formatar_numero(soma)}"
+            yield f"{self.nome}_count{rotulos} {acumulado}"
+
+
+class Registro:
+    """Conjunto de métricas exportadas juntas; coletores geram linhas na hora da coleta"""
+
+    def __init__(self):
+        self.metricas: List[_Metrica] = []
+        self.coletores: List[Callable[[], List[str]]] = []
+
+    def registrar(self, metrica):
+        self.metricas.append(metrica)
+        return metrica
+
+    def exportar(self) -> str:
+        linhas: List[str] = []
+        for metrica in self.metricas:
+            linhas.extend(metrica.exportar())
+        for coletor in self.coletores:
+            linhas.extend(coletor())
+        return "\n".join(linhas) + "\n"
+
+
+registro = Registro()
+
+_ROTULOS_HTTP = ("router", "method", "route")
+
+requisicoes_total = registro.registrar(Contador(
+    "http_requests_total", "Requisições HTTP concluídas", _ROTULOS_HTTP + ("status",)))
+duracao_requisicao = registro.registrar(Histograma(
+    "http_request_duration_seconds", "Latência até o último byte da resposta",
+    _ROTULOS_HTTP, BUCKETS_LATENCIA))
+requisicoes_em_andamento = registro.registrar(Gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento"))
+tamanho_resposta = registro.registrar(Histograma(
+    "http_response_size_bytes", "Tamanho do corpo da resposta", _ROTULOS_HTTP, BUCKETS_TAMANHO))
+consultas_por_requisicao = registro.registrar(Histograma(
+    "db_queries_per_request", "Consultas ao banco feitas por requisição", _ROTULOS_HTTP, BUCKETS_CONSULTAS))
+tempo_banco_por_requisicao = registro.registrar(Histograma(
+    "db_query_time_per_request_seconds", "Tempo somado das consultas ao banco por requisição",
+    _ROTULOS_HTTP, BUCKETS_LATENCIA))
+consultas_total = registro.registrar(Contador(
+    "db_queries_total", "Consultas ao banco (execute/executemany) por router", ("router",)))
+tempo_consultas_total = registro.registrar(Contador(
+    "db_query_duration_seconds_total", "Tempo somado das consultas ao banco por router", ("router",)))
+
+
+def rotulo_router(caminho: str) -> str:
+    """Primeiro segmento do template da rota depois de /api/v1 (auth, projetos...) ou dele todo (uploads, health)"""
+    if caminho.startswith(settings.API_V1_STR + "/"):
+        caminho = caminho[len(settings.API_V1_STR):]
+    return caminho.strip("/").split("/", 1)[0] or "raiz"
+
+
+def _observar_consulta(sql: str, duracao: float):
+    # As consultas das requisições são somadas pelo escopo_consultas do middleware
+    if consultas_atuais() is None:
+        consultas_total.inc(router="fora_de_requisicao")
+        tempo_consultas_total.inc(duracao, router="fora_de_requisicao")
+
+
+session.observadores_consulta.append(_observar_consulta)
+
+
+class MetricasMiddleware:
+    """Mede latência, tamanho, status e consultas ao banco de cada requisição HTTP"""
+
+    def __init__(self, app, ignorar: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.ignorar = tuple(ignorar)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.ignorar:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        tamanho = 0
+        inicio = time.perf_counter()
+        fim: Optional[float] = None
+
+        async def send_medido(mensagem):
+            nonlocal status, tamanho, fim
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            elif mensagem["type"] == "http.response.body":
+                tamanho += len(mensagem.get("body", b""))
+                if not mensagem.get("more_body", False):
+                    fim = time.perf_counter()
+            await send(mensagem)
+
+        def rota() -> Optional[str]:
+            # Template da rota (definido pelo roteamento); nunca o caminho recebido
+            return getattr(scope.get("route"), "path", None)
+
+        requisicoes_em_andamento.inc()
+        try:
+            with escopo_consultas(lambda: f"{scope['method']} {rota() or 'desconhecida'}") as consultas:
+                await self.app(scope, receive, send_medido)
+        finally:
+            requisicoes_em_andamento.dec()
+            template = rota()
+            router = rotulo_router(template) if template else "desconhecida"
+            rotulos = {"router": router, "method": scope["method"], "route": template or "desconhecida"}
+            requisicoes_total.inc(status=str(status), **rotulos)
+            duracao_requisicao.observe((fim or time.perf_counter()) - inicio, **rotulos)
+            tamanho_resposta.observe(tamanho, **rotulos)
+            consultas_por_requisicao.observe(consultas.total, **rotulos)
+            tempo_banco_por_requisicao.observe(consultas.tempo, **rotulos)
+            consultas_total.inc(consultas.total, router=router)
+            tempo_consultas_total.inc(consultas.tempo, router=router)
+
+
+def _coletar_processo() -> List[str]:
+    """Métricas lidas na hora da coleta: pool de conexões, cache de tokens e fila de logs"""
+    from app.core.autenticacao import estatisticas_tokens
+    from app.core.logs import logs_descartados
+
+    linhas = []
+    pool = session.database.pool_status()
+    if "checkedout" in pool:
+        linhas += ["# HELP db_pool_checked_out Conexões do pool em uso", "# TYPE db_pool_checked_out gauge",
+                   f"db_pool_checked_out {pool['checkedout']}"]
+    for nome, descricao in (("checkouts", "Conexões retiradas do pool"),
+                            ("waits", "Retiradas que esperaram por uma conexão livre"),
+                            ("connections_created", "Conexões abertas pelo pool")):
+        linhas += [f"# HELP db_pool_{nome}_total {descricao}", f"# TYPE db_pool_{nome}_total counter",
+                   f"db_pool_{nome}_total {pool[nome]}"]
+    tokens = estatisticas_tokens()
+    linhas += ["# HELP auth_token_cache_total Verificações de token pelo cache de claims",
+               "# TYPE auth_token_cache_total counter",
+               f'auth_token_cache_total{{resultado="acerto"}} {tokens["acertos"]}',
+               f'auth_token_cache_total{{resultado="falta"}} {tokens["faltas"]}',
+               "# HELP logs_descartados_total Registros de log descartados com a fila cheia",
+               "# TYPE logs_descartados_total counter",
+               f"logs_descartados_total {logs_descartados()}"]
+    return linhas
+
+
+registro.coletores.append(_coletar_processo)
+
+
+def exportar_metricas() -> str:
+    return registro.exportar()
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """
+    Métricas deste processo no formato de texto do Prometheus
+    """
+    if METRICAS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICAS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Token de métricas inválido")
+    return PlainTextResponse(exportar_metricas(), media_type=CONTENT_TYPE_METRICAS)
@@ -0,0 +1,64 @@
+"""
+Metadados OpenID Connect do tenant Microsoft
+
+Os endpoints de autorização e de token vêm do documento de descoberta
+(.well-known/openid-configuration) do tenant, guardado em cache por
+OIDC_METADADOS_TTL segundos: o login só consulta a descoberta quando o
+cache expira. Se a descoberta falhar, usa os endpoints padrão do Azure AD
+e guarda a falha por OIDC_FALHA_TTL segundos: durante uma indisponibilidade
+do provedor só uma chamada a cada poucos segundos espera o timeout do HTTP,
+e as outras seguem direto com os endpoints padrão.
+
+MICROSOFT_AUTHORITY e MICROSOFT_GRAPH_URL apontam para o Azure por padrão;
+o benchmark_login.py troca os dois por um provedor de identidade local.
+"""
+import logging
+import os
+from typing import Dict
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.http_cliente import cliente_http
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+MICROSOFT_AUTHORITY = os.getenv("MICROSOFT_AUTHORITY", "https://login.microsoftonline.com").rstrip("/")
+MICROSOFT_GRAPH_URL = os.getenv("MICROSOFT_GRAPH_URL", "https://graph.microsoft.com/v1.0").rstrip("/")
+OIDC_METADADOS_TTL = float(os.getenv("OIDC_METADADOS_TTL", "86400"))
+OIDC_FALHA_TTL = float(os.getenv("OIDC_FALHA_TTL", "5"))
+
+metadados_cache = TTLCache(ttl=OIDC_METADADOS_TTL)
+# Tenants cuja descoberta falhou há pouco (cache negativo)
+falhas_cache = TTLCache(ttl=OIDC_FALHA_TTL)
+
+
+def metadados_padrao(tenant: str) -> Dict[str, str]:
+    return {
+        "authorization_endpoint": f"{MICROSOFT_AUTHORITY}/{tenant}/oauth2/v2.0/authorize",
+        "token_endpoint": f"{MICROSOFT_AUTHORITY}/{tenant}/oauth2/v2.0/token",
+    }
+
+
+async def metadados_oidc(tenant: str = None) -> Dict[str, str]:
+    """Documento de descoberta OIDC do tenant (em cache até OIDC_METADADOS_TTL; falhas por OIDC_FALHA_TTL)"""
+    tenant = tenant or settings.MICROSOFT_TENANT_ID
+    metadados = metadados_cache.get(tenant)
+    if metadados is not None:
+        return metadados
+    if falhas_cache.get(tenant) is not None:
+        return metadados_padrao(tenant)
+    versao = metadados_cache.versao
+    url = f"{MICROSOFT_AUTHORITY}/{tenant}/v2.0/.well-known/openid-configuration"
+    try:
+        response = await cliente_http().get(url)
+        response.raise_for_status()
+        metadados = response.json()
+        if "token_endpoint" not in metadados or "authorization_endpoint" not in metadados:
+            raise ValueError("documento sem os endpoints de token/autorização")
+    except Exception as e:
+        logger.warning("⚠️ Descoberta OIDC indisponível (%s), usando os endpoints padrão", e)
+        falhas_cache.set(True, chave=tenant)
+        return metadados_padrao(tenant)
+    metadados_cache.set(metadados, chave=tenant, versao=versao)
+    return metadados
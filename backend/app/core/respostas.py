@@ -0,0 +1,45 @@
+"""
+Serialização rápida das respostas JSON
+
+A aplicação usa o ORJSONResponse como classe de resposta padrão. As
+listagens grandes vão além: em vez de montar um dict(row) por linha e
+deixar o FastAPI passar tudo pelo jsonable_encoder (e pela validação do
+response_model), resposta_linhas() lê as tuplas do cursor e gera os bytes
+com orjson, na mesma thread da consulta, fora do loop de eventos. Quando a
+rota devolve um Response pronto, o FastAPI não revalida o conteúdo; o
+response_model da rota continua valendo para a documentação OpenAPI.
+
+Ver benchmark_serializacao.py para o custo por linha antes e depois.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi.responses import ORJSONResponse, Response
+
+from app.db.session import AsyncCursor, Cursor
+
+Transformacao = Callable[[dict], dict]
+
+
+def serializar_linhas(colunas: Sequence[str], linhas: Iterable[Sequence],
+                      transformar: Optional[Transformacao] = None) -> bytes:
+    """Tuplas do banco -> JSON (lista de objetos) em bytes"""
+    if transformar is None:
+        return orjson.dumps([dict(zip(colunas, linha)) for linha in linhas])
+    return orjson.dumps([transformar(dict(zip(colunas, linha))) for linha in linhas])
+
+
+def _buscar_e_serializar(cursor: Cursor, transformar: Optional[Transformacao]) -> bytes:
+    return serializar_linhas(cursor.colunas, cursor.fetchall_tuplas(), transformar)
+
+
+async def resposta_linhas(cursor: AsyncCursor, transformar: Optional[Transformacao] = None,
+                          headers: Optional[Dict[str, str]] = None) -> Response:
+    """Resposta com todas as linhas do último SELECT do cursor, sem dict(row) nem jsonable_encoder"""
+    corpo = await cursor.connection.run(_buscar_e_serializar, cursor.sync, transformar)
+    return Response(corpo, media_type="application/json", headers=headers)
+
+
+def resposta_json(conteudo: List[dict], headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    """Resposta de uma lista já montada, serializada direto pelo orjson"""
+    return ORJSONResponse(conteudo, headers=headers)
@@ -0,0 +1,104 @@
+"""
+Configurações editáveis pelo admin (período de inscrição, textos da home e
+da página de edições anteriores)
+
+Os documentos ficam na tabela configuracoes (uma linha JSON por chave, com um
+número de versão) e são servidos da memória. Cada escrita é um único upsert
+transacional que incrementa a versão. Antes de uma leitura, no máximo a cada
+SETTINGS_REFRESH_INTERVAL segundos, o processo compara as versões em memória
+com as do banco e recarrega só as chaves alteradas, então uma escrita feita
+em um worker chega aos demais workers do gunicorn nesse intervalo.
+"""
+import copy
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+import anyio
+
+from app.db.session import Database, database
+
+SETTINGS_REFRESH_INTERVAL = float(os.getenv("SETTINGS_REFRESH_INTERVAL", "1"))
+
+INSCRICAO_PERIODO = "inscricao_periodo"
+HOME_TEXTS = "home_texts"
+EDICOES_TEXTS = "edicoes_texts"
+
+
+class SettingsStore:
+    """Documentos JSON em memória, persistidos e versionados na tabela configuracoes"""
+
+    def __init__(self, db: Database, intervalo: float = SETTINGS_REFRESH_INTERVAL):
+        self.db = db
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._valores: Dict[str, Tuple[int, Any]] = {}
+        self._proxima_verificacao = 0.0
+
+    def _verificar_versoes(self):
+        """Recarrega as chaves cuja versão no banco difere da versão em memória"""
+        with self.db.connect() as conn:
+            versoes = {
+                row["chave"]: row["versao"]
+                for row in conn.execute("SELECT chave, versao FROM configuracoes").fetchall()
+            }
+            alteradas = [
+                chave for chave, versao in versoes.items()
+                if self._valores.get(chave, (None, None))[0] != versao
+            ]
+            linhas = []
+            if alteradas:
+                placeholders = ", ".join("?" for _ in alteradas)
+                linhas = conn.execute(
+                    f"SELECT chave, valor, versao FROM configuracoes WHERE chave IN ({placeholders})", alteradas
+                ).fetchall()
+        with self._lock:
+            for row in linhas:
+                self._valores[row["chave"]] = (row["versao"], json.loads(row["valor"]))
+            for chave in set(self._valores) - set(versoes):
+                del self._valores[chave]
+            self._proxima_verificacao = time.monotonic() + self.intervalo
+
+    def _precisa_verificar(self) -> bool:
+        return time.monotonic() >= self._proxima_verificacao
+
+    def _ler(self, chave: str, padrao: Any) -> Any:
+        with self._lock:
+            item = self._valores.get(chave)
+        # Cópia para que quem chama possa alterar o resultado sem afetar o cache
+        return copy.deepcopy(item[1] if item is not None else padrao)
+
+    def get_sync(self, chave: str, padrao: Any = None) -> Any:
+        if self._precisa_verificar():
+            self._verificar_versoes()
+        return self._ler(chave, padrao)
+
+    def set_sync(self, chave: str, valor: Any):
+        with self.db.connect() as conn:
+            row = conn.execute("""
+                INSERT INTO configuracoes (chave, valor, versao, atualizado_em)
+                VALUES (?, ?, 1, ?)
+                ON CONFLICT (chave) DO UPDATE SET
+                    valor = excluded.valor,
+                    versao = configuracoes.versao + 1,
+                    atualizado_em = excluded.atualizado_em
+                RETURNING versao
+            """, (chave, json.dumps(valor), datetime.now().isoformat())).fetchone()
+            conn.commit()
+        with self._lock:
+            self._valores[chave] = (row[0], copy.deepcopy(valor))
+
+    async def get(self, chave: str, padrao: Any = None) -> Any:
+        """Lê da memória; consulta o banco só quando a verificação de versão vence"""
+        if self._precisa_verificar():
+            await anyio.to_thread.run_sync(self._verificar_versoes)
+        return self._ler(chave, padrao)
+
+    async def set(self, chave: str, valor: Any):
+        await anyio.to_thread.run_sync(self.set_sync, chave, valor)
+
+
+settings_store = SettingsStore(database)
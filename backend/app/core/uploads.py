@@ -0,0 +1,103 @@
+"""
+Gravação de uploads em disco em blocos, fora do loop de eventos
+
+O arquivo recebido é copiado em blocos de UPLOAD_CHUNK_SIZE bytes em uma thread
+do pool do anyio, calculando o SHA-256 e o tamanho durante a cópia. A escrita
+vai para um arquivo temporário no mesmo diretório do destino e só no final é
+renomeada (os.replace, atômico), então ninguém lê um arquivo pela metade. O
+destino é decidido por app.core.blob_store (guardar_upload), pelo hash.
+
+UPLOAD_MAX_BYTES limita o tamanho de cada arquivo; LimiteUploadMiddleware
+recusa pelo Content-Length, antes de ler o corpo, as requisições que já
+chegam maiores que o limite.
+"""
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Callable, NamedTuple, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+# Folga para os outros campos e delimitadores do multipart/form-data
+_FOLGA_MULTIPART = 64 * 1024
+
+
+class ArquivoSalvo(NamedTuple):
+    caminho: str
+    tamanho: int
+    sha256: str
+
+
+class ArquivoMuitoGrande(Exception):
+    pass
+
+
+def _erro_tamanho(limite: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Arquivo maior que o limite de {limite // (1024 * 1024)} MB"
+    )
+
+
+def copiar_para_temporario(origem: BinaryIO, pasta: str, limite: int = UPLOAD_MAX_BYTES,
+                           tamanho_bloco: int = UPLOAD_CHUNK_SIZE) -> Tuple[str, int, str]:
+    """Copia origem em blocos para um temporário em pasta; retorna (temporario, tamanho, sha256)"""
+    os.makedirs(pasta, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=pasta, prefix=".upload-")
+    sha256 = hashlib.sha256()
+    tamanho = 0
+    try:
+        with os.fdopen(fd, "wb") as saida:
+            while True:
+                bloco = origem.read(tamanho_bloco)
+                if not bloco:
+                    break
+                tamanho += len(bloco)
+                if tamanho > limite:
+                    raise ArquivoMuitoGrande()
+                sha256.update(bloco)
+                saida.write(bloco)
+            saida.flush()
+            os.fsync(saida.fileno())
+    except BaseException:
+        os.unlink(temporario)
+        raise
+    return temporario, tamanho, sha256.hexdigest()
+
+
+async def gravar_upload(arquivo: UploadFile, gravar: Callable[[BinaryIO, int], ArquivoSalvo],
+                        limite: int = UPLOAD_MAX_BYTES) -> ArquivoSalvo:
+    """Executa gravar(arquivo, limite) no pool de threads, recusando com 413 o que passar do limite"""
+    tamanho_conhecido: Optional[int] = getattr(arquivo, "size", None)
+    if tamanho_conhecido is not None and tamanho_conhecido > limite:
+        raise _erro_tamanho(limite)
+    await arquivo.seek(0)
+    try:
+        return await anyio.to_thread.run_sync(gravar, arquivo.file, limite)
+    except ArquivoMuitoGrande:
+        raise _erro_tamanho(limite)
+
+
+class LimiteUploadMiddleware:
+    """Recusa com 413 uploads cujo Content-Length já passa do limite"""
+
+    def __init__(self, app, limite: int = UPLOAD_MAX_BYTES):
+        self.app = app
+        self.limite = limite
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] in ("POST", "PUT"):
+            headers = dict(scope["headers"])
+            content_type = headers.get(b"content-type", b"")
+            content_length = headers.get(b"content-length")
+            if (content_type.startswith(b"multipart/form-data") and content_length
+                    and content_length.isdigit()
+                    and int(content_length) > self.limite + _FOLGA_MULTIPART):
+                resposta = JSONResponse({"detail": _erro_tamanho(self.limite).detail}, status_code=413)
+                await resposta(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
@@ -0,0 +1,304 @@
+"""
+Índice de busca textual sobre projetos, orientadores, projetos de edições
+anteriores e o texto extraído dos documentos enviados (documentos_texto)
+
+SQLite (desenvolvimento): tabela virtual FTS5 busca_fts com o tokenizador
+unicode61 (remove_diacritics 2, ou seja, sem acentos) e ranking bm25. O FTS5
+não tem stemmer para português; a consulta reduz cada termo ao radical
+(radical()) e busca por prefixo, então "aprendizagens" encontra
+"aprendizado" e "computação" encontra "computacional".
+
+PostgreSQL (produção): tabela busca_indice com uma coluna tsvector e índice
+GIN, na configuração pt_busca (cópia de portuguese com unaccent, quando a
+extensão está disponível) e ranking ts_rank_cd.
+
+Nos dois bancos o índice é mantido por triggers nas tabelas de origem
+(INSERT, DELETE e UPDATE só das colunas indexadas), então cada escrita
+atualiza apenas a linha correspondente. A chave de cada linha do índice é
+id * 4 + tipo (TIPOS), o que dá acesso direto pela chave primária na
+atualização e permite filtrar por tipo sem coluna extra.
+
+Documentos só aparecem para o admin e para o aluno/orientador do projeto.
+"""
+import logging
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from app.db.session import AsyncConnection, Connection, Database, database
+
+logger = logging.getLogger(__name__)
+
+TIPOS: Dict[str, int] = {"documento": 0, "projeto": 1, "orientador": 2, "edicao": 3}
+NOMES_TIPOS = {codigo: nome for nome, codigo in TIPOS.items()}
+
+# tipo -> (tabela, colunas que disparam a atualização, título, corpo); {t} é a linha (NEW ou alias)
+FONTES: Dict[str, Tuple[str, Tuple[str, ...], str, str]] = {
+    "projeto": (
+        "projetos", ("titulo", "descricao", "palavras_chave", "area_pesquisa"),
+        "{t}.titulo",
+        "COALESCE({t}.descricao, '') || ' ' || COALESCE({t}.palavras_chave, '') || ' ' || COALESCE({t}.area_pesquisa, '')",
+    ),
+    "orientador": (
+        "orientadores", ("nome", "area_pesquisa", "areas_interesse", "biografia"),
+        "{t}.nome",
+        "COALESCE({t}.areas_interesse, '') || ' ' || COALESCE({t}.biografia, '') || ' ' || COALESCE({t}.area_pesquisa, '')",
+    ),
+    "edicao": (
+        "projetos_edicao", ("titulo", "aluno", "orientador"),
+        "{t}.titulo",
+        "COALESCE({t}.aluno, '') || ' ' || COALESCE({t}.orientador, '')",
+    ),
+    "documento": (
+        "documentos_texto", ("nome_arquivo", "texto"),
+        "{t}.nome_arquivo",
+        "COALESCE({t}.texto, '')",
+    ),
+}
+# Coluna com o id da linha de origem, quando não é "id"
+CHAVES = {"documento": "documento_id"}
+
+MARCA_INICIO, MARCA_FIM = "«", "»"
+MAX_TERMOS = 10
+# Status de projeto visíveis para quem não é admin nem participante do projeto
+STATUS_PUBLICOS = ("ativo", "finalizado")
+
+# Sufixos flexionais/derivacionais comuns do português, sem acento, do maior para o menor
+_SUFIXOS = sorted([
+    "amentos", "imentos", "amento", "imento", "idades", "idade", "acoes", "icoes", "coes",
+    "mente", "ismos", "ismo", "istas", "ista", "aveis", "iveis", "avel", "ivel", "ancias",
+    "ancia", "encias", "encia", "agens", "agem", "acao", "icao", "cao", "oes", "ais", "eis",
+    "res", "es", "os", "as", "s", "a", "o", "e",
+], key=len, reverse=True)
+_TAMANHO_MINIMO_RADICAL = 4
+
+
+def sem_acentos(texto: str) -> str:
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def radical(termo: str) -> str:
+    """Radical aproximado de um termo (minúsculo, sem acento) para busca por prefixo"""
+    termo = sem_acentos(termo.lower())
+    for sufixo in _SUFIXOS:
+        if termo.endswith(sufixo) and len(termo) - len(sufixo) >= _TAMANHO_MINIMO_RADICAL:
+            return termo[:-len(sufixo)]
+    return termo
+
+
+def termos_da_consulta(texto: str) -> List[str]:
+    return re.findall(r"\w+", texto)[:MAX_TERMOS]
+
+
+def consulta_fts5(texto: str) -> str:
+    """Texto livre -> expressão MATCH do FTS5 (todos os termos, por prefixo do radical)"""
+    return " ".join(f'"{radical(termo)}"*' for termo in termos_da_consulta(texto))
+
+
+# =================== CRIAÇÃO E MANUTENÇÃO DO ÍNDICE ===================
+
+def _chave(tipo: str, linha: str) -> str:
+    return f"{linha}.{CHAVES.get(tipo, 'id')} * 4 + {TIPOS[tipo]}"
+
+
+def _trigger_existe(conn: Connection, nome: str) -> bool:
+    if conn.dialect == "postgresql":
+        sql = "SELECT 1 FROM pg_trigger WHERE tgname = ?"
+    else:
+        sql = "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?"
+    return conn.execute(sql, (nome,)).fetchone() is not None
+
+
+def _tabela_existe(conn: Connection, tabela: str) -> bool:
+    if conn.dialect == "postgresql":
+        return conn.execute("SELECT to_regclass(?)", (tabela,)).fetchone()[0] is not None
+    sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return conn.execute(sql, (tabela,)).fetchone() is not None
+
+
+def _criar_sqlite(conn: Connection):
+    if not _tabela_existe(conn, "busca_fts"):
+        conn.execute("""
+            CREATE VIRTUAL TABLE busca_fts USING fts5(
+                titulo, corpo,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '3 4'
+            )
+        """)
+        # Título pesa mais que o corpo no bm25
+        conn.execute("INSERT INTO busca_fts (busca_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+    for tipo, (tabela, colunas, titulo, corpo) in FONTES.items():
+        if not _tabela_existe(conn, tabela) or _trigger_existe(conn, f"busca_{tabela}_ai"):
+            continue
+        novo = f"INSERT INTO busca_fts (rowid, titulo, corpo) VALUES ({_chave(tipo, 'NEW')}, " \
+               f"{titulo.format(t='NEW')}, {corpo.format(t='NEW')});"
+        remover = f"DELETE FROM busca_fts WHERE rowid = {_chave(tipo, 'OLD')};"
+        conn.execute(f"CREATE TRIGGER busca_{tabela}_ai AFTER INSERT ON {tabela} BEGIN {novo} END")
+        conn.execute(f"CREATE TRIGGER busca_{tabela}_ad AFTER DELETE ON {tabela} BEGIN {remover} END")
+        conn.execute(f"""
+            CREATE TRIGGER busca_{tabela}_au AFTER UPDATE OF {", ".join(colunas)} ON {tabela}
+            BEGIN {remover} {novo} END
+        """)
+        conn.execute(f"DELETE FROM busca_fts WHERE rowid % 4 = {TIPOS[tipo]}")
+        conn.execute(f"""
+            INSERT INTO busca_fts (rowid, titulo, corpo)
+            SELECT {_chave(tipo, 't')}, {titulo.format(t='t')}, {corpo.format(t='t')} FROM {tabela} t
+        """)
+        logger.info("✅ Índice de busca criado para %s", tabela)
+
+
+def _criar_postgresql(conn: Connection):
+    conn.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_busca') THEN
+                CREATE TEXT SEARCH CONFIGURATION pt_busca (COPY = portuguese);
+                BEGIN
+                    CREATE EXTENSION IF NOT EXISTS unaccent;
+                    ALTER TEXT SEARCH CONFIGURATION pt_busca
+                        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+                EXCEPTION WHEN OTHERS THEN
+                    RAISE NOTICE 'unaccent indisponível: busca sem remoção de acentos';
+                END;
+            END IF;
+        END $$
+    """)
+    conn.execute("""
+        CREATE OR REPLACE FUNCTION busca_vetor(titulo TEXT, corpo TEXT) RETURNS tsvector AS $$
+            SELECT setweight(to_tsvector('pt_busca', COALESCE(titulo, '')), 'A')
+                || setweight(to_tsvector('pt_busca', COALESCE(corpo, '')), 'B')
+        $$ LANGUAGE sql IMMUTABLE
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS busca_indice (
+            id BIGINT PRIMARY KEY,
+            titulo TEXT,
+            corpo TEXT,
+            vetor tsvector NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_busca_indice_vetor ON busca_indice USING GIN (vetor)")
+    upsert = """
+        INSERT INTO busca_indice (id, titulo, corpo, vetor)
+        {valores}
+        ON CONFLICT (id) DO UPDATE SET
+            titulo = EXCLUDED.titulo, corpo = EXCLUDED.corpo, vetor = EXCLUDED.vetor
+    """
+    for tipo, (tabela, colunas, titulo, corpo) in FONTES.items():
+        if not _tabela_existe(conn, tabela) or _trigger_existe(conn, f"busca_{tabela}"):
+            continue
+        titulo_novo, corpo_novo = titulo.format(t="NEW"), corpo.format(t="NEW")
+        conn.execute(f"""
+            CREATE OR REPLACE FUNCTION busca_indexar_{tabela}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    DELETE FROM busca_indice WHERE id = {_chave(tipo, 'OLD')};
+                    RETURN OLD;
+                END IF;
+                {upsert.format(valores=f"VALUES ({_chave(tipo, 'NEW')}, {titulo_novo}, {corpo_novo}, "
+                                       f"busca_vetor({titulo_novo}, {corpo_novo}))")};
+                RETURN NEW;
+            END $$ LANGUAGE plpgsql
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER busca_{tabela}
+            AFTER INSERT OR DELETE OR UPDATE OF {", ".join(colunas)} ON {tabela}
+            FOR EACH ROW EXECUTE FUNCTION busca_indexar_{tabela}()
+        """)
+        titulo_t, corpo_t = titulo.format(t="t"), corpo.format(t="t")
+        conn.execute(upsert.format(
+            valores=f"SELECT {_chave(tipo, 't')}, {titulo_t}, {corpo_t}, busca_vetor({titulo_t}, {corpo_t}) "
+                    f"FROM {tabela} t"
+        ))
+        logger.info("✅ Índice de busca criado para %s", tabela)
+
+
+def criar_indice_busca(db: Database = database):
+    """Cria o índice de busca e os triggers que o mantêm; popula as tabelas novas no índice"""
+    with db.connect() as conn:
+        if conn.dialect == "postgresql":
+            _criar_postgresql(conn)
+        else:
+            _criar_sqlite(conn)
+        conn.commit()
+
+
+# =================== CONSULTA ===================
+
+def _filtros(chave: str, tipos: Optional[List[str]], usuario: dict) -> Tuple[str, list]:
+    """Filtros por tipo e visibilidade dos projetos e documentos, sobre a coluna chave do índice"""
+    sql, params = "", []
+    if tipos:
+        sql += f" AND {chave} % 4 IN ({', '.join('?' for _ in tipos)})"
+        params += [TIPOS[tipo] for tipo in tipos]
+    tipo_usuario = usuario.get("user_type")
+    if tipo_usuario != "admin":
+        status = ", ".join(f"'{s}'" for s in STATUS_PUBLICOS)
+        dono = {"aluno": "aluno_id", "professor": "orientador_id", "admin_professor": "orientador_id"}.get(tipo_usuario)
+        visivel = f"p.status IN ({status})"
+        if dono:
+            visivel += f" OR p.{dono} = ?"
+            params.append(usuario.get("user_id"))
+        sql += f" AND ({chave} % 4 <> {TIPOS['projeto']} OR EXISTS (" \
+               f"SELECT 1 FROM projetos p WHERE p.id = {chave} / 4 AND ({visivel})))"
+        participante = "1 = 0"
+        if dono:
+            participante = f"p.{dono} = ?"
+            params.append(usuario.get("user_id"))
+        sql += f" AND ({chave} % 4 <> {TIPOS['documento']} OR EXISTS (" \
+               f"SELECT 1 FROM documentos d JOIN projetos p ON p.id = d.projeto_id " \
+               f"WHERE d.id = {chave} / 4 AND {participante}))"
+    return sql, params
+
+
+async def buscar(conn: AsyncConnection, texto: str, usuario: dict, tipos: Optional[List[str]] = None,
+                 limite: int = 20, offset: int = 0) -> Tuple[int, List[dict]]:
+    """Retorna (total, resultados da página) ordenados por relevância"""
+    cursor = conn.cursor()
+    if conn.dialect == "postgresql":
+        filtros, params = _filtros("busca_indice.id", tipos, usuario)
+        await cursor.execute(f"""
+            SELECT COUNT(*) FROM busca_indice
+            WHERE vetor @@ websearch_to_tsquery('pt_busca', ?) {filtros}
+        """, [texto] + params)
+        total = (await cursor.fetchone())[0]
+        await cursor.execute(f"""
+            SELECT pagina.id AS chave, pagina.titulo, pagina.rank AS relevancia,
+                   ts_headline('pt_busca', pagina.corpo, websearch_to_tsquery('pt_busca', ?),
+                               'StartSel={MARCA_INICIO}, StopSel={MARCA_FIM}, MaxWords=20, MinWords=8') AS trecho
+            FROM (
+                SELECT id, titulo, corpo, ts_rank_cd(vetor, consulta) AS rank
+                FROM busca_indice, websearch_to_tsquery('pt_busca', ?) consulta
+                WHERE vetor @@ consulta {filtros}
+                ORDER BY rank DESC, id
+                LIMIT ? OFFSET ?
+            ) pagina
+            ORDER BY pagina.rank DESC, pagina.id
+        """, [texto, texto] + params + [limite, offset])
+    else:
+        expressao = consulta_fts5(texto)
+        filtros, params = _filtros("busca_fts.rowid", tipos, usuario)
+        await cursor.execute(
+            f"SELECT COUNT(*) FROM busca_fts WHERE busca_fts MATCH ? {filtros}", [expressao] + params
+        )
+        total = (await cursor.fetchone())[0]
+        await cursor.execute(f"""
+            SELECT rowid AS chave, titulo, -rank AS relevancia,
+                   snippet(busca_fts, 1, '{MARCA_INICIO}', '{MARCA_FIM}', '…', 16) AS trecho
+            FROM busca_fts
+            WHERE busca_fts MATCH ? {filtros}
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        """, [expressao] + params + [limite, offset])
+    resultados = [
+        {
+            "tipo": NOMES_TIPOS[row["chave"] % 4],
+            "id": row["chave"] // 4,
+            "titulo": row["titulo"],
+            "trecho": row["trecho"],
+            "relevancia": round(float(row["relevancia"]), 4),
+        }
+        for row in await cursor.fetchall()
+    ]
+    return total, resultados
@@ -0,0 +1,200 @@
+"""
+Índices gerenciados e auditoria dos planos de consulta das rotas
+
+INDICES lista os índices compostos que cobrem os filtros e ordenações mais
+usados pelas rotas; criar_indices() roda como migração e usa
+CREATE INDEX IF NOT EXISTS, aceito pelo SQLite e pelo PostgreSQL.
+
+auditar_consultas() roda EXPLAIN QUERY PLAN (SQLite) ou EXPLAIN (PostgreSQL)
+sobre as consultas de CONSULTAS_AUDITADAS e avisa quando alguma delas faz
+varredura completa de tabela, o que normalmente indica um índice faltando.
+"""
+import logging
+import re
+from typing import Dict, List, Tuple
+
+from sqlalchemy import inspect
+
+from app.core.blob_store import SQL_RESOLVER
+from app.db.session import Connection, Database, database
+
+logger = logging.getLogger(__name__)
+
+# (nome, tabela, colunas)
+INDICES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("ix_projetos_orientador_status", "projetos", ("orientador_id", "status")),
+    ("ix_projetos_aluno", "projetos", ("aluno_id",)),
+    ("ix_projetos_status_submissao", "projetos", ("status", "data_submissao")),
+    ("ix_projetos_status_aprovacao", "projetos", ("status", "data_aprovacao", "id")),
+    ("ix_projetos_submissao", "projetos", ("data_submissao", "id")),
+    ("ix_documentos_projeto_upload", "documentos", ("projeto_id", "data_upload")),
+    ("ix_comentarios_documento_data", "comentarios", ("documento_id", "data_comentario")),
+    ("ix_atividades_projeto_criacao", "atividades", ("projeto_id", "data_criacao")),
+    ("ix_projetos_edicao_ano", "projetos_edicao", ("ano", "id")),
+    ("ix_documentos_caminho", "documentos", ("caminho_arquivo",)),
+    ("ix_projetos_edicao_arquivo", "projetos_edicao", ("arquivo",)),
+]
+
+# Consultas das rotas com os filtros que os índices acima devem atender.
+# Os parâmetros são apenas representativos: o plano não depende dos valores.
+CONSULTAS_AUDITADAS: Dict[str, Tuple[str, tuple]] = {
+    "GET /projetos/meus-projetos": ("""
+        SELECT p.*, o.nome as orientador_nome
+        FROM projetos p
+        JOIN orientadores o ON p.orientador_id = o.id
+        WHERE p.aluno_id = ?
+        ORDER BY p.data_submissao DESC
+    """, (1,)),
+    "GET /projetos/meus-projetos (atividades)": ("""
+        SELECT id, titulo, descricao, data_criacao, projeto_id
+        FROM atividades
+        WHERE projeto_id IN (SELECT id FROM projetos WHERE aluno_id = ?)
+        ORDER BY data_criacao ASC
+    """, (1,)),
+    "GET /projetos/pendentes": ("""
+        SELECT p.*, a.nome as aluno_nome, a.matricula
+        FROM projetos p
+        JOIN alunos a ON p.aluno_id = a.id
+        WHERE p.orientador_id = ? AND p.status = 'pendente'
+        ORDER BY p.data_submissao DESC
+    """, (1,)),
+    "GET /projetos/ativos": ("""
+        SELECT p.*, a.nome as aluno_nome, a.matricula
+        FROM projetos p
+        JOIN alunos a ON p.aluno_id = a.id
+        WHERE p.orientador_id = ? AND p.status = 'ativo'
+        ORDER BY p.data_aprovacao DESC
+    """, (1,)),
+    "GET /projetos/todos-pendentes": ("""
+        SELECT p.*, a.nome as aluno_nome, a.matricula, o.nome as orientador_nome
+        FROM projetos p
+        JOIN alunos a ON p.aluno_id = a.id
+        JOIN orientadores o ON p.orientador_id = o.id
+        WHERE p.status = 'pendente'
+        ORDER BY p.data_submissao DESC
+    """, ()),
+    "GET /projetos/todos-ativos": ("""
+        SELECT p.*, a.nome as aluno_nome, a.matricula, o.nome as orientador_nome
+        FROM projetos p
+        JOIN alunos a ON p.aluno_id = a.id
+        JOIN orientadores o ON p.orientador_id = o.id
+        WHERE p.status = 'ativo'
+        ORDER BY p.data_aprovacao DESC
+    """, ()),
+    "GET /projetos/todos-pendentes?cursor": ("""
+        SELECT p.*, a.nome as aluno_nome, a.matricula, o.nome as orientador_nome
+        FROM projetos p
+        JOIN alunos a ON p.aluno_id = a.id
+        JOIN orientadores o ON p.orientador_id = o.id
+        WHERE p.status = 'pendente' AND p.data_submissao IS NOT NULL AND (p.data_submissao, p.id) < (?, ?)
+        ORDER BY p.data_submissao DESC, p.id DESC LIMIT ?
+    """, ("2025-01-01", 1, 50)),
+    "GET /projetos/todos-ativos?cursor": ("""
+        SELECT p.*, a.nome as aluno_nome, a.matricula, o.nome as orientador_nome
+        FROM projetos p
+        JOIN alunos a ON p.aluno_id = a.id
+        JOIN orientadores o ON p.orientador_id = o.id
+        WHERE p.status = 'ativo' AND p.data_aprovacao IS NOT NULL AND (p.data_aprovacao, p.id) < (?, ?)
+        ORDER BY p.data_aprovacao DESC, p.id DESC LIMIT ?
+    """, ("2025-01-01", 1, 50)),
+    "GET /projetos/todos-projetos?cursor": ("""
+        SELECT p.*, a.nome as aluno_nome, o.nome as orientador_nome
+        FROM projetos p
+        LEFT JOIN alunos a ON p.aluno_id = a.id
+        LEFT JOIN orientadores o ON p.orientador_id = o.id
+        WHERE 1 = 1 AND p.data_submissao IS NOT NULL AND (p.data_submissao, p.id) < (?, ?)
+        ORDER BY p.data_submissao DESC, p.id DESC LIMIT ?
+    """, ("2025-01-01", 1, 50)),
+    "GET /projetos/estatisticas": ("SELECT COUNT(*) FROM projetos WHERE status = ?", ("ativo",)),
+    "GET /projetos/edicoes-texts": (
+        "SELECT titulo, aluno, orientador, arquivo FROM projetos_edicao WHERE ano = ? ORDER BY id ASC", (2024,)
+    ),
+    "GET /documentos/projeto/{id}": ("""
+        SELECT * FROM documentos
+        WHERE projeto_id = ?
+        ORDER BY data_upload DESC, id DESC
+    """, (1,)),
+    "GET /documentos/projeto/{id} (comentários)": ("""
+        SELECT * FROM (
+            SELECT c.*,
+                   CASE
+                       WHEN c.usuario_tipo = 'aluno' THEN a.nome
+                       ELSE o.nome
+                   END as usuario_nome,
+                   ROW_NUMBER() OVER (PARTITION BY c.documento_id ORDER BY c.data_comentario DESC, c.id DESC) as posicao,
+                   COUNT(*) OVER (PARTITION BY c.documento_id) as comentarios_total
+            FROM comentarios c
+            LEFT JOIN alunos a ON c.usuario_id = a.id AND c.usuario_tipo = 'aluno'
+            LEFT JOIN orientadores o ON c.usuario_id = o.id AND c.usuario_tipo = 'professor'
+            WHERE c.documento_id IN (?, ?)
+        ) comentarios_numerados
+        WHERE ? IS NULL OR posicao <= ?
+        ORDER BY data_comentario ASC, id ASC
+    """, (1, 2, None, None)),
+    "GET /uploads/{caminho}": (SQL_RESOLVER, ("uploads/projeto_1/relatorio.pdf",) * 2),
+    "GET /documentos/projeto/{id}/atividades": ("""
+        SELECT id, titulo, descricao, data_criacao, aluno_id
+        FROM atividades
+        WHERE projeto_id = ?
+        ORDER BY data_criacao ASC
+    """, (1,)),
+}
+
+
+def criar_indices(db: Database):
+    """Cria os índices gerenciados que ainda não existem"""
+    tabelas = set(inspect(db.engine).get_table_names())
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        for nome, tabela, colunas in INDICES:
+            if tabela not in tabelas:
+                continue
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} ({', '.join(colunas)})")
+        conn.commit()
+
+
+def _varreduras_sqlite(conn: Connection, sql: str, params: tuple) -> List[str]:
+    linhas = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    detalhes = [linha["detail"] for linha in linhas]
+    # Subconsultas materializadas aparecem como SCAN do próprio nome; não são tabelas
+    subconsultas = {
+        m.group(1) for d in detalhes
+        for m in [re.match(r"(?:CO-ROUTINE|MATERIALIZE) (\S+)", d)] if m
+    }
+    varreduras = []
+    for detalhe in detalhes:
+        m = re.match(r"SCAN (\S+)(.*)", detalhe)
+        if not m or "USING" in m.group(2) or m.group(1) in subconsultas or m.group(1) == "CONSTANT":
+            continue
+        varreduras.append(detalhe)
+    return varreduras
+
+
+def _varreduras_postgresql(conn: Connection, sql: str, params: tuple) -> List[str]:
+    # Em tabelas pequenas o PostgreSQL prefere Seq Scan mesmo com índice;
+    # desligar seqscan mostra se existe um caminho por índice
+    try:
+        conn.execute("SET LOCAL enable_seqscan = off")
+        linhas = conn.execute(f"EXPLAIN {sql}", params).fetchall()
+    finally:
+        conn.rollback()
+    return [linha[0].strip() for linha in linhas if "Seq Scan" in linha[0]]
+
+
+def auditar_consultas(db: Database = database) -> Dict[str, List[str]]:
+    """Retorna (e registra como aviso) as consultas com varredura completa de tabela"""
+    varreduras_por_rota = {}
+    with db.connect() as conn:
+        for rota, (sql, params) in CONSULTAS_AUDITADAS.items():
+            try:
+                if db.dialect == "postgresql":
+                    varreduras = _varreduras_postgresql(conn, sql, params)
+                else:
+                    varreduras = _varreduras_sqlite(conn, sql, params)
+            except Exception as e:
+                logger.warning("⚠️ Auditoria de índices: não foi possível analisar %s: %s", rota, e)
+                continue
+            if varreduras:
+                varreduras_por_rota[rota] = varreduras
+                logger.warning("⚠️ %s faz varredura completa: %s", rota, "; ".join(varreduras))
+    return varreduras_por_rota
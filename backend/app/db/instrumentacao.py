@@ -0,0 +1,139 @@
+"""
+Instrumentação das consultas SQL: fingerprints, log de consultas lentas e
+detector de N+1
+
+Toda chamada a Cursor.execute/executemany passa pelo observador registrado
+aqui (session.observadores_consulta). A consulta é reduzida a um fingerprint
+(literais e listas de parâmetros trocados por ?, espaços e comentários
+removidos), então "WHERE id = 1" e "WHERE id = 2" contam como a mesma
+instrução.
+
+Dentro de escopo_consultas() (aberto pelo MetricasMiddleware em cada
+requisição HTTP) as consultas são agregadas por fingerprint: quantidade e
+tempo. Com isso:
+
+- consultas acima de SQL_LENTA_MS são registradas no log com o fingerprint
+  e a rota que as executou (também fora de requisições);
+- o mesmo fingerprint executado mais de SQL_REPETICOES_LIMITE vezes na mesma
+  requisição é o padrão de N+1 (uma consulta por item de uma lista). Com
+  SQL_REPETICOES_MODO=avisar o fim da requisição registra um aviso; com
+  SQL_REPETICOES_MODO=erro a consulta que passa do limite levanta
+  ConsultasRepetidasError, o que faz os testes falharem na hora. O padrão é
+  avisar com DEBUG ligado e desligado em produção.
+"""
+import logging
+import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from app.core.config import get_settings
+from app.db import session
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SQL_LENTA_MS = float(os.getenv("SQL_LENTA_MS", "200"))
+SQL_REPETICOES_LIMITE = int(os.getenv("SQL_REPETICOES_LIMITE", "10"))
+SQL_REPETICOES_MODO = os.getenv("SQL_REPETICOES_MODO", "avisar" if settings.DEBUG else "desligado")
+
+_COMENTARIOS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_TEXTOS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALORES = re.compile(r"(\(\?\.\.\.\))(?:\s*,\s*\(\?\.\.\.\))+")
+_ESPACOS = re.compile(r"\s+")
+
+
+class ConsultasRepetidasError(RuntimeError):
+    """A mesma instrução passou de SQL_REPETICOES_LIMITE execuções em uma requisição"""
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """Forma normalizada da instrução: sem literais, comentários nem espaços extras"""
+    texto = _COMENTARIOS.sub(" ", sql)
+    texto = _TEXTOS.sub("?", texto)
+    texto = _NUMEROS.sub("?", texto.replace("%s", "?"))
+    texto = _LISTAS.sub("(?...)", texto)
+    texto = _VALORES.sub(r"\1...", texto)
+    return _ESPACOS.sub(" ", texto).strip().rstrip(";").strip()
+
+
+class ConsultasRequisicao:
+    """Consultas de uma requisição agregadas por fingerprint: [quantidade, tempo]"""
+
+    __slots__ = ("_descricao", "total", "tempo", "por_fingerprint")
+
+    def __init__(self, descricao: Union[str, Callable[[], str]]):
+        self._descricao = descricao
+        self.total = 0
+        self.tempo = 0.0
+        self.por_fingerprint: Dict[str, list] = {}
+
+    @property
+    def descricao(self) -> str:
+        # Callable porque a rota só é conhecida depois do roteamento
+        return self._descricao() if callable(self._descricao) else self._descricao
+
+    def registrar(self, instrucao: str, duracao: float) -> int:
+        """Soma a execução e retorna quantas vezes a instrução já rodou nesta requisição"""
+        self.total += 1
+        self.tempo += duracao
+        item = self.por_fingerprint.get(instrucao)
+        if item is None:
+            item = self.por_fingerprint[instrucao] = [0, 0.0]
+        item[0] += 1
+        item[1] += duracao
+        return item[0]
+
+    def repetidas(self, limite: Optional[int] = None) -> List[Tuple[str, int, float]]:
+        """(fingerprint, quantidade, tempo) das instruções executadas mais de `limite` vezes"""
+        limite = SQL_REPETICOES_LIMITE if limite is None else limite
+        return sorted(((instrucao, quantidade, tempo)
+                       for instrucao, (quantidade, tempo) in self.por_fingerprint.items() if quantidade > limite),
+                      key=lambda item: -item[1])
+
+
+_requisicao_atual: ContextVar[Optional[ConsultasRequisicao]] = ContextVar("consultas_requisicao", default=None)
+
+
+def consultas_atuais() -> Optional[ConsultasRequisicao]:
+    return _requisicao_atual.get()
+
+
+@contextmanager
+def escopo_consultas(descricao: Union[str, Callable[[], str]]) -> Iterator[ConsultasRequisicao]:
+    """Agrega as consultas feitas dentro do bloco (e nas threads do anyio que ele chama)"""
+    consultas = ConsultasRequisicao(descricao)
+    token = _requisicao_atual.set(consultas)
+    try:
+        yield consultas
+    finally:
+        _requisicao_atual.reset(token)
+        if SQL_REPETICOES_MODO == "avisar":
+            for instrucao, quantidade, tempo in consultas.repetidas():
+                logger.warning("⚠️ Possível N+1 em %s: %d execuções (%.1f ms) de %s",
+                               consultas.descricao, quantidade, tempo * 1000, instrucao)
+        if consultas.total:
+            logger.debug("📊 %s: %d consultas, %d instruções distintas, %.1f ms no banco", consultas.descricao,
+                         consultas.total, len(consultas.por_fingerprint), consultas.tempo * 1000)
+
+
+def _observar_consulta(sql: str, duracao: float):
+    consultas = _requisicao_atual.get()
+    instrucao = fingerprint(sql)
+    if duracao * 1000 >= SQL_LENTA_MS:
+        logger.warning("🐢 Consulta lenta (%.1f ms) em %s: %s", duracao * 1000,
+                       consultas.descricao if consultas is not None else "fora de requisição", instrucao)
+    if consultas is None:
+        return
+    quantidade = consultas.registrar(instrucao, duracao)
+    if SQL_REPETICOES_MODO == "erro" and quantidade == SQL_REPETICOES_LIMITE + 1:
+        raise ConsultasRepetidasError(
+            f"{consultas.descricao}: mais de {SQL_REPETICOES_LIMITE} execuções de {instrucao}")
+
+
+session.observadores_consulta.append(_observar_consulta)
@@ -0,0 +1,201 @@
+"""
+Migrações incrementais do schema usado pelas rotas
+
+Cada migração verifica o estado atual do banco antes de alterar, então
+aplicar_migracoes() pode rodar em todo startup, no SQLite e no PostgreSQL.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy import inspect
+
+from app.db.busca import criar_indice_busca
+from app.db.indices import criar_indices
+from app.db.session import Database, database
+from database_config import DatabaseConfig, db_config
+
+logger = logging.getLogger(__name__)
+
+
+def _colunas(db: Database, tabela: str) -> set:
+    inspector = inspect(db.engine)
+    if not inspector.has_table(tabela):
+        return set()
+    return {coluna["name"] for coluna in inspector.get_columns(tabela)}
+
+
+def recalcular_resumo_documentos(conn, projeto_id: int = None):
+    """Recalcula documentos_count/ultima_postagem a partir da tabela documentos"""
+    sql = """
+        UPDATE projetos SET
+            documentos_count = (SELECT COUNT(*) FROM documentos d WHERE d.projeto_id = projetos.id),
+            ultima_postagem = (SELECT MAX(d.data_upload) FROM documentos d WHERE d.projeto_id = projetos.id)
+    """
+    params = ()
+    if projeto_id is not None:
+        sql += " WHERE id = ?"
+        params = (projeto_id,)
+    conn.cursor().execute(sql, params)
+
+
+def adicionar_resumo_documentos(db: Database):
+    """Adiciona o resumo de documentos por projeto e preenche a partir do histórico"""
+    colunas = _colunas(db, "projetos")
+    if not colunas or {"documentos_count", "ultima_postagem"} <= colunas:
+        return
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        if "documentos_count" not in colunas:
+            cursor.execute("ALTER TABLE projetos ADD COLUMN documentos_count INTEGER NOT NULL DEFAULT 0")
+        if "ultima_postagem" not in colunas:
+            cursor.execute("ALTER TABLE projetos ADD COLUMN ultima_postagem TEXT")
+        recalcular_resumo_documentos(conn)
+        conn.commit()
+    logger.info("✅ Resumo de documentos por projeto criado")
+
+
+# Arquivos JSON usados antes da tabela configuracoes (chave -> arquivo)
+ARQUIVOS_CONFIGURACOES = {
+    "inscricao_periodo": "inscricao_periodo.json",
+    "home_texts": "home_texts.json",
+    "edicoes_texts": "edicoes_texts.json",
+}
+
+
+def criar_configuracoes(db: Database):
+    """Cria a tabela configuracoes"""
+    with db.connect() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS configuracoes (
+                chave VARCHAR(100) PRIMARY KEY,
+                valor TEXT NOT NULL,
+                versao INTEGER NOT NULL DEFAULT 1,
+                atualizado_em TEXT
+            )
+        """)
+        conn.commit()
+
+
+def importar_configuracoes(db: Database):
+    """Importa para configuracoes os arquivos JSON antigos do diretório atual, se existirem"""
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        for chave, arquivo in ARQUIVOS_CONFIGURACOES.items():
+            if not os.path.exists(arquivo):
+                continue
+            cursor.execute("SELECT 1 FROM configuracoes WHERE chave = ?", (chave,))
+            if cursor.fetchone():
+                continue
+            with open(arquivo, "r") as f:
+                valor = json.load(f)
+            cursor.execute(
+                "INSERT INTO configuracoes (chave, valor, versao, atualizado_em) VALUES (?, ?, 1, ?)",
+                (chave, json.dumps(valor), datetime.now().isoformat())
+            )
+            logger.info("✅ Configuração '%s' importada de %s", chave, arquivo)
+        conn.commit()
+
+
+def adicionar_blobs(db: Database):
+    """Cria a tabela blobs e a coluna sha256 das linhas que apontam para uploads"""
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha256 VARCHAR(64) PRIMARY KEY,
+                tamanho INTEGER NOT NULL,
+                referencias INTEGER NOT NULL DEFAULT 0,
+                criado_em TEXT
+            )
+        """)
+        for tabela in ("documentos", "projetos_edicao"):
+            colunas = _colunas(db, tabela)
+            if colunas and "sha256" not in colunas:
+                cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN sha256 VARCHAR(64)")
+        conn.commit()
+
+
+def criar_textos_documentos(db: Database):
+    """Cria a tabela com o texto extraído de cada documento (app/core/indexacao.py)"""
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS documentos_texto (
+                documento_id INTEGER PRIMARY KEY,
+                nome_arquivo TEXT,
+                sha256 VARCHAR(64),
+                versao INTEGER NOT NULL,
+                status VARCHAR(20) NOT NULL,
+                texto TEXT,
+                erro TEXT,
+                extraido_em TEXT
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_documentos_texto_sha256 ON documentos_texto (sha256)")
+        conn.commit()
+
+
+def email_unico(db: Database, tabela: str) -> bool:
+    """True se `tabela` tem índice ou restrição única só em email (criar_email_unico)"""
+    inspector = inspect(db.engine)
+    unicos = [i["column_names"] for i in inspector.get_indexes(tabela) if i.get("unique")]
+    unicos += [u["column_names"] for u in inspector.get_unique_constraints(tabela)]
+    return ["email"] in unicos
+
+
+def criar_email_unico(db: Database):
+    """Índice único em email de alunos e orientadores, usado pelo upsert do login (auth.py)"""
+    for tabela in ("alunos", "orientadores"):
+        if not _colunas(db, tabela) or email_unico(db, tabela):
+            continue
+        with db.connect() as conn:
+            duplicados = conn.execute(
+                f"SELECT email, COUNT(*) FROM {tabela} GROUP BY email HAVING COUNT(*) > 1"
+            ).fetchall()
+            if duplicados:
+                logger.warning("⚠️ %s tem %d email(s) duplicado(s) (ex.: %s); índice único não criado",
+                               tabela, len(duplicados), duplicados[0][0])
+                continue
+            conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{tabela}_email ON {tabela} (email)")
+            conn.commit()
+        logger.info("✅ Índice único de email criado em %s", tabela)
+
+
+MIGRACOES = [
+    adicionar_resumo_documentos,
+    criar_indices,
+    criar_configuracoes,
+    importar_configuracoes,
+    adicionar_blobs,
+    criar_textos_documentos,
+    criar_indice_busca,
+    criar_email_unico,
+]
+
+
+# Migrações que trazem dados de fora do banco (e não só mudam o schema)
+MIGRACOES_DE_DADOS = {importar_configuracoes}
+
+
+def aplicar_migracoes(db: Database = database, importar_dados: bool = True):
+    """Aplica todas as migrações pendentes"""
+    for migracao in MIGRACOES:
+        if importar_dados or migracao not in MIGRACOES_DE_DADOS:
+            migracao(db)
+
+
+def preparar_schema(config: DatabaseConfig = db_config, dados_iniciais: bool = True) -> Database:
+    """
+    Cria o schema como no startup da aplicação: tabelas dos modelos
+    (database_config) e migrações. Retorna o acesso ao banco de `config`.
+
+    Com dados_iniciais=False não insere os orientadores de exemplo nem
+    importa os JSON de configuração do diretório atual: é o destino da
+    migração, que recebe esses dados da origem.
+    """
+    config.create_tables(dados_exemplo=dados_iniciais)
+    db = database if config is db_config else Database(config.engine)
+    aplicar_migracoes(db, importar_dados=dados_iniciais)
+    return db
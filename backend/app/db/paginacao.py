@@ -0,0 +1,96 @@
+"""
+Paginação por cursor (keyset) das listagens ordenadas por data
+
+Em vez de OFFSET, cada página continua a partir da chave (data, id) da
+última linha da página anterior: `(data, id) < (?, ?)` é uma busca por
+intervalo no índice (status, data, id), então o custo de uma página não
+cresce com o histórico. O cursor entregue ao cliente é opaco (JSON em
+base64 url-safe) e estável: inserções novas não deslocam as páginas
+seguintes, como acontece com OFFSET.
+
+Linhas com a data nula vêm depois de todas as outras (NULLS LAST), em uma
+segunda fase ordenada só pelo id.
+
+estimar_linhas() evita o COUNT completo: no PostgreSQL usa a estimativa de
+linhas do planejador (EXPLAIN); no SQLite, que não estima, conta pelo índice.
+"""
+import base64
+import json
+from typing import Any, List, Optional, Tuple
+
+from app.db.session import AsyncConnection, AsyncCursor
+
+Chave = Tuple[Optional[str], int]
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+
+def codificar_cursor(chave: Chave) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(chave)).encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Chave:
+    """Levanta ValueError para cursores inválidos"""
+    try:
+        valor, ident = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("cursor inválido")
+    if not (valor is None or isinstance(valor, str)) or not isinstance(ident, int):
+        raise ValueError("cursor inválido")
+    return valor, ident
+
+
+async def pagina_keyset(
+    cursor: AsyncCursor,
+    consulta: str,
+    filtro: str,
+    params: list,
+    coluna: str,
+    limite: int,
+    apos: Optional[Chave] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Uma página de `consulta WHERE filtro` em ordem (coluna DESC, p.id DESC)
+
+    `coluna` é a data qualificada (ex.: p.data_submissao); retorna as linhas
+    e o cursor da próxima página (None na última).
+    """
+    campo = coluna.split(".")[-1]
+    linhas: List[dict] = []
+    if apos is None or apos[0] is not None:
+        sql = f"{consulta} WHERE {filtro} AND {coluna} IS NOT NULL"
+        fase_params = list(params)
+        if apos is not None:
+            sql += f" AND ({coluna}, p.id) < (?, ?)"
+            fase_params += [apos[0], apos[1]]
+        sql += f" ORDER BY {coluna} DESC, p.id DESC LIMIT ?"
+        await cursor.execute(sql, fase_params + [limite + 1])
+        linhas = [dict(row) for row in await cursor.fetchall()]
+        apos = None
+    if len(linhas) <= limite:
+        sql = f"{consulta} WHERE {filtro} AND {coluna} IS NULL"
+        fase_params = list(params)
+        if apos is not None:
+            sql += " AND p.id < ?"
+            fase_params.append(apos[1])
+        sql += " ORDER BY p.id DESC LIMIT ?"
+        await cursor.execute(sql, fase_params + [limite + 1 - len(linhas)])
+        linhas += [dict(row) for row in await cursor.fetchall()]
+    if len(linhas) <= limite:
+        return linhas, None
+    linhas = linhas[:limite]
+    ultima = linhas[-1]
+    return linhas, codificar_cursor((ultima[campo], ultima["id"]))
+
+
+async def estimar_linhas(conn: AsyncConnection, tabela: str, filtro: str = "1 = 1", params: list = ()) -> int:
+    """Total aproximado de linhas de `tabela p WHERE filtro`, sem COUNT completo no PostgreSQL"""
+    cursor = conn.cursor()
+    if conn.dialect == "postgresql":
+        await cursor.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {tabela} p WHERE {filtro}", list(params))
+        plano: Any = (await cursor.fetchone())[0]
+        if isinstance(plano, str):
+            plano = json.loads(plano)
+        return int(plano[0]["Plan"]["Plan Rows"])
+    await cursor.execute(f"SELECT COUNT(*) FROM {tabela} p WHERE {filtro}", list(params))
+    return (await cursor.fetchone())[0]
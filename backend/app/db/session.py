@@ -0,0 +1,339 @@
+"""
+Camada de acesso a dados compartilhada pelas rotas
+
+Usa o engine do SQLAlchemy configurado em database_config (com pool de conexões)
+e entrega conexões DBAPI com a mesma interface do sqlite3 que as rotas já usam:
+placeholders '?', linhas acessíveis por nome e por índice, lastrowid e commit().
+
+As rotas usam a variante assíncrona (AsyncConnection/AsyncCursor): cada chamada
+ao driver roda no threadpool do anyio e o loop de eventos do uvicorn fica livre
+enquanto a consulta executa.
+"""
+import os
+import sqlite3
+import threading
+import time
+from functools import partial
+from typing import Any, AsyncGenerator, Callable, Dict, Iterable, List, Optional
+
+import anyio
+from sqlalchemy import event
+
+from database_config import db_config
+
+
+class PoolMetrics:
+    """Contadores de uso do pool de conexões"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections_created = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def incr(self, name: str, value=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connections_created": self.connections_created,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "waits": self.waits,
+                "wait_time_ms": round(self.wait_time * 1000, 3),
+            }
+
+
+# Chamadas depois de cada execute/executemany com (sql, duração em segundos);
+# as métricas (app/core/metricas.py) registram aqui a sua função
+observadores_consulta: List[Callable[[str, float], None]] = []
+
+
+def _notificar_consulta(sql: str, inicio: float):
+    duracao = time.perf_counter() - inicio
+    for observador in observadores_consulta:
+        observador(sql, duracao)
+
+
+class Cursor:
+    """Cursor com interface do sqlite3 sobre qualquer driver suportado"""
+
+    def __init__(self, connection: "Connection"):
+        self.connection = connection
+        raw = connection.raw
+        if connection.dialect == "postgresql":
+            import psycopg2.extras
+            self._cursor = raw.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        else:
+            self._cursor = raw.cursor()
+            self._cursor.row_factory = sqlite3.Row
+
+    def _prepare(self, sql: str) -> str:
+        if self.connection.dialect == "postgresql":
+            # psycopg2 usa o estilo 'format': escapar '%' literais e trocar '?' por '%s'
+            return sql.replace("%", "%%").replace("?", "%s")
+        return sql
+
+    def execute(self, sql: str, params: Iterable = ()) -> "Cursor":
+        inicio = time.perf_counter()
+        try:
+            self._cursor.execute(self._prepare(sql), tuple(params))
+        finally:
+            if observadores_consulta:
+                _notificar_consulta(sql, inicio)
+        return self
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Iterable]) -> "Cursor":
+        inicio = time.perf_counter()
+        try:
+            self._cursor.executemany(self._prepare(sql), [tuple(p) for p in seq_of_params])
+        finally:
+            if observadores_consulta:
+                _notificar_consulta(sql, inicio)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self) -> List:
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: int) -> List:
+        return self._cursor.fetchmany(size)
+
+    @property
+    def colunas(self) -> List[str]:
+        """Nomes das colunas do último SELECT"""
+        return [coluna[0] for coluna in self._cursor.description or ()]
+
+    def fetchall_tuplas(self) -> List:
+        """fetchall() sem o objeto de linha (sqlite3.Row) por resultado, para serialização direta"""
+        if self.connection.dialect == "postgresql":
+            # DictRow é uma lista; zip() sobre ela não copia nada
+            return self._cursor.fetchall()
+        self._cursor.row_factory = None
+        try:
+            return self._cursor.fetchall()
+        finally:
+            self._cursor.row_factory = sqlite3.Row
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        if self.connection.dialect == "postgresql":
+            # No PostgreSQL o id gerado vem da sequência usada pelo último INSERT
+            with self.connection.raw.cursor() as cur:
+                cur.execute("SELECT lastval()")
+                return cur.fetchone()[0]
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    """Conexão emprestada do pool; close() devolve a conexão ao pool"""
+
+    def __init__(self, raw, dialect: str):
+        self.raw = raw
+        self.dialect = dialect
+        self._closed = False
+
+    def cursor(self) -> Cursor:
+        return Cursor(self)
+
+    def execute(self, sql: str, params: Iterable = ()) -> Cursor:
+        return self.cursor().execute(sql, params)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class Database:
+    """Ponto único de acesso ao banco usado pelas rotas"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.metrics = PoolMetrics()
+        self._register_pool_events()
+
+    def _register_pool_events(self):
+        metrics = self.metrics
+
+        @event.listens_for(self.engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            metrics.incr("connections_created")
+
+        @event.listens_for(self.engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            metrics.incr("checkouts")
+
+        @event.listens_for(self.engine, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            metrics.incr("checkins")
+
+        @event.listens_for(self.engine, "invalidate")
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            metrics.incr("invalidations")
+
+    def _pool_exhausted(self) -> bool:
+        pool = self.engine.pool
+        if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+            return False
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        if max_overflow < 0:
+            return False
+        return pool.checkedout() >= pool.size() + max_overflow
+
+    @property
+    def autoincrement_pk(self) -> str:
+        """DDL da coluna id auto incrementada no dialeto atual"""
+        if self.dialect == "postgresql":
+            return "SERIAL PRIMARY KEY"
+        return "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def connect(self) -> Connection:
+        """Empresta uma conexão do pool, registrando esperas quando ele está esgotado"""
+        exhausted = self._pool_exhausted()
+        start = time.perf_counter()
+        raw = self.engine.raw_connection()
+        if exhausted:
+            self.metrics.incr("waits")
+            self.metrics.incr("wait_time", time.perf_counter() - start)
+        return Connection(raw, self.dialect)
+
+    def pool_status(self) -> Dict[str, Any]:
+        """Estado atual do pool e contadores acumulados"""
+        pool = self.engine.pool
+        status = {
+            "dialect": self.dialect,
+            "pool_class": type(pool).__name__,
+        }
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, name, None)
+            if callable(method):
+                status[name] = method()
+        if hasattr(pool, "_max_overflow"):
+            status["max_overflow"] = pool._max_overflow
+        status.update(self.metrics.as_dict())
+        return status
+
+
+class AsyncCursor:
+    """Cursor assíncrono: cada operação roda fora do loop de eventos"""
+
+    def __init__(self, connection: "AsyncConnection", cursor: Cursor):
+        self.connection = connection
+        self._cursor = cursor
+
+    @property
+    def sync(self) -> Cursor:
+        return self._cursor
+
+    async def execute(self, sql: str, params: Iterable = ()) -> "AsyncCursor":
+        await self.connection.run(self._cursor.execute, sql, params)
+        return self
+
+    async def executemany(self, sql: str, seq_of_params: Iterable[Iterable]) -> "AsyncCursor":
+        await self.connection.run(self._cursor.executemany, sql, seq_of_params)
+        return self
+
+    async def fetchone(self):
+        return await self.connection.run(self._cursor.fetchone)
+
+    async def fetchall(self) -> List:
+        return await self.connection.run(self._cursor.fetchall)
+
+    async def fetchmany(self, size: int) -> List:
+        return await self.connection.run(self._cursor.fetchmany, size)
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+
+class AsyncConnection:
+    """Conexão do pool usada pelas rotas async (close() devolve ao pool)"""
+
+    def __init__(self, connection: Connection):
+        self.sync = connection
+        self.dialect = connection.dialect
+
+    async def run(self, func: Callable, *args):
+        return await anyio.to_thread.run_sync(partial(func, *args))
+
+    def cursor(self) -> AsyncCursor:
+        # Criar o cursor não faz I/O, então não precisa sair do loop
+        return AsyncCursor(self, self.sync.cursor())
+
+    async def execute(self, sql: str, params: Iterable = ()) -> AsyncCursor:
+        return await self.cursor().execute(sql, params)
+
+    async def commit(self):
+        await self.run(self.sync.commit)
+
+    async def rollback(self):
+        await self.run(self.sync.rollback)
+
+    async def close(self):
+        await self.run(self.sync.close)
+
+
+database = Database(db_config.engine)
+
+
+def _descartar_pool_herdado():
+    # O startup (setup_database, migrações, auditoria) roda no master do gunicorn com
+    # preload_app; um worker criado depois do fork não pode usar as conexões herdadas.
+    # close=False: o filho só esquece as conexões, sem fechar as que são do pai.
+    database.engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_descartar_pool_herdado)
+
+
+def get_db_connection() -> Connection:
+    """Obter conexão síncrona do pool (quem chama deve fechar com close())"""
+    return database.connect()
+
+
+async def get_async_db_connection() -> AsyncConnection:
+    """Obter conexão assíncrona do pool (quem chama deve fechar com await close())"""
+    conn = await anyio.to_thread.run_sync(database.connect)
+    return AsyncConnection(conn)
+
+
+async def get_db() -> AsyncGenerator[AsyncConnection, None]:
+    """Dependência do FastAPI: conexão do pool devolvida ao fim da requisição"""
+    conn = await get_async_db_connection()
+    try:
+        yield conn
+    finally:
+        await conn.close()
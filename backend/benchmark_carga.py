@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Teste de carga de ponta a ponta da API, sem rede externa
+
+Usuários virtuais executam sessões realistas contra main:app (em processo,
+via httpx + ASGI) ou contra um servidor já rodando (--url), por --duracao
+segundos, e o relatório mostra vazão e latência p50/p95/p99 por rota.
+
+Cenários (peso padrão entre parênteses, ajustável com --mix):
+  aluno       painel do aluno: meus projetos, perfil, documentos e atividades (50)
+  orientador  revisão: pendentes, ativos, documentos de um projeto, comentário (25)
+  admin       listagens paginadas do admin e estatísticas (10)
+  upload      envio de um documento pelo aluno (5)
+  login       callback Microsoft contra o provedor de identidade local (5)
+  busca       busca textual (5)
+
+Os dados vêm do gerar_dados_sinteticos.py: com --banco aponta para um banco
+já gerado; sem ele, gera um banco temporário na escala de --alunos e
+--comentarios. No modo --url, o servidor precisa usar o mesmo banco e, para
+o cenário de login, MICROSOFT_AUTHORITY/MICROSOFT_GRAPH_URL apontando para
+o provedor local (--porta-provedor).
+
+Uso (a partir de backend/):
+    python benchmark_carga.py --alunos 5000 --comentarios 50000 --usuarios 20 --duracao 30
+    python benchmark_carga.py --banco /tmp/carga/database.db --mix aluno=70,orientador=30
+    python benchmark_carga.py --banco /tmp/carga/database.db --url http://127.0.0.1:8000 --porta-provedor 9100
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmark_login import ProvedorLocal
+from gerar_dados_sinteticos import PALAVRAS, gerar, preparar_banco
+
+MIX_PADRAO = "aluno=50,orientador=25,admin=10,upload=5,login=5,busca=5"
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil pelo posto mais próximo (valores já ordenados)"""
+    if not valores:
+        return 0.0
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+@lru_cache(maxsize=None)
+def token_de(user_id: int, user_type: str) -> str:
+    """Um token por usuário, reaproveitado entre as sessões como no navegador"""
+    from app.api.routes.auth import create_access_token
+    return create_access_token({"user_id": user_id, "user_type": user_type,
+                                "email": f"carga{user_id}@{user_type}.ibmec.edu.br"})
+
+
+class Medicoes:
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.erros: Dict[str, int] = defaultdict(int)
+        self.duracao = 0.0
+
+    def registrar(self, rota: str, duracao: float, ok: bool):
+        self.latencias[rota].append(duracao)
+        if not ok:
+            self.erros[rota] += 1
+
+    def relatorio(self, duracao: float) -> List[dict]:
+        linhas = []
+        todas = []
+        for rota in sorted(self.latencias):
+            valores = sorted(self.latencias[rota])
+            todas += valores
+            linhas.append(self._linha(rota, valores, self.erros[rota], duracao))
+        linhas.append(self._linha("TOTAL", sorted(todas), sum(self.erros.values()), duracao))
+        return linhas
+
+    @staticmethod
+    def _linha(rota: str, valores: List[float], erros: int, duracao: float) -> dict:
+        return {
+            "rota": rota, "requisicoes": len(valores), "erros": erros,
+            "req_s": len(valores) / duracao,
+            "p50_ms": percentil(valores, 50) * 1000,
+            "p95_ms": percentil(valores, 95) * 1000,
+            "p99_ms": percentil(valores, 99) * 1000,
+        }
+
+
+class Amostras:
+    """Usuários e projetos do banco usados pelos cenários"""
+
+    def __init__(self, db, limite: int = 2000):
+        with db.connect() as conn:
+            # Alunos com projeto ativo e atividade (podem enviar documentos)
+            self.alunos = [tuple(r) for r in conn.execute("""
+                SELECT p.aluno_id, p.id FROM projetos p
+                WHERE p.status = 'ativo' AND EXISTS (SELECT 1 FROM atividades a WHERE a.projeto_id = p.id)
+                ORDER BY p.id DESC LIMIT ?
+            """, (limite,)).fetchall()]
+            self.documentos = [tuple(r) for r in conn.execute("""
+                SELECT p.orientador_id, p.id, d.id FROM documentos d
+                JOIN projetos p ON p.id = d.projeto_id
+                ORDER BY d.id DESC LIMIT ?
+            """, (limite,)).fetchall()]
+        if not self.alunos or not self.documentos:
+            raise SystemExit("❌ Banco sem projetos ativos com documentos; gere os dados com gerar_dados_sinteticos.py")
+
+
+class Sessao:
+    """Um usuário virtual: escolhe um cenário pelo peso e executa as requisições dele"""
+
+    def __init__(self, client, api: str, amostras: Amostras, medicoes: Medicoes, rng: random.Random):
+        self.client = client
+        self.api = api
+        self.amostras = amostras
+        self.medicoes = medicoes
+        self.rng = rng
+
+    async def requisitar(self, rota: str, metodo: str, url: str, token: Optional[str] = None,
+                         esperado=(200,), **kwargs):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        inicio = time.perf_counter()
+        try:
+            response = await self.client.request(metodo, self.api + url, headers=headers, **kwargs)
+            ok = response.status_code in esperado
+        except Exception:
+            ok = False
+        self.medicoes.registrar(f"{metodo} {rota}", time.perf_counter() - inicio, ok)
+
+    async def aluno(self):
+        aluno_id, projeto_id = self.rng.choice(self.amostras.alunos)
+        token = token_de(aluno_id, "aluno")
+        await self.requisitar("/projetos/meus-projetos", "GET", "/projetos/meus-projetos", token)
+        await self.requisitar("/perfis/meu-perfil", "GET", "/perfis/meu-perfil", token)
+        await self.requisitar("/projetos/inscricao-periodo", "GET", "/projetos/inscricao-periodo", token)
+        await self.requisitar("/documentos/projeto/{id}", "GET", f"/documentos/projeto/{projeto_id}", token,
+                              params={"limite_comentarios": 5})
+        await self.requisitar("/documentos/projeto/{id}/atividades", "GET",
+                              f"/documentos/projeto/{projeto_id}/atividades", token)
+
+    async def orientador(self):
+        orientador_id, projeto_id, documento_id = self.rng.choice(self.amostras.documentos)
+        token = token_de(orientador_id, "professor")
+        await self.requisitar("/projetos/pendentes", "GET", "/projetos/pendentes", token)
+        await self.requisitar("/projetos/ativos", "GET", "/projetos/ativos", token)
+        await self.requisitar("/documentos/projeto/{id}", "GET", f"/documentos/projeto/{projeto_id}", token)
+        await self.requisitar("/documentos/comentar/{id}", "POST", f"/documentos/comentar/{documento_id}", token,
+                              json={"comentario": " ".join(self.rng.sample(PALAVRAS, 8))})
+
+    async def admin(self):
+        token = token_de(1, "admin")
+        await self.requisitar("/projetos/todos-projetos", "GET", "/projetos/todos-projetos", token,
+                              params={"limite": 50, "estimar_total": "true"})
+        await self.requisitar("/projetos/todos-pendentes", "GET", "/projetos/todos-pendentes", token,
+                              params={"limite": 50})
+        await self.requisitar("/projetos/estatisticas", "GET", "/projetos/estatisticas")
+
+    async def upload(self):
+        aluno_id, projeto_id = self.rng.choice(self.amostras.alunos)
+        conteudo = os.urandom(self.rng.randint(10_000, 200_000))
+        await self.requisitar("/documentos/upload/{id}", "POST", f"/documentos/upload/{projeto_id}",
+                              token_de(aluno_id, "aluno"),
+                              files={"file": ("entrega.pdf", conteudo, "application/pdf")},
+                              data={"comentario": "entrega do teste de carga"})
+
+    async def login(self):
+        # Códigos repetidos: parte dos logins é de usuários que já entraram antes
+        codigo = f"{self.rng.randrange(len(self.amostras.alunos) * 2)}"
+        await self.requisitar("/auth/callback", "GET", "/auth/callback", esperado=(307,),
+                              params={"code": codigo, "state": "carga"})
+
+    async def busca(self):
+        token = token_de(1, "admin")
+        await self.requisitar("/busca", "GET", "/busca", token, params={"q": " ".join(self.rng.sample(PALAVRAS, 2))})
+
+
+def ler_mix(texto: str) -> Dict[str, int]:
+    mix = {}
+    for parte in texto.split(","):
+        nome, _, peso = parte.partition("=")
+        if not hasattr(Sessao, nome.strip()):
+            raise SystemExit(f"❌ Cenário desconhecido: {nome}")
+        mix[nome.strip()] = int(peso or 1)
+    return mix
+
+
+async def executar(args, db) -> Medicoes:
+    import httpx
+    from app.core.config import get_settings
+    from app.core.http_cliente import encerrar_cliente_http
+
+    amostras = Amostras(db)
+    medicoes = Medicoes()
+    mix = ler_mix(args.mix)
+    cenarios, pesos = list(mix), list(mix.values())
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60,
+                                   limits=httpx.Limits(max_connections=args.usuarios))
+    else:
+        import main
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://carga", timeout=60)
+
+    fim = time.perf_counter() + args.duracao
+
+    async def usuario_virtual(indice: int):
+        sessao = Sessao(client, get_settings().API_V1_STR, amostras, medicoes, random.Random(args.semente + indice))
+        while time.perf_counter() < fim:
+            await getattr(sessao, sessao.rng.choices(cenarios, pesos)[0])()
+
+    async with client:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(usuario_virtual(i) for i in range(args.usuarios)))
+        medicoes.duracao = time.perf_counter() - inicio
+    await encerrar_cliente_http()
+    return medicoes
+
+
+def imprimir(linhas: List[dict], args, duracao: float):
+    destino = args.url or "main:app (em processo)"
+    print(f"\n📊 {args.usuarios} usuários virtuais por {duracao:.1f}s contra {destino}, mix {args.mix}")
+    print(f"  {'rota':<44} {'req':>6} {'erros':>5} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for linha in linhas:
+        print(f"  {linha['rota']:<44} {linha['requisicoes']:>6} {linha['erros']:>5} {linha['req_s']:>7.1f} "
+              f"{linha['p50_ms']:>8.1f} {linha['p95_ms']:>8.1f} {linha['p99_ms']:>8.1f}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--banco", help="banco já gerado (arquivo SQLite ou URL do PostgreSQL)")
+    parser.add_argument("--alunos", type=int, default=2000, help="escala do banco temporário (sem --banco)")
+    parser.add_argument("--comentarios", type=int, default=20000, help="escala do banco temporário (sem --banco)")
+    parser.add_argument("--url", help="servidor já rodando (padrão: main:app em processo)")
+    parser.add_argument("--usuarios", type=int, default=10, help="usuários virtuais simultâneos")
+    parser.add_argument("--duracao", type=float, default=20.0, help="segundos de carga")
+    parser.add_argument("--mix", default=MIX_PADRAO, help=f"pesos dos cenários (padrão: {MIX_PADRAO})")
+    parser.add_argument("--handshake-ms", type=float, default=0.0,
+                        help="handshake simulado pelo provedor de identidade local")
+    parser.add_argument("--porta-provedor", type=int, default=0, help="porta do provedor local (modo --url)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--json", help="grava o relatório neste arquivo")
+    args = parser.parse_args()
+    if args.json:
+        args.json = os.path.abspath(args.json)
+
+    provedor = ProvedorLocal(args.handshake_ms / 1000, porta=args.porta_provedor)
+    provedor.iniciar()
+    os.environ["MICROSOFT_AUTHORITY"] = provedor.url
+    os.environ["MICROSOFT_GRAPH_URL"] = f"{provedor.url}/v1.0"
+    os.environ.setdefault("MICROSOFT_TENANT_ID", "tenant-carga")
+    os.environ.setdefault("DB_AUDITAR_INDICES", "0")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            if args.banco:
+                preparar_banco(args.banco)
+            else:
+                preparar_banco(os.path.join(workdir, "database.db"))
+            from app.db.session import database
+            if not args.banco:
+                print(f"🏗️ Gerando banco temporário: {args.alunos} alunos, {args.comentarios} comentários")
+                gerar(database, alunos=args.alunos, comentarios=args.comentarios, semente=args.semente)
+            medicoes = asyncio.run(executar(args, database))
+    finally:
+        provedor.parar()
+
+    linhas = medicoes.relatorio(medicoes.duracao)
+    imprimir(linhas, args, medicoes.duracao)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"usuarios": args.usuarios, "duracao": medicoes.duracao, "mix": args.mix,
+                       "rotas": linhas}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
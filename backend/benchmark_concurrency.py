@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência da rota /projetos/ativos
+
+Cria um banco SQLite temporário com projetos e documentos, sobe a aplicação
+em processo (httpx + ASGI, sem rede) e compara o tempo total de N requisições
+feitas em sequência com as mesmas N requisições feitas ao mesmo tempo. Com as
+consultas rodando fora do loop de eventos o modo concorrente deve escalar em
+vez de serializar.
+
+--latencia-ms simula o round-trip de rede de um banco remoto (PostgreSQL no
+Azure) antes de cada consulta. --bloqueante executa o driver direto no loop de
+eventos, reproduzindo o comportamento antigo para comparação.
+
+Uso:
+    python benchmark_concurrency.py --projetos 50 --documentos 20 --requisicoes 32
+    python benchmark_concurrency.py --bloqueante
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def preparar_ambiente(workdir: str) -> str:
+    """Aponta a aplicação para um banco temporário antes de importá-la"""
+    db_path = os.path.join(workdir, "benchmark.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.chdir(workdir)
+    sys.path.insert(0, BACKEND_DIR)
+    return db_path
+
+
+def popular_banco(db_path: str, total_projetos: int, docs_por_projeto: int) -> int:
+    """Insere um orientador com muitos projetos ativos e documentos"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO orientadores (nome, email, codigo, titulacao, is_coordenador)
+        VALUES ('Prof. Benchmark', 'benchmark@professor.ibmec.edu.br', 'BENCH', 'Doutor', 0)
+    """)
+    orientador_id = cursor.lastrowid
+    inicio = datetime(2024, 1, 1)
+    for i in range(total_projetos):
+        cursor.execute(
+            "INSERT INTO alunos (nome, matricula, email, status) VALUES (?, ?, ?, 'Ativo')",
+            (f"Aluno {i}", f"MAT{i:06d}", f"aluno{i}@alunos.ibmec.edu.br")
+        )
+        aluno_id = cursor.lastrowid
+        cursor.execute("""
+            INSERT INTO projetos (codigo, titulo, descricao, area_pesquisa, orientador_id, aluno_id,
+                                  status, data_submissao, data_aprovacao, documentos_count, ultima_postagem)
+            VALUES (?, ?, ?, 'Benchmark', ?, ?, 'ativo', ?, ?, ?, ?)
+        """, (
+            f"BENCH{i:06d}", f"Projeto {i}", "Projeto gerado para benchmark",
+            orientador_id, aluno_id,
+            (inicio + timedelta(days=i)).isoformat(), (inicio + timedelta(days=i, hours=1)).isoformat(),
+            docs_por_projeto,
+            (inicio + timedelta(days=i, minutes=docs_por_projeto - 1)).isoformat() if docs_por_projeto else None
+        ))
+        projeto_id = cursor.lastrowid
+        cursor.executemany("""
+            INSERT INTO documentos (projeto_id, nome_arquivo, caminho_arquivo, tipo_arquivo,
+                                    tamanho_arquivo, data_upload)
+            VALUES (?, ?, ?, 'application/pdf', 1024, ?)
+        """, [
+            (projeto_id, f"doc{j}.pdf", f"uploads/projeto_{projeto_id}/doc{j}.pdf",
+             (inicio + timedelta(days=i, minutes=j)).isoformat())
+            for j in range(docs_por_projeto)
+        ])
+    conn.commit()
+    conn.close()
+    return orientador_id
+
+
+async def medir(client, url: str, headers: dict, total: int, concorrente: bool) -> float:
+    inicio = time.perf_counter()
+    if concorrente:
+        respostas = await asyncio.gather(*(client.get(url, headers=headers) for _ in range(total)))
+    else:
+        respostas = [await client.get(url, headers=headers) for _ in range(total)]
+    duracao = time.perf_counter() - inicio
+    falhas = [r.status_code for r in respostas if r.status_code != 200]
+    if falhas:
+        raise RuntimeError(f"Requisições com erro: {falhas[:5]}")
+    return duracao
+
+
+def simular_banco(latencia: float, bloqueante: bool):
+    """Aplica a latência simulada e, se pedido, o modo bloqueante antigo"""
+    from app.db import session
+
+    execute_original = session.Cursor.execute
+
+    def execute_com_latencia(self, sql, params=()):
+        time.sleep(latencia)
+        return execute_original(self, sql, params)
+
+    if latencia > 0:
+        session.Cursor.execute = execute_com_latencia
+
+    if bloqueante:
+        async def run_no_loop(self, func, *args):
+            return func(*args)
+        session.AsyncConnection.run = run_no_loop
+
+
+async def executar(args):
+    import httpx
+    import jwt
+    from app.core.config import get_settings
+    import main
+
+    simular_banco(args.latencia_ms / 1000, args.bloqueante)
+
+    db_path = os.environ["DATABASE_URL"].replace("sqlite:///", "", 1)
+    orientador_id = popular_banco(db_path, args.projetos, args.documentos)
+    settings = get_settings()
+    token = jwt.encode(
+        {"user_id": orientador_id, "user_type": "professor", "email": "benchmark@professor.ibmec.edu.br"},
+        settings.SECRET_KEY or "fallback-secret", algorithm="HS256"
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"{settings.API_V1_STR}/projetos/ativos"
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # Aquecimento: abre as conexões do pool e prepara o cache de páginas
+        await medir(client, url, headers, 2, concorrente=False)
+        sequencial = await medir(client, url, headers, args.requisicoes, concorrente=False)
+        concorrente = await medir(client, url, headers, args.requisicoes, concorrente=True)
+
+    modo = "bloqueante (driver no loop)" if args.bloqueante else "threadpool"
+    print(f"📊 {args.requisicoes} requisições GET {url} "
+          f"({args.projetos} projetos x {args.documentos} documentos, "
+          f"latência {args.latencia_ms}ms, modo {modo})")
+    print(f"  Sequencial:  {sequencial:.3f}s  ({args.requisicoes / sequencial:.1f} req/s)")
+    print(f"  Concorrente: {concorrente:.3f}s  ({args.requisicoes / concorrente:.1f} req/s)")
+    print(f"  Ganho: {sequencial / concorrente:.2f}x")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projetos", type=int, default=50)
+    parser.add_argument("--documentos", type=int, default=20, help="documentos por projeto")
+    parser.add_argument("--requisicoes", type=int, default=32)
+    parser.add_argument("--latencia-ms", type=float, default=5.0,
+                        help="latência de rede simulada por consulta")
+    parser.add_argument("--bloqueante", action="store_true",
+                        help="executa o driver no loop de eventos (comportamento antigo)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        preparar_ambiente(workdir)
+        asyncio.run(executar(args))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark do callback de login Microsoft (/auth/callback) sem rede externa
+
+Sobe um provedor de identidade local (descoberta OIDC, endpoint de token e
+um /me no formato do Microsoft Graph) em 127.0.0.1, aponta a aplicação para
+ele com MICROSOFT_AUTHORITY / MICROSOFT_GRAPH_URL e mede quantos logins por
+segundo o callback processa, em um banco SQLite temporário.
+
+O provedor local atrasa a primeira requisição de cada conexão em
+--handshake-ms, simulando o handshake TCP + TLS com o Azure. Dois modos:
+
+  antes   um httpx.AsyncClient novo por chamada (comportamento antigo)
+  depois  o cliente compartilhado do processo (app/core/http_cliente.py)
+
+Uso (a partir de backend/):
+    python benchmark_login.py --logins 200 --concorrencia 10 --handshake-ms 40
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ProvedorLocal:
+    """Provedor de identidade local em uma thread com o seu próprio loop"""
+
+    def __init__(self, handshake: float, porta: int = 0):
+        self.handshake = handshake
+        self.conexoes = set()
+        self.socket = socket.socket()
+        self.socket.bind(("127.0.0.1", porta))
+        self.url = f"http://127.0.0.1:{self.socket.getsockname()[1]}"
+        self.servidor = None
+
+    def aplicacao(self):
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse
+        from starlette.routing import Route
+
+        async def descoberta(request):
+            tenant = request.path_params["tenant"]
+            return JSONResponse({
+                "issuer": f"{self.url}/{tenant}/v2.0",
+                "authorization_endpoint": f"{self.url}/{tenant}/oauth2/v2.0/authorize",
+                "token_endpoint": f"{self.url}/{tenant}/oauth2/v2.0/token",
+            })
+
+        async def token(request):
+            formulario = await request.form()
+            return JSONResponse({"token_type": "Bearer", "expires_in": 3600,
+                                 "access_token": f"token-{formulario['code']}"})
+
+        async def me(request):
+            codigo = request.headers["authorization"].rsplit("token-", 1)[1]
+            return JSONResponse({"displayName": f"Aluno {codigo}", "givenName": "Aluno", "surname": codigo,
+                                 "mail": f"aluno{codigo}@alunos.ibmec.edu.br"})
+
+        async def app(scope, receive, send):
+            if scope["type"] == "http" and scope["client"] not in self.conexoes:
+                self.conexoes.add(scope["client"])
+                await asyncio.sleep(self.handshake)
+            await rotas(scope, receive, send)
+
+        rotas = Starlette(routes=[
+            Route("/{tenant}/v2.0/.well-known/openid-configuration", descoberta),
+            Route("/{tenant}/oauth2/v2.0/token", token, methods=["POST"]),
+            Route("/v1.0/me", me),
+        ])
+        return app
+
+    def iniciar(self):
+        import uvicorn
+        config = uvicorn.Config(self.aplicacao(), log_level="warning", lifespan="off")
+        self.servidor = uvicorn.Server(config)
+        threading.Thread(target=self.servidor.run, kwargs={"sockets": [self.socket]}, daemon=True).start()
+        while not self.servidor.started:
+            time.sleep(0.01)
+
+    def parar(self):
+        self.servidor.should_exit = True
+
+
+def preparar_ambiente(workdir: str, provedor: ProvedorLocal):
+    """Aponta a aplicação para o banco temporário e o provedor local antes de importá-la"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.environ["MICROSOFT_AUTHORITY"] = provedor.url
+    os.environ["MICROSOFT_GRAPH_URL"] = f"{provedor.url}/v1.0"
+    os.environ.setdefault("MICROSOFT_TENANT_ID", "tenant-benchmark")
+    os.chdir(workdir)
+    sys.path.insert(0, BACKEND_DIR)
+
+
+async def medir(client, url: str, codigos: range, concorrencia: int):
+    latencias = []
+    limite = asyncio.Semaphore(concorrencia)
+
+    async def login(codigo):
+        async with limite:
+            inicio = time.perf_counter()
+            response = await client.get(url, params={"code": str(codigo), "state": "benchmark"})
+            latencias.append(time.perf_counter() - inicio)
+            if response.status_code != 307:
+                raise RuntimeError(f"Login {codigo} falhou: {response.status_code} {response.text[:200]}")
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(login(codigo) for codigo in codigos))
+    return time.perf_counter() - inicio, latencias
+
+
+async def executar(args, provedor: ProvedorLocal):
+    import httpx
+    import main
+    from app.api.routes import auth
+    from app.core import http_cliente
+    from app.core.config import get_settings
+
+    url = f"{get_settings().API_V1_STR}/auth/callback"
+    clientes_por_chamada = []
+
+    def cliente_por_chamada():
+        cliente = httpx.AsyncClient()
+        clientes_por_chamada.append(cliente)
+        return cliente
+
+    resultados = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for indice, modo in enumerate(("antes", "depois")):
+            auth.cliente_http = cliente_por_chamada if modo == "antes" else http_cliente.cliente_http
+            await http_cliente.encerrar_cliente_http()
+            provedor.conexoes.clear()
+            # Cada modo faz login com usuários novos, para os dois terem o mesmo trabalho no banco
+            codigos = range(indice * args.logins, (indice + 1) * args.logins)
+            await medir(client, url, codigos[:1], 1)  # aquecimento (descoberta OIDC)
+            resultados[modo] = await medir(client, url, codigos, args.concorrencia)
+            resultados[modo] += (len(provedor.conexoes),)
+    for cliente in clientes_por_chamada:
+        await cliente.aclose()
+    await http_cliente.encerrar_cliente_http()
+
+    print(f"\n📊 {args.logins} logins, concorrência {args.concorrencia}, "
+          f"handshake simulado {args.handshake_ms}ms, HTTP/2: {http_cliente.HTTP2_DISPONIVEL}")
+    for modo, (duracao, latencias, conexoes) in resultados.items():
+        latencias.sort()
+        p95 = latencias[int(len(latencias) * 0.95) - 1]
+        print(f"  {modo:<7} {args.logins / duracao:7.1f} logins/s  "
+              f"p50 {statistics.median(latencias) * 1000:6.1f}ms  p95 {p95 * 1000:6.1f}ms  "
+              f"conexões abertas: {conexoes}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=10)
+    parser.add_argument("--handshake-ms", type=float, default=40.0,
+                        help="atraso da primeira requisição de cada conexão (TCP + TLS)")
+    args = parser.parse_args()
+
+    provedor = ProvedorLocal(args.handshake_ms / 1000)
+    provedor.iniciar()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            preparar_ambiente(workdir, provedor)
+            asyncio.run(executar(args, provedor))
+    finally:
+        provedor.parar()
+
+
+if __name__ == "__main__":
+    main_cli()
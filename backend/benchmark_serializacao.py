@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark da serialização das listagens grandes do admin
+
+Cria um banco SQLite temporário com N projetos e mede, por linha, o custo de
+transformar o resultado de /projetos/todos-projetos em bytes JSON:
+
+  antes      dict(row) + validação do response_model + jsonable_encoder + json
+  pydantic   dict(row) + TypeAdapter(List[ProjetoAdmin]).dump_json
+  depois     tuplas do cursor + orjson (app/core/respostas.py)
+
+O tempo da consulta (só fetch) aparece separado, como referência do que
+não depende da serialização.
+
+Uso (a partir de backend/):
+    python benchmark_serializacao.py --projetos 20000 --repeticoes 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.api.routes.projetos import CONSULTA_PROJETOS_ADMIN, ProjetoAdmin
+from app.core.respostas import serializar_linhas
+from app.db.session import Database
+from test_index_audit import criar_banco
+
+SQL = f"{CONSULTA_PROJETOS_ADMIN} WHERE 1 = 1 ORDER BY p.data_submissao DESC"
+
+
+def popular(database: Database, total: int):
+    with database.connect() as conn:
+        aluno_id = conn.execute(
+            "INSERT INTO alunos (nome, matricula, email) VALUES ('Aluno', '1', 'aluno@teste') RETURNING id"
+        ).fetchone()[0]
+        orientador_id = conn.execute("SELECT MIN(id) FROM orientadores").fetchone()[0]
+        conn.cursor().executemany("""
+            INSERT INTO projetos (codigo, titulo, descricao, area_pesquisa, palavras_chave, orientador_id,
+                                  aluno_id, status, periodo, data_submissao, documentos_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (f"P{i}", f"Projeto de iniciação científica {i}", "Descrição do projeto " * 10,
+             "Computação", "dados, aprendizado", orientador_id, aluno_id,
+             ("pendente", "ativo", "finalizado")[i % 3], "2024.1",
+             f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}T10:00:00", i % 7)
+            for i in range(total)
+        ])
+        conn.commit()
+
+
+def antes(conn) -> bytes:
+    projetos = [dict(row) for row in conn.execute(SQL).fetchall()]
+    validados = [ProjetoAdmin.model_validate(p).model_dump() for p in projetos]
+    return json.dumps(jsonable_encoder(validados), ensure_ascii=False).encode("utf-8")
+
+
+ADAPTADOR = TypeAdapter(List[ProjetoAdmin])
+
+
+def pydantic(conn) -> bytes:
+    return ADAPTADOR.dump_json(ADAPTADOR.validate_python([dict(row) for row in conn.execute(SQL).fetchall()]))
+
+
+def depois(conn) -> bytes:
+    cursor = conn.execute(SQL)
+    return serializar_linhas(cursor.colunas, cursor.fetchall_tuplas())
+
+
+def so_fetch(conn) -> bytes:
+    conn.execute(SQL).fetchall_tuplas()
+    return b""
+
+
+def medir(funcao, conn, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(conn)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projetos", type=int, default=20000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database = criar_banco(workdir)
+        popular(database, args.projetos)
+        with database.connect() as conn:
+            assert json.loads(antes(conn)) == json.loads(depois(conn))
+            print(f"\n📊 {args.projetos} projetos, melhor de {args.repeticoes} execuções")
+            for nome, funcao in (("antes", antes), ("pydantic", pydantic), ("depois", depois),
+                                 ("só fetch", so_fetch)):
+                tempo = medir(funcao, conn, args.repeticoes)
+                print(f"  {nome:<10} {tempo * 1000:8.1f} ms  {tempo / args.projetos * 1e6:6.2f} µs/linha")
+
+
+if __name__ == "__main__":
+    main()
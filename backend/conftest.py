@@ -0,0 +1,129 @@
+"""
+Funções compartilhadas pelos testes
+
+Os testes criam bancos SQLite temporários com o schema de database_setup.py
+e chamam as rotas diretamente. As funções ficam aqui, e não em um módulo de
+teste, para que nenhum teste dependa de outro; são funções comuns (e não
+fixtures) para que cada test_*.py continue rodando com `python test_x.py`.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+
+import database_setup
+from app.db.migrations import aplicar_migracoes
+from app.db.session import AsyncConnection, Database
+from gerar_dados_sinteticos import gerar
+
+
+def criar_banco(diretorio: str) -> Database:
+    """Cria o schema de database_setup.py em um diretório temporário e devolve o acesso a ele"""
+    cwd = os.getcwd()
+    os.chdir(diretorio)
+    try:
+        database_setup.setup_database()
+    finally:
+        os.chdir(cwd)
+    database = Database(create_engine(f"sqlite:///{os.path.join(diretorio, 'database.db')}"))
+    with database.connect() as conn:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS projetos_edicao (
+                id {database.autoincrement_pk},
+                ano INTEGER, titulo TEXT, aluno TEXT, orientador TEXT, arquivo TEXT
+            )
+        """)
+        conn.commit()
+    return database
+
+
+def popular_projetos(database: Database, total_projetos: int, atividades_por_projeto: int) -> int:
+    """Cria um aluno com vários projetos e atividades; retorna o id do aluno"""
+    with database.connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO orientadores (nome, email, codigo) VALUES ('Prof. Teste', 'prof@professor.ibmec.edu.br', 'PROF')
+        """)
+        orientador_id = cursor.lastrowid
+        cursor.execute("""
+            INSERT INTO alunos (nome, matricula, email) VALUES ('Aluno Teste', 'MAT1', 'aluno@alunos.ibmec.edu.br')
+        """)
+        aluno_id = cursor.lastrowid
+        for i in range(total_projetos):
+            cursor.execute("""
+                INSERT INTO projetos (codigo, titulo, orientador_id, aluno_id, status, data_submissao)
+                VALUES (?, ?, ?, ?, 'ativo', ?)
+            """, (f"IC{i}", f"Projeto {i}", orientador_id, aluno_id, f"2025-01-{i + 1:02d}T00:00:00"))
+            projeto_id = cursor.lastrowid
+            for j in range(atividades_por_projeto):
+                cursor.execute("""
+                    INSERT INTO atividades (titulo, projeto_id, aluno_id, orientador_id, data_criacao)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (f"Atividade {i}.{j}", projeto_id, aluno_id, orientador_id, f"2025-02-01T00:00:{j:02d}"))
+        conn.commit()
+    return aluno_id
+
+
+def popular_documentos(database: Database, total_documentos: int, comentarios_por_documento: int) -> int:
+    """Cria um projeto com documentos comentados; retorna o id do projeto"""
+    aluno_id = popular_projetos(database, 1, atividades_por_projeto=0)
+    with database.connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM projetos WHERE aluno_id = ?", (aluno_id,))
+        projeto_id = cursor.fetchone()[0]
+        for i in range(total_documentos):
+            cursor.execute("""
+                INSERT INTO documentos (projeto_id, nome_arquivo, caminho_arquivo, data_upload)
+                VALUES (?, ?, ?, ?)
+            """, (projeto_id, f"doc{i}.pdf", f"uploads/projeto_{projeto_id}/doc{i}.pdf", f"2025-03-{i + 1:02d}T00:00:00"))
+            documento_id = cursor.lastrowid
+            for j in range(comentarios_por_documento):
+                cursor.execute("""
+                    INSERT INTO comentarios (documento_id, usuario_id, usuario_tipo, comentario, data_comentario)
+                    VALUES (?, ?, 'aluno', ?, ?)
+                """, (documento_id, aluno_id, f"Comentário {i}.{j}", f"2025-04-01T00:00:{j:02d}"))
+        conn.commit()
+    return projeto_id
+
+
+async def executar_contando(database: Database, rota, **kwargs):
+    """Executa a rota e retorna (resultado, quantidade de SELECTs)"""
+    conn = AsyncConnection(database.connect())
+    consultas = []
+    conn.sync.raw.driver_connection.set_trace_callback(consultas.append)
+    try:
+        resultado = await rota(conn=conn, **kwargs)
+    finally:
+        await conn.close()
+    selects = [sql for sql in consultas if sql.lstrip().upper().startswith("SELECT")]
+    return resultado, len(selects)
+
+
+def criar_destino_vazio(diretorio: str) -> Database:
+    """Schema migrado e tabelas vazias, como um PostgreSQL novo (sem os dados de exemplo do database_setup)"""
+    os.makedirs(diretorio)
+    destino = criar_banco(diretorio)
+    aplicar_migracoes(destino)
+    with destino.connect() as conn:
+        for (tabela,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+            if not tabela.startswith(("sqlite_", "busca_")):
+                conn.execute(f"DELETE FROM {tabela}")
+        conn.commit()
+    return destino
+
+
+def criar_bancos(diretorio: str):
+    """Origem com dados sintéticos e destino vazio, os dois com o schema migrado"""
+    origem_dir = os.path.join(diretorio, "origem")
+    os.makedirs(origem_dir)
+    origem = criar_banco(origem_dir)
+    aplicar_migracoes(origem)
+    gerar(origem, alunos=120, comentarios=700, lote=50, progresso=lambda *_: None)
+    with origem.connect() as conn:
+        conn.execute("UPDATE orientadores SET is_coordenador = 1 WHERE id % 3 = 0")
+        conn.execute("UPDATE alunos SET telefone = NULL WHERE id % 2 = 0")
+        conn.execute("UPDATE alunos SET biografia = 'aspas \"duplas\", vírgula e\nquebra' WHERE id = 5")
+        conn.commit()
+    destino = criar_destino_vazio(os.path.join(diretorio, "destino"))
+    return origem, destino, os.path.join(origem_dir, "database.db")
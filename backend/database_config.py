@@ -6,7 +6,7 @@ import os
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
 from typing import Generator
 import logging
 from dotenv import load_dotenv
@@ -21,11 +21,16 @@ logger = logging.getLogger(__name__)
 # Base para modelos SQLAlchemy
 Base = declarative_base()
 
+# Parâmetros do pool de conexões
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
 class DatabaseConfig:
     """Configuração centralizada do banco de dados"""
     
-    def __init__(self):
-        self.database_url = self._get_database_url()
+    def __init__(self, database_url: str = None):
+        self.database_url = database_url or self._get_database_url()
         self.engine = self._create_engine()
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
     
@@ -59,23 +64,36 @@ class DatabaseConfig:
         """Cria o engine do SQLAlchemy com configurações apropriadas"""
         
         if self.database_url.startswith("sqlite"):
-            # Configuração para SQLite
+            if ":memory:" in self.database_url or self.database_url == "sqlite://":
+                # Banco em memória precisa de uma única conexão compartilhada
+                return create_engine(
+                    self.database_url,
+                    connect_args={"check_same_thread": False},
+                    poolclass=StaticPool,
+                    echo=False  # Mudar para True para debug SQL
+                )
+            # Configuração para SQLite em arquivo: pool real, como no PostgreSQL
             return create_engine(
                 self.database_url,
-                connect_args={"check_same_thread": False},
-                poolclass=StaticPool,
+                connect_args={"check_same_thread": False, "timeout": 30},
+                poolclass=QueuePool,
+                pool_size=POOL_SIZE,
+                max_overflow=MAX_OVERFLOW,
+                pool_timeout=POOL_TIMEOUT,
                 echo=False  # Mudar para True para debug SQL
             )
         else:
             # Configuração para PostgreSQL
             return create_engine(
-                self.database_url,                pool_size=10,
-                max_overflow=20,
+                self.database_url,
+                pool_size=POOL_SIZE,
+                max_overflow=MAX_OVERFLOW,
+                pool_timeout=POOL_TIMEOUT,
                 pool_pre_ping=True,
                 echo=False  # Mudar para True para debug SQL
             )
     
-    def create_tables(self):
+    def create_tables(self, dados_exemplo: bool = True):
         """Cria todas as tabelas no banco de dados"""
         try:
             # Importar todos os modelos para garantir que estejam registrados
@@ -85,7 +103,8 @@ class DatabaseConfig:
             logger.info("✅ Tabelas criadas com sucesso!")
             
             # Inserir dados de exemplo se necessário
-            self._insert_sample_data()
+            if dados_exemplo:
+                self._insert_sample_data()
             
         except Exception as e:
             logger.error(f"Erro ao criar tabelas: {e}")
@@ -34,6 +34,8 @@ def setup_database():
             periodo INTEGER,
             data_submissao TEXT,
             data_aprovacao TEXT,
+            documentos_count INTEGER NOT NULL DEFAULT 0,
+            ultima_postagem TEXT,
             FOREIGN KEY (orientador_id) REFERENCES orientadores (id),
             FOREIGN KEY (aluno_id) REFERENCES alunos (id)
         )
@@ -95,6 +97,7 @@ def setup_database():
             tamanho_arquivo INTEGER,
             data_upload TEXT,
             comentario_aluno TEXT,
+            sha256 TEXT,
             FOREIGN KEY (projeto_id) REFERENCES projetos (id)
         )
         """)
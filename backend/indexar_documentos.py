@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Extrai e indexa o texto dos documentos já enviados (backfill)
+
+Processa os documentos sem texto indexado, com conteúdo alterado, extraídos
+por uma versão anterior do extrator ou que esperavam o pypdf (ver
+app/core/indexacao.py). A extração roda em paralelo em um processo por
+núcleo; os resultados são gravados em lotes, então o comando pode ser
+interrompido e executado de novo, continuando de onde parou.
+
+Uso (a partir de backend/):
+    python indexar_documentos.py
+    python indexar_documentos.py --workers 4 --lote 100
+    python indexar_documentos.py --todos   # reprocessa todos os documentos
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core.extracao import ResultadoExtracao, extrair_documento
+from app.core.indexacao import documentos_pendentes, preparar_extracao, salvar_resultados
+from app.db.migrations import aplicar_migracoes
+from app.db.session import Database, database
+
+
+def _extrair(argumentos: tuple) -> ResultadoExtracao:
+    return extrair_documento(*argumentos)
+
+
+def indexar(db: Database, workers: int = None, lote: int = 50, todos: bool = False) -> Counter:
+    """Indexa os documentos pendentes e retorna a contagem por status"""
+    contagem = Counter()
+    with db.connect() as conn:
+        diretos, tarefas = [], []
+        # Documentos com o mesmo conteúdo são extraídos uma vez só
+        copias = defaultdict(list)
+        for doc in documentos_pendentes(conn, todos):
+            preparado = preparar_extracao(conn, doc["id"], doc["nome_arquivo"], doc["caminho_arquivo"],
+                                          doc["sha256"], reaproveitar=not todos)
+            if isinstance(preparado, ResultadoExtracao):
+                diretos.append(preparado)
+            elif preparado[3] and preparado[3] in copias:
+                copias[preparado[3]].append(preparado)
+            else:
+                if preparado[3]:
+                    copias[preparado[3]] = []
+                tarefas.append(preparado)
+        salvar_resultados(conn, diretos)
+        conn.commit()
+        contagem.update(r.status for r in diretos)
+        if not tarefas:
+            return contagem
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pendentes = []
+            for resultado in executor.map(_extrair, tarefas, chunksize=max(1, min(lote, len(tarefas) // 16))):
+                pendentes.append(resultado)
+                pendentes += [resultado._replace(documento_id=copia[0], nome_arquivo=copia[1])
+                              for copia in copias.get(resultado.sha256, [])]
+                if len(pendentes) >= lote:
+                    salvar_resultados(conn, pendentes)
+                    conn.commit()
+                    contagem.update(r.status for r in pendentes)
+                    pendentes = []
+            salvar_resultados(conn, pendentes)
+            conn.commit()
+            contagem.update(r.status for r in pendentes)
+    return contagem
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processos de extração (padrão: núcleos)")
+    parser.add_argument("--lote", type=int, default=50, help="documentos gravados por transação")
+    parser.add_argument("--todos", action="store_true", help="reprocessa também os documentos já indexados")
+    args = parser.parse_args()
+
+    aplicar_migracoes(database)
+
+    print(f"🔎 Indexando o texto dos documentos com {args.workers} processo(s)")
+    inicio = time.perf_counter()
+    contagem = indexar(database, workers=args.workers, lote=args.lote, todos=args.todos)
+    print(f"  Documentos processados: {sum(contagem.values())} em {time.perf_counter() - inicio:.1f}s")
+    for status, total in sorted(contagem.items()):
+        print(f"  {status}: {total}")
+    if contagem.get("sem_extrator"):
+        print("  ⚠️ Instale o pypdf para extrair o texto dos PDFs e rode o comando de novo")
+    print("✅ Indexação concluída")
+
+
+if __name__ == "__main__":
+    main_cli()
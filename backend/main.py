@@ -2,30 +2,59 @@
 Ponto de entrada principal da aplicação FastAPI
 """
 from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from app.api.routes.arquivos import router as arquivos_router
 from app.api.routes.auth import router as auth_router
+from app.api.routes.busca import router as busca_router
 from app.api.routes.projetos import router as projetos_router
 from app.api.routes.perfis import router as perfis_router
 from app.api.routes.documentos import router as documentos_router
 from app.core.config import get_settings
+from app.core.http_cliente import encerrar_cliente_http, iniciar_cliente_http
+from app.core.indexacao import encerrar_pool_extracao
+from app.core.logs import CABECALHO_REQUEST_ID, RequisicaoIdMiddleware, configurar_logs
+from app.core.metricas import MetricasMiddleware, router as metricas_router
+from app.core.uploads import LimiteUploadMiddleware
+import logging
 import os
 from database_config import setup_database
+from app.db.indices import auditar_consultas
+from app.db.migrations import aplicar_migracoes
+from app.db.session import database
 
 settings = get_settings()
+configurar_logs()
+logger = logging.getLogger(__name__)
 
 # Configurar banco de dados
 try:
     setup_database()
 except Exception as e:
-    print(f"⚠️ Aviso: Erro ao configurar banco de dados: {e}")
+    logger.warning("⚠️ Aviso: Erro ao configurar banco de dados: %s", e)
     # Fallback para database_setup.py se houver erro
     try:
         from database_setup import setup_database as setup_sqlite
         setup_sqlite()
     except Exception as e2:
-        print(f"❌ Erro ao configurar SQLite: {e2}")
+        logger.error("❌ Erro ao configurar SQLite: %s", e2)
+
+# Aplicar migrações incrementais do schema
+try:
+    aplicar_migracoes()
+except Exception as e:
+    logger.warning("⚠️ Aviso: Erro ao aplicar migrações: %s", e)
+
+# Avisar sobre consultas das rotas que fazem varredura completa de tabela
+if os.getenv("DB_AUDITAR_INDICES", "1") != "0":
+    try:
+        auditar_consultas()
+    except Exception as e:
+        logger.warning("⚠️ Aviso: Erro ao auditar índices: %s", e)
+
+# Devolver as conexões abertas pelo startup: com preload_app este é o master do
+# gunicorn, e os workers (recriados a cada max_requests) não devem herdá-las
+database.engine.dispose()
 
 def determine_user_role(email: str) -> str:
     """
@@ -48,8 +77,12 @@ def create_application() -> FastAPI:
         title=settings.APP_NAME,
         debug=settings.DEBUG,
         description="API para autenticação com contas Microsoft do IBMEC com diferentes perfis",
-        version="1.0.0"
-    )    # Configurar CORS para React
+        version="1.0.0",
+        default_response_class=ORJSONResponse
+    )
+    # Recusar uploads maiores que UPLOAD_MAX_BYTES antes de ler o corpo
+    application.add_middleware(LimiteUploadMiddleware)
+    # Configurar CORS para React
     application.add_middleware(
         CORSMiddleware,
         allow_origins=[
@@ -64,26 +97,43 @@ def create_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Total-Count", "X-Next-Cursor", "X-Total-Count-Estimate", CABECALHO_REQUEST_ID],
     )
+    # Latência, tamanho, status e consultas ao banco por rota (adicionado por último: envolve os demais)
+    application.add_middleware(MetricasMiddleware)
+    # Id da requisição nos logs e no cabeçalho X-Request-ID (o mais externo: vale para os demais)
+    application.add_middleware(RequisicaoIdMiddleware)
 
     # Criar diretório de uploads se não existir
     os.makedirs("uploads", exist_ok=True)
     
-    # Servir arquivos estáticos (uploads)
-    application.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+    # Servir uploads pelo caminho lógico (store deduplicado ou arquivo antigo)
+    application.include_router(arquivos_router)
 
     # Incluir rotas da API
     application.include_router(auth_router, prefix=settings.API_V1_STR)
     application.include_router(projetos_router, prefix=settings.API_V1_STR)
     application.include_router(perfis_router, prefix=settings.API_V1_STR)
     application.include_router(documentos_router, prefix=settings.API_V1_STR)
+    application.include_router(busca_router, prefix=settings.API_V1_STR)
+
+    @application.on_event("startup")
+    async def iniciar_http():
+        await iniciar_cliente_http()
+
+    @application.on_event("shutdown")
+    async def encerrar_extracao():
+        encerrar_pool_extracao()
+        await encerrar_cliente_http()
 
     @application.get("/")
     async def root():
         """
         Rota raiz - redireciona para o frontend (Home)
         """
-        return RedirectResponse(url=settings.FRONTEND_URL)    @application.get("/health")
+        return RedirectResponse(url=settings.FRONTEND_URL)
+
+    @application.get("/health")
     async def health_check():
         """
         Health check da API
@@ -94,6 +144,16 @@ def create_application() -> FastAPI:
             "version": "1.0.0"
         }
 
+    @application.get("/health/db")
+    async def database_health():
+        """
+        Estado do pool de conexões do banco (checkouts, esperas, overflow)
+        """
+        return database.pool_status()
+
+    # /metrics no formato de texto do Prometheus (METRICAS_TOKEN protege, se definido)
+    application.include_router(metricas_router)
+
     return application
 
 app = create_application()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Migra a árvore uploads/ para o store deduplicado (uploads/blobs)
+
+Para cada caminho referenciado por documentos.caminho_arquivo ou
+projetos_edicao.arquivo que ainda não tem sha256, calcula o hash do arquivo,
+guarda o conteúdo em uploads/blobs (uma cópia por hash), grava o sha256 nas
+linhas e recalcula as referências. Só depois do commit os arquivos antigos
+são apagados; os caminhos lógicos continuam funcionando pela camada de
+resolução (app/core/blob_store.py).
+
+Arquivos em uploads/ que nenhuma linha referencia são apenas listados.
+
+Uso (a partir de backend/):
+    python migrate_uploads_to_blobs.py --simular
+    python migrate_uploads_to_blobs.py
+    python migrate_uploads_to_blobs.py --coletar --carencia 3600
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core.blob_store import (BLOBS_DIR, CARENCIA_COLETA, UPLOADS_DIR, caminho_blob, caminho_legado,
+                                 coletar_blobs, recontar_referencias)
+from app.core.uploads import UPLOAD_CHUNK_SIZE
+from app.db.migrations import aplicar_migracoes
+from app.db.session import Database, database
+
+
+def hash_arquivo(caminho: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+
+def formatar_bytes(total: float) -> str:
+    for unidade in ("B", "KB", "MB"):
+        if total < 1024:
+            return f"{total:.1f} {unidade}"
+        total /= 1024
+    return f"{total:.1f} GB"
+
+
+def caminhos_pendentes(db: Database) -> set:
+    with db.connect() as conn:
+        linhas = conn.execute("""
+            SELECT caminho_arquivo FROM documentos WHERE sha256 IS NULL AND caminho_arquivo <> ''
+            UNION
+            SELECT arquivo FROM projetos_edicao WHERE sha256 IS NULL AND arquivo IS NOT NULL AND arquivo <> ''
+        """).fetchall()
+    return {row[0] for row in linhas}
+
+
+def arquivos_nao_referenciados(db: Database) -> list:
+    with db.connect() as conn:
+        referenciados = {
+            os.path.normpath(row[0]) for row in conn.execute("""
+                SELECT caminho_arquivo FROM documentos
+                UNION
+                SELECT arquivo FROM projetos_edicao WHERE arquivo IS NOT NULL
+            """).fetchall() if row[0]
+        }
+    soltos = []
+    for pasta, subpastas, arquivos in os.walk(UPLOADS_DIR):
+        if os.path.normpath(pasta) == os.path.normpath(BLOBS_DIR):
+            subpastas[:] = []
+            continue
+        for nome in arquivos:
+            caminho = os.path.normpath(os.path.join(pasta, nome))
+            if caminho not in referenciados:
+                soltos.append(caminho)
+    return soltos
+
+
+def migrar(db: Database, simular: bool = False) -> dict:
+    """Guarda os arquivos antigos no store e retorna o relatório da migração"""
+    relatorio = {"arquivos": 0, "ausentes": [], "blobs_novos": 0, "duplicados": 0,
+                 "bytes_antes": 0, "bytes_depois": 0}
+    hashes = {}
+    blobs_novos = {}
+    for caminho in sorted(caminhos_pendentes(db)):
+        legado = caminho_legado(caminho)
+        if not legado:
+            relatorio["ausentes"].append(caminho)
+            continue
+        tamanho = os.path.getsize(legado)
+        sha256 = hash_arquivo(legado)
+        hashes[caminho] = (legado, sha256, tamanho)
+        relatorio["arquivos"] += 1
+        relatorio["bytes_antes"] += tamanho
+        if os.path.exists(caminho_blob(sha256)) or sha256 in blobs_novos:
+            relatorio["duplicados"] += 1
+            continue
+        blobs_novos[sha256] = (legado, tamanho)
+        relatorio["blobs_novos"] += 1
+        relatorio["bytes_depois"] += tamanho
+
+    if simular or not hashes:
+        return relatorio
+
+    # 1) Copiar o conteúdo para o store (hard link quando possível)
+    for sha256, (legado, _) in blobs_novos.items():
+        destino = caminho_blob(sha256)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporario = f"{destino}.migrando"
+        try:
+            os.link(legado, temporario)
+        except OSError:
+            shutil.copy2(legado, temporario)
+        os.replace(temporario, destino)
+
+    # 2) Gravar os hashes nas linhas e recontar as referências, em uma transação
+    agora = datetime.now().isoformat()
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT INTO blobs (sha256, tamanho, referencias, criado_em) VALUES (?, ?, 0, ?)
+            ON CONFLICT (sha256) DO NOTHING
+        """, [(sha256, tamanho, agora) for _, sha256, tamanho in hashes.values()])
+        cursor.executemany(
+            "UPDATE documentos SET sha256 = ? WHERE caminho_arquivo = ? AND sha256 IS NULL",
+            [(sha256, caminho) for caminho, (_, sha256, _) in hashes.items()]
+        )
+        cursor.executemany(
+            "UPDATE projetos_edicao SET sha256 = ? WHERE arquivo = ? AND sha256 IS NULL",
+            [(sha256, caminho) for caminho, (_, sha256, _) in hashes.items()]
+        )
+        recontar_referencias(conn)
+        conn.commit()
+
+    # 3) Só agora apagar os arquivos antigos
+    for legado, _, _ in hashes.values():
+        if os.path.exists(legado):
+            os.unlink(legado)
+    return relatorio
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--simular", action="store_true", help="apenas calcula o relatório, sem alterar nada")
+    parser.add_argument("--coletar", action="store_true", help="apaga blobs sem referência depois da migração")
+    parser.add_argument("--carencia", type=float, default=CARENCIA_COLETA,
+                        help="idade mínima (segundos) de um blob sem referência para ser apagado")
+    args = parser.parse_args()
+
+    aplicar_migracoes(database)
+
+    print("📦 Migrando uploads/ para o store deduplicado" + (" (simulação)" if args.simular else ""))
+    relatorio = migrar(database, simular=args.simular)
+    recuperado = relatorio["bytes_antes"] - relatorio["bytes_depois"]
+    print(f"  Arquivos processados: {relatorio['arquivos']}")
+    print(f"  Blobs novos:          {relatorio['blobs_novos']}")
+    print(f"  Duplicados:           {relatorio['duplicados']}")
+    print(f"  Antes:  {formatar_bytes(relatorio['bytes_antes'])}")
+    print(f"  Depois: {formatar_bytes(relatorio['bytes_depois'])}")
+    print(f"  ✅ Espaço recuperado: {formatar_bytes(recuperado)}")
+    for caminho in relatorio["ausentes"]:
+        print(f"  ⚠️ Referenciado no banco mas ausente em disco: {caminho}")
+    soltos = arquivos_nao_referenciados(database)
+    if soltos:
+        print(f"  ℹ️ {len(soltos)} arquivo(s) em uploads/ sem referência no banco foram mantidos no lugar")
+
+    if args.coletar and not args.simular:
+        removidos, liberados = coletar_blobs(database, args.carencia)
+        print(f"🧹 Blobs sem referência removidos: {removidos} ({formatar_bytes(liberados)})")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,13 +1,20 @@
 """
 Modelos SQLAlchemy para o banco de dados
 """
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database_config import Base
 
 class Projeto(Base):
     __tablename__ = "projetos"
+    __table_args__ = (
+        Index("ix_projetos_orientador_status", "orientador_id", "status"),
+        Index("ix_projetos_aluno", "aluno_id"),
+        Index("ix_projetos_status_submissao", "status", "data_submissao"),
+        Index("ix_projetos_status_aprovacao", "status", "data_aprovacao", "id"),
+        Index("ix_projetos_submissao", "data_submissao", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     codigo = Column(String(50), nullable=False, index=True)
@@ -23,6 +30,9 @@ class Projeto(Base):
     periodo = Column(Integer)
     data_submissao = Column(String(20))
     data_aprovacao = Column(String(20))
+    # Resumo dos documentos, mantido pelo upload de documentos
+    documentos_count = Column(Integer, nullable=False, default=0, server_default="0")
+    ultima_postagem = Column(Text)
     
     # Relacionamentos
     orientador = relationship("Orientador", back_populates="projetos")
@@ -77,6 +87,10 @@ class Orientador(Base):
 
 class Documento(Base):
     __tablename__ = "documentos"
+    __table_args__ = (
+        Index("ix_documentos_projeto_upload", "projeto_id", "data_upload"),
+        Index("ix_documentos_caminho", "caminho_arquivo"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     projeto_id = Column(Integer, ForeignKey("projetos.id"), nullable=False)
@@ -86,6 +100,8 @@ class Documento(Base):
     tamanho_arquivo = Column(Integer)
     data_upload = Column(String(20))
     comentario_aluno = Column(Text)
+    # Hash do conteúdo no store de uploads (uploads/blobs)
+    sha256 = Column(String(64))
     
     # Relacionamentos
     projeto = relationship("Projeto", back_populates="documentos")
@@ -93,6 +109,9 @@ class Documento(Base):
 
 class Comentario(Base):
     __tablename__ = "comentarios"
+    __table_args__ = (
+        Index("ix_comentarios_documento_data", "documento_id", "data_comentario"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     documento_id = Column(Integer, ForeignKey("documentos.id"), nullable=False)
@@ -106,6 +125,9 @@ class Comentario(Base):
 
 class Atividade(Base):
     __tablename__ = "atividades"
+    __table_args__ = (
+        Index("ix_atividades_projeto_criacao", "projeto_id", "data_criacao"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     titulo = Column(String(200), nullable=False)
@@ -0,0 +1,76 @@
+"""
+Teste da dependência de autenticação compartilhada (app/core/autenticacao.py)
+
+Confere que o token é verificado uma vez só e depois servido do cache,
+que um token expirado não é aceito a partir do cache, que o LRU respeita
+o tamanho máximo e que tokens inválidos continuam recusados com 401.
+"""
+import os
+import sys
+import time
+from datetime import timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import jwt
+from fastapi import HTTPException
+
+from app.api.routes.auth import create_access_token
+from app.core.autenticacao import ClaimsCache, claims_cache, decodificar_token, get_current_user
+
+
+def test_token_verificado_uma_vez():
+    claims_cache.limpar()
+    token = create_access_token({"email": "aluno@alunos.ibmec.edu.br", "user_type": "aluno", "user_id": 1})
+    primeiro = get_current_user(token)
+    primeiro["user_type"] = "admin"  # a cópia alterada não contamina o cache
+    for _ in range(5):
+        assert get_current_user(token)["user_type"] == "aluno"
+    estatisticas = claims_cache.estatisticas()
+    assert estatisticas["faltas"] == 1 and estatisticas["acertos"] == 5
+    assert estatisticas["tamanho"] == 1
+
+
+def test_token_expirado_nao_sai_do_cache():
+    claims_cache.limpar()
+    token = create_access_token({"email": "a@b", "user_id": 1}, expires_delta=timedelta(seconds=1))
+    decodificar_token(token)
+    chave = next(iter(claims_cache._itens))
+    assert claims_cache.get(chave, agora=time.time() + 2) is None
+    assert not claims_cache._itens
+    time.sleep(1.1)
+    try:
+        decodificar_token(token)
+        assert False, "token expirado aceito"
+    except jwt.ExpiredSignatureError:
+        pass
+
+
+def test_token_invalido():
+    claims_cache.limpar()
+    token = create_access_token({"email": "a@b", "user_id": 1})
+    for invalido in ("nao-e-um-token", token[:-2] + ("AA" if not token.endswith("AA") else "BB")):
+        try:
+            get_current_user(invalido)
+            assert False, "token inválido aceito"
+        except HTTPException as e:
+            assert e.status_code == 401
+    assert claims_cache.estatisticas()["tamanho"] == 0
+
+
+def test_lru_limitado():
+    cache = ClaimsCache(tamanho=2)
+    futuro = time.time() + 60
+    cache.set(b"a", futuro, {"id": "a"})
+    cache.set(b"b", futuro, {"id": "b"})
+    assert cache.get(b"a") == {"id": "a"}  # "a" passa a ser o mais recente
+    cache.set(b"c", futuro, {"id": "c"})
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") and cache.get(b"c")
+
+
+if __name__ == "__main__":
+    test_token_verificado_uma_vez()
+    test_token_expirado_nao_sai_do_cache()
+    test_token_invalido()
+    test_lru_limitado()
+    print("✅ Todos os testes de autenticação passaram")
@@ -0,0 +1,76 @@
+"""
+Teste do store de uploads endereçado por conteúdo
+
+Em um diretório temporário: conteúdo idêntico é gravado uma vez só, o
+caminho lógico resolve para o blob, a migração dobra a árvore antiga para o
+store e a coleta apaga apenas blobs sem referência.
+"""
+import io
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.blob_store import (BLOBS_DIR, caminho_blob, coletar_blobs, guardar_conteudo,
+                                 recontar_referencias, resolver_caminho_sync)
+from app.db.migrations import aplicar_migracoes
+from migrate_uploads_to_blobs import migrar
+from conftest import criar_banco, popular_documentos
+
+
+def arquivos_no_store() -> list:
+    return [nome for _, _, nomes in os.walk(BLOBS_DIR) for nome in nomes]
+
+
+def test_store_deduplica_e_migra_arvore_antiga():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            database = criar_banco(diretorio)
+            aplicar_migracoes(database)
+            projeto_id = popular_documentos(database, 3, comentarios_por_documento=0)
+
+            # Árvore antiga: doc0 e doc1 com o mesmo conteúdo, doc2 diferente
+            conteudos = [b"%PDF igual", b"%PDF igual", b"%PDF outro"]
+            for i, conteudo in enumerate(conteudos):
+                os.makedirs(f"uploads/projeto_{projeto_id}", exist_ok=True)
+                with open(f"uploads/projeto_{projeto_id}/doc{i}.pdf", "wb") as f:
+                    f.write(conteudo)
+
+            relatorio = migrar(database)
+            assert relatorio["arquivos"] == 3 and relatorio["duplicados"] == 1
+            assert relatorio["bytes_antes"] - relatorio["bytes_depois"] == len(conteudos[0])
+            assert len(arquivos_no_store()) == 2
+            assert not os.path.exists(f"uploads/projeto_{projeto_id}/doc0.pdf")
+
+            with database.connect() as conn:
+                for i, conteudo in enumerate(conteudos):
+                    arquivo = resolver_caminho_sync(conn, f"uploads/projeto_{projeto_id}/doc{i}.pdf").caminho
+                    with open(arquivo, "rb") as f:
+                        assert f.read() == conteudo
+                referencias = sorted(row[0] for row in conn.execute("SELECT referencias FROM blobs").fetchall())
+                assert referencias == [1, 2]
+                # blobs/ não é exposto pela camada de resolução
+                assert resolver_caminho_sync(conn, os.path.relpath(arquivo)) is None
+
+            # Um novo upload com conteúdo já guardado reaproveita o blob
+            salvo = guardar_conteudo(io.BytesIO(b"%PDF outro"))
+            assert salvo.caminho == caminho_blob(salvo.sha256) and len(arquivos_no_store()) == 2
+
+            # Sem referências, o blob é coletado
+            with database.connect() as conn:
+                conn.execute("DELETE FROM documentos WHERE nome_arquivo = 'doc2.pdf'")
+                recontar_referencias(conn)
+                conn.commit()
+            removidos, liberados = coletar_blobs(database, carencia=-1)
+            assert (removidos, liberados) == (1, len(conteudos[2]))
+            assert len(arquivos_no_store()) == 1
+            database.engine.dispose()
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_store_deduplica_e_migra_arvore_antiga()
+    print("✅ Uploads deduplicados por conteúdo, com migração e coleta")
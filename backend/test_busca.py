@@ -0,0 +1,149 @@
+"""
+Teste da busca textual (FTS5 no SQLite): acentos, radicais, atualização
+incremental pelos triggers, visibilidade dos projetos e paginação
+
+Rodando direto (python test_busca.py) também mede a latência com 100 mil projetos.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.busca import buscar, consulta_fts5, radical
+from app.db.migrations import aplicar_migracoes
+from app.db.session import AsyncConnection
+from conftest import criar_banco
+
+ADMIN = {"user_type": "admin", "user_id": 1}
+ALUNO = {"user_type": "aluno", "user_id": 77}
+
+
+def consultar(database, texto, usuario=ADMIN, **kwargs):
+    async def executar():
+        with database.connect() as conn:
+            return await buscar(AsyncConnection(conn), texto, usuario, **kwargs)
+    return asyncio.run(executar())
+
+
+def inserir_projeto(conn, titulo, descricao, status="ativo", aluno_id=1, palavras_chave=""):
+    return conn.execute("""
+        INSERT INTO projetos (codigo, titulo, descricao, palavras_chave, orientador_id, aluno_id, status, data_submissao)
+        VALUES ('P', ?, ?, ?, 1, ?, ?, '2025-01-01')
+    """, (titulo, descricao, palavras_chave, aluno_id, status)).lastrowid
+
+
+def test_radical():
+    assert radical("Computação") == "comput"
+    assert radical("aprendizagens") == "aprendiz"
+    assert radical("dados") == "dado"
+    assert consulta_fts5('redes "neurais"; 2024') == '"rede"* "neur"* "2024"*'
+
+
+def test_busca_incremental_e_visibilidade():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        with database.connect() as conn:
+            existente = inserir_projeto(conn, "Otimização de estruturas metálicas", "Análise por elementos finitos")
+            conn.commit()
+        aplicar_migracoes(database)
+        aplicar_migracoes(database)  # idempotente, não duplica o índice
+
+        # Linhas anteriores à migração entram no índice
+        total, resultados = consultar(database, "otimizacao")
+        assert total == 1 and resultados[0] == {**resultados[0], "tipo": "projeto", "id": existente}
+
+        with database.connect() as conn:
+            ativo = inserir_projeto(conn, "Aprendizado de máquina em saúde", "Redes neurais para diagnóstico",
+                                    palavras_chave="computação, dados")
+            pendente = inserir_projeto(conn, "Aprendizagem por reforço", "Agentes autônomos", status="pendente")
+            do_aluno = inserir_projeto(conn, "Aprendizagem federada", "Privacidade", status="pendente", aluno_id=77)
+            conn.execute("INSERT INTO projetos_edicao (ano, titulo, aluno, orientador) VALUES (2023, ?, ?, ?)",
+                         ("Computação quântica aplicada", "Ana", "Prof. Souza"))
+            conn.commit()
+
+        total, resultados = consultar(database, "aprendizagens")
+        assert total == 3
+        assert {r["id"] for r in resultados} == {ativo, pendente, do_aluno}
+        # O aluno vê os projetos públicos e os próprios, não os pendentes de outros
+        total, resultados = consultar(database, "aprendizagens", ALUNO)
+        assert total == 2 and {r["id"] for r in resultados} == {ativo, do_aluno}
+
+        # Acentos e radical: "computacao" encontra "computação" no projeto e na edição
+        total, resultados = consultar(database, "computacao")
+        assert {r["tipo"] for r in resultados} == {"projeto", "edicao"}
+        total, resultados = consultar(database, "computacao", tipos=["edicao"])
+        assert total == 1 and resultados[0]["titulo"] == "Computação quântica aplicada"
+
+        # Título pesa mais que o corpo
+        with database.connect() as conn:
+            inserir_projeto(conn, "Diagnóstico por imagem", "Visão computacional")
+            conn.commit()
+        _, resultados = consultar(database, "diagnostico")
+        assert resultados[0]["titulo"] == "Diagnóstico por imagem"
+        assert resultados[0]["relevancia"] >= resultados[1]["relevancia"]
+
+        # UPDATE e DELETE atualizam o índice
+        with database.connect() as conn:
+            conn.execute("UPDATE projetos SET titulo = 'Robótica móvel' WHERE id = ?", (ativo,))
+            conn.execute("DELETE FROM projetos WHERE id = ?", (pendente,))
+            conn.execute("UPDATE orientadores SET biografia = 'Pesquisa em robótica educacional' "
+                         "WHERE id = (SELECT MIN(id) FROM orientadores)")
+            conn.commit()
+        total, resultados = consultar(database, "robotica")
+        assert {r["tipo"] for r in resultados} == {"projeto", "orientador"}
+        assert consultar(database, "aprendizagens")[0] == 1
+        database.engine.dispose()
+
+
+def test_paginacao():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        aplicar_migracoes(database)
+        with database.connect() as conn:
+            for i in range(25):
+                inserir_projeto(conn, f"Sensoriamento remoto {i}", "Imagens de satélite")
+            conn.commit()
+        total, primeira = consultar(database, "sensoriamento", limite=10)
+        _, terceira = consultar(database, "sensoriamento", limite=10, offset=20)
+        assert total == 25 and len(primeira) == 10 and len(terceira) == 5
+        assert not {r["id"] for r in primeira} & {r["id"] for r in terceira}
+        database.engine.dispose()
+
+
+def medir(n: int = 100_000):
+    # Vocabulário com milhares de termos para a seletividade ficar parecida com a de textos reais
+    sorteio = random.Random(0)
+    palavras = ["sistemas", "energia", "solar", "aprendizado", "redes", "dados", "saúde", "educação",
+                "robótica", "materiais", "finanças", "mercado", "clima", "água", "cidades", "transporte"]
+    vocabulario = palavras + [f"termo{k}" for k in range(3000)]
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        aplicar_migracoes(database)
+        inicio = time.perf_counter()
+        with database.connect() as conn:
+            conn.cursor().executemany("""
+                INSERT INTO projetos (codigo, titulo, descricao, orientador_id, aluno_id, status, data_submissao)
+                VALUES ('P', ?, ?, 1, 1, 'ativo', '2025-01-01')
+            """, [
+                (" ".join(sorteio.choices(vocabulario, k=5)), " ".join(sorteio.choices(vocabulario, k=40)))
+                for _ in range(n)
+            ])
+            conn.commit()
+        print(f"  {n} projetos inseridos e indexados em {time.perf_counter() - inicio:.1f}s")
+        for texto in ("energia solar", "aprendizagem", "robotica cidades", "inexistente"):
+            consultar(database, texto, ALUNO)
+            inicio = time.perf_counter()
+            total, _ = consultar(database, texto, ALUNO)
+            print(f"  '{texto}': {total} resultados, primeira página em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    test_radical()
+    test_busca_incremental_e_visibilidade()
+    test_paginacao()
+    print("✅ Busca textual OK")
+    medir()
@@ -0,0 +1,58 @@
+"""
+Teste do gerador de dados sintéticos e do cálculo de percentis do teste de carga
+
+Confere as contagens geradas por tabela, a consistência das chaves (todo
+comentário aponta para um documento de projeto ativo) e o resumo de
+documentos dos projetos.
+"""
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.migrations import aplicar_migracoes
+from benchmark_carga import percentil
+from gerar_dados_sinteticos import gerar
+from conftest import criar_banco
+
+
+def test_gerar_dados():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        aplicar_migracoes(database)
+        totais = gerar(database, alunos=200, atividades_por_projeto=2, documentos_por_projeto=3,
+                       comentarios=500, lote=64, progresso=lambda *_: None)
+        assert totais["alunos"] == totais["projetos"] == 200
+        assert totais["orientadores"] == 10
+        ativos = totais["atividades"] // 2
+        assert totais["documentos"] == ativos * 3 and totais["comentarios"] == 500
+        with database.connect() as conn:
+            orfaos = conn.execute("""
+                SELECT COUNT(*) FROM comentarios c
+                LEFT JOIN documentos d ON d.id = c.documento_id
+                LEFT JOIN projetos p ON p.id = d.projeto_id
+                WHERE p.id IS NULL OR p.status <> 'ativo'
+            """).fetchone()[0]
+            assert orfaos == 0
+            divergentes = conn.execute("""
+                SELECT COUNT(*) FROM projetos p
+                WHERE p.documentos_count <> (SELECT COUNT(*) FROM documentos d WHERE d.projeto_id = p.id)
+            """).fetchone()[0]
+            assert divergentes == 0
+            emails = conn.execute("SELECT COUNT(DISTINCT email) FROM alunos WHERE email LIKE 'carga%'").fetchone()[0]
+            assert emails == 200
+
+
+def test_percentil():
+    valores = [i / 100 for i in range(1, 101)]
+    assert percentil(valores, 50) == 0.5
+    assert percentil(valores, 95) == 0.95
+    assert percentil(valores, 99) == 0.99
+    assert percentil([0.2], 99) == 0.2
+    assert percentil([], 50) == 0.0
+
+
+if __name__ == "__main__":
+    test_gerar_dados()
+    test_percentil()
+    print("✅ Todos os testes do gerador de dados passaram")
@@ -0,0 +1,86 @@
+"""
+Teste dos links de download assinados e do offload para o proxy (X-Accel-Redirect/X-Sendfile)
+"""
+import asyncio
+import os
+import sys
+from urllib.parse import parse_qs, urlsplit
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.routes import arquivos
+from app.core import downloads
+from app.core.blob_store import ArquivoResolvido, caminho_blob
+from app.db.session import get_db
+
+CAMINHO = "uploads/projeto_1000/relatório final.pdf"
+
+
+def test_assinatura_valida_expirada_e_adulterada():
+    url = downloads.assinar_url(CAMINHO, ttl=300, agora=1_000_000)
+    partes = urlsplit(url)
+    assert partes.path == "/uploads/projeto_1000/relat%C3%B3rio%20final.pdf"
+    query = parse_qs(partes.query)
+    exp, sig = int(query["exp"][0]), query["sig"][0]
+    assert exp == 1_000_300
+
+    assert downloads.assinatura_valida(CAMINHO, exp, sig, agora=1_000_100)
+    assert not downloads.assinatura_valida(CAMINHO, exp, sig, agora=1_000_301)
+    assert not downloads.assinatura_valida(CAMINHO, exp + 3600, sig, agora=1_000_100)
+    assert not downloads.assinatura_valida("uploads/projeto_1001/relatório final.pdf", exp, sig, agora=1_000_100)
+    assert not downloads.assinatura_valida(CAMINHO, None, None)
+
+
+def test_respostas_de_offload():
+    sha256 = "ab" * 32
+    arquivo = ArquivoResolvido(caminho_blob(sha256), sha256)
+    original = downloads.DOWNLOAD_OFFLOAD
+    try:
+        downloads.DOWNLOAD_OFFLOAD = "x-accel-redirect"
+        resposta = downloads.responder_arquivo(arquivo, media_type="application/pdf", filename="edital.pdf")
+        assert resposta.body == b""
+        assert resposta.headers["x-accel-redirect"] == f"{downloads.DOWNLOAD_ACCEL_PREFIX}blobs/ab/{sha256}"
+        assert resposta.headers["content-type"] == "application/pdf"
+        assert resposta.headers["etag"] == f'"{sha256}"'
+        assert resposta.headers["content-disposition"] == 'attachment; filename="edital.pdf"'
+
+        downloads.DOWNLOAD_OFFLOAD = "x-sendfile"
+        resposta = downloads.responder_arquivo(arquivo)
+        assert resposta.headers["x-sendfile"] == os.path.abspath(caminho_blob(sha256))
+        assert "x-accel-redirect" not in resposta.headers
+
+        downloads.DOWNLOAD_OFFLOAD = ""
+        assert isinstance(downloads.responder_arquivo(arquivo), downloads.DownloadResponse)
+    finally:
+        downloads.DOWNLOAD_OFFLOAD = original
+
+
+def test_rota_uploads_exige_assinatura():
+    app = FastAPI()
+    app.include_router(arquivos.router)
+    # A recusa acontece antes de qualquer consulta ao banco
+    app.dependency_overrides[get_db] = lambda: None
+
+    async def pedir(url):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as client:
+            return await client.get(url)
+
+    original = downloads.DOWNLOADS_ASSINADOS
+    try:
+        downloads.DOWNLOADS_ASSINADOS = True
+        assert asyncio.run(pedir("/" + CAMINHO)).status_code == 403
+        url = downloads.assinar_url(CAMINHO, ttl=-1)
+        assert asyncio.run(pedir(url)).status_code == 403
+        url = downloads.assinar_url(CAMINHO).replace("sig=", "sig=x")
+        assert asyncio.run(pedir(url)).status_code == 403
+    finally:
+        downloads.DOWNLOADS_ASSINADOS = original
+
+
+if __name__ == "__main__":
+    test_assinatura_valida_expirada_e_adulterada()
+    test_respostas_de_offload()
+    test_rota_uploads_exige_assinatura()
+    print("✅ Links assinados e offload OK")
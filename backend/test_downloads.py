@@ -0,0 +1,103 @@
+"""
+Teste das respostas de download (ETag, 304, Range, If-Range, zero-copy)
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from app.core.downloads import DownloadResponse, interpretar_range
+
+CONTEUDO = bytes(range(256)) * 400
+
+
+def criar_app(caminho: str, sha256: str = None) -> Starlette:
+    async def baixar(request):
+        return DownloadResponse(caminho, sha256=sha256, media_type="application/pdf")
+    return Starlette(routes=[Route("/arquivo", baixar, methods=["GET", "HEAD"])])
+
+
+async def pedir(app, **headers):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as client:
+        return await client.get("/arquivo", headers={k.replace("_", "-"): v for k, v in headers.items()})
+
+
+def test_interpretar_range():
+    assert interpretar_range("bytes=0-99", 1000) == (0, 99)
+    assert interpretar_range("bytes=900-", 1000) == (900, 999)
+    assert interpretar_range("bytes=-100", 1000) == (900, 999)
+    assert interpretar_range("bytes=990-2000", 1000) == (990, 999)
+    assert interpretar_range("bytes=0-1,5-9", 1000) is None
+    assert interpretar_range("linhas=0-1", 1000) is None
+    try:
+        interpretar_range("bytes=1000-", 1000)
+        assert False
+    except ValueError:
+        pass
+
+
+def test_download_condicional_e_parcial():
+    sha256 = hashlib.sha256(CONTEUDO).hexdigest()
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, sha256)
+        with open(caminho, "wb") as f:
+            f.write(CONTEUDO)
+        app = criar_app(caminho, sha256)
+
+        completo = asyncio.run(pedir(app))
+        assert completo.status_code == 200 and completo.content == CONTEUDO
+        assert completo.headers["etag"] == f'"{sha256}"'
+        assert completo.headers["accept-ranges"] == "bytes"
+
+        assert asyncio.run(pedir(app, if_none_match=f'"{sha256}"')).status_code == 304
+
+        parcial = asyncio.run(pedir(app, range="bytes=1000-1999"))
+        assert parcial.status_code == 206 and parcial.content == CONTEUDO[1000:2000]
+        assert parcial.headers["content-range"] == f"bytes 1000-1999/{len(CONTEUDO)}"
+
+        final = asyncio.run(pedir(app, range="bytes=-10", if_range=f'"{sha256}"'))
+        assert final.status_code == 206 and final.content == CONTEUDO[-10:]
+
+        # If-Range com outra versão: envia o arquivo inteiro
+        mudou = asyncio.run(pedir(app, range="bytes=0-9", if_range='"outro"'))
+        assert mudou.status_code == 200 and len(mudou.content) == len(CONTEUDO)
+
+        fora = asyncio.run(pedir(app, range=f"bytes={len(CONTEUDO)}-"))
+        assert fora.status_code == 416 and fora.headers["content-range"] == f"bytes */{len(CONTEUDO)}"
+
+
+def test_download_zero_copy_quando_servidor_suporta():
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, "arquivo.pdf")
+        with open(caminho, "wb") as f:
+            f.write(CONTEUDO)
+        mensagens = []
+
+        async def send(mensagem):
+            if mensagem["type"] == "http.response.zerocopy":
+                mensagem = dict(mensagem, file=mensagem["file"].fileno() >= 0)
+            mensagens.append(mensagem)
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        scope = {"type": "http", "method": "GET", "headers": [(b"range", b"bytes=10-19")],
+                 "extensions": {"http.response.zerocopy": {}}}
+        asyncio.run(DownloadResponse(caminho)(scope, receive, send))
+
+    assert mensagens[0]["status"] == 206
+    assert mensagens[1] == {"type": "http.response.zerocopy", "file": True, "offset": 10, "count": 10,
+                            "more_body": False}
+
+
+if __name__ == "__main__":
+    test_interpretar_range()
+    test_download_condicional_e_parcial()
+    test_download_zero_copy_quando_servidor_suporta()
+    print("✅ Downloads com ETag, 304, Range e zero-copy")
@@ -0,0 +1,79 @@
+"""
+Teste do cache de /projetos/estatisticas
+
+Chama a rota diretamente com um banco SQLite temporário e verifica que a
+segunda chamada não consulta o banco, que If-None-Match devolve 304 e que
+o cadastro de um projeto invalida o cache.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from starlette.requests import Request
+
+from app.api.routes import projetos as projetos_routes
+from app.core.cache import estatisticas_cache
+from conftest import criar_banco, executar_contando, popular_projetos
+
+
+def requisicao(headers: dict = None) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/projetos/estatisticas",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+def test_estatisticas_cache_e_etag():
+    estatisticas_cache.invalidate()
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        popular_projetos(database, 3, atividades_por_projeto=0)
+        rota = projetos_routes.estatisticas_portal
+
+        primeira, consultas = asyncio.run(executar_contando(database, rota, request=requisicao()))
+        assert consultas == 1
+        assert json.loads(primeira.body)["projetos_total"] == 3
+        assert "max-age" in primeira.headers["Cache-Control"]
+        etag = primeira.headers["ETag"]
+
+        segunda, consultas = asyncio.run(executar_contando(database, rota, request=requisicao()))
+        assert consultas == 0 and segunda.body == primeira.body
+
+        nao_modificado, consultas = asyncio.run(
+            executar_contando(database, rota, request=requisicao({"If-None-Match": etag}))
+        )
+        assert consultas == 0 and nao_modificado.status_code == 304
+
+        with database.connect() as conn:
+            conn.execute("UPDATE projetos SET status = 'finalizado' WHERE id = (SELECT MIN(id) FROM projetos)")
+            conn.commit()
+        estatisticas_cache.invalidate()
+
+        terceira, consultas = asyncio.run(
+            executar_contando(database, rota, request=requisicao({"If-None-Match": etag}))
+        )
+        database.engine.dispose()
+
+    assert consultas == 1 and terceira.status_code == 200
+    assert terceira.headers["ETag"] != etag
+    assert json.loads(terceira.body)["projetos_finalizados"] == 1
+    estatisticas_cache.invalidate()
+
+
+def test_estatisticas_descarta_valor_calculado_antes_da_invalidacao():
+    estatisticas_cache.invalidate()
+    versao = estatisticas_cache.versao
+    estatisticas_cache.invalidate()
+    estatisticas_cache.set(("antigo", '"x"'), versao=versao)
+    assert estatisticas_cache.get() is None
+
+
+if __name__ == "__main__":
+    test_estatisticas_cache_e_etag()
+    test_estatisticas_descarta_valor_calculado_antes_da_invalidacao()
+    print("✅ /projetos/estatisticas servido do cache, com ETag e invalidação")
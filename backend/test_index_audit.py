@@ -0,0 +1,38 @@
+"""
+Teste dos índices gerenciados e da auditoria de planos de consulta
+
+Cria um banco SQLite temporário com o schema de database_setup.py e verifica
+que a auditoria aponta varreduras completas antes das migrações e nenhuma
+depois que os índices são criados.
+"""
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.indices import CONSULTAS_AUDITADAS, INDICES, auditar_consultas
+from app.db.migrations import aplicar_migracoes
+from conftest import criar_banco
+
+
+def test_auditoria_sem_varreduras_apos_migracoes():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        antes = auditar_consultas(database)
+        aplicar_migracoes(database)
+        aplicar_migracoes(database)  # idempotente
+        depois = auditar_consultas(database)
+        with database.connect() as conn:
+            nomes = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()}
+        database.engine.dispose()
+
+    assert "GET /projetos/todos-pendentes" in antes
+    assert "GET /documentos/projeto/{id} (comentários)" in antes
+    assert depois == {}, depois
+    assert {nome for nome, _, _ in INDICES} <= nomes
+    assert len(CONSULTAS_AUDITADAS) >= len(INDICES)
+
+
+if __name__ == "__main__":
+    test_auditoria_sem_varreduras_apos_migracoes()
+    print("✅ Índices gerenciados eliminam as varreduras completas das rotas")
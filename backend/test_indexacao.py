@@ -0,0 +1,123 @@
+"""
+Teste da extração e indexação do texto dos documentos
+
+Em um diretório temporário: DOCX e texto puro são extraídos, conteúdo
+repetido é extraído uma vez só, a segunda execução do backfill não
+reprocessa nada, a tarefa do upload indexa o documento novo e a busca
+encontra o texto só para quem participa do projeto.
+"""
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.blob_store import guardar_conteudo
+from app.core.extracao import extrair_documento
+from app.core.indexacao import indexar_documento
+from app.db.busca import buscar
+from app.db.migrations import aplicar_migracoes
+from app.db.session import AsyncConnection
+from indexar_documentos import indexar
+from conftest import criar_banco, popular_documentos
+
+ADMIN = {"user_type": "admin", "user_id": 1}
+
+
+def criar_docx(*paragrafos: str) -> bytes:
+    corpo = "".join(f"<w:p><w:r><w:t>{texto}</w:t></w:r></w:p>" for texto in paragrafos)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as docx:
+        docx.writestr("word/document.xml", (
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f"<w:body>{corpo}</w:body></w:document>"
+        ))
+    return buffer.getvalue()
+
+
+def inserir_documento(conn, projeto_id: int, nome: str, conteudo: bytes = None) -> int:
+    sha256 = guardar_conteudo(io.BytesIO(conteudo)).sha256 if conteudo is not None else None
+    return conn.execute("""
+        INSERT INTO documentos (projeto_id, nome_arquivo, caminho_arquivo, data_upload, sha256)
+        VALUES (?, ?, ?, '2025-03-01', ?)
+    """, (projeto_id, nome, f"uploads/projeto_{projeto_id}/{nome}", sha256)).lastrowid
+
+
+def consultar(database, texto, usuario=ADMIN):
+    async def executar():
+        with database.connect() as conn:
+            return await buscar(AsyncConnection(conn), texto, usuario, tipos=["documento"])
+    return asyncio.run(executar())
+
+
+def test_extrair_docx_e_texto():
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, "arquivo")
+        with open(caminho, "wb") as f:
+            f.write(criar_docx("Introdução", "Resultados   parciais"))
+        resultado = extrair_documento(1, "Relatório.DOCX", caminho)
+        assert resultado.status == "ok" and resultado.texto == "Introdução\nResultados parciais"
+        with open(caminho, "wb") as f:
+            f.write("  Anotações\x00 \r\n\n  finais ".encode())
+        assert extrair_documento(1, "notas.txt", caminho).texto == "Anotações\nfinais"
+        assert extrair_documento(1, "planilha.xlsx", caminho).status == "nao_suportado"
+        assert extrair_documento(1, "quebrado.docx", os.path.join(diretorio, "nada")).status == "erro"
+
+
+def test_backfill_incremental_e_tarefa_do_upload():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            database = criar_banco(diretorio)
+            aplicar_migracoes(database)
+            projeto_id = popular_documentos(database, 0, comentarios_por_documento=0)
+            relatorio = criar_docx("Fotossíntese artificial com catalisadores de cobalto")
+            with database.connect() as conn:
+                aluno_id = conn.execute("SELECT aluno_id FROM projetos WHERE id = ?", (projeto_id,)).fetchone()[0]
+                original = inserir_documento(conn, projeto_id, "relatorio.docx", relatorio)
+                copia = inserir_documento(conn, projeto_id, "relatorio_v2.docx", relatorio)
+                inserir_documento(conn, projeto_id, "notas.txt", "Cronograma de experimentos".encode())
+                inserir_documento(conn, projeto_id, "dados.xlsx", b"PK")
+                inserir_documento(conn, projeto_id, "sumido.pdf")
+                conn.commit()
+
+            contagem = indexar(database, workers=2, lote=2)
+            assert contagem == {"ok": 3, "nao_suportado": 1, "ausente": 1}, contagem
+            # Nada pendente na segunda execução
+            assert sum(indexar(database, workers=2).values()) == 0
+
+            total, resultados = consultar(database, "fotossintese")
+            assert total == 2 and {r["id"] for r in resultados} == {original, copia}
+            assert "«Fotossíntese»" in resultados[0]["trecho"]
+            # Só admin e participantes do projeto veem o texto dos documentos
+            assert consultar(database, "fotossintese", {"user_type": "aluno", "user_id": aluno_id})[0] == 2
+            assert consultar(database, "fotossintese", {"user_type": "aluno", "user_id": -1})[0] == 0
+
+            # Tarefa disparada pelo upload
+            with database.connect() as conn:
+                novo = inserir_documento(conn, projeto_id, "artigo.docx", criar_docx("Espectroscopia Raman"))
+                conn.commit()
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                asyncio.run(indexar_documento(novo, db=database, executor=executor))
+            assert consultar(database, "espectroscopia")[1][0]["id"] == novo
+
+            # Conteúdo alterado volta a ficar pendente e é reindexado
+            with database.connect() as conn:
+                sha256 = guardar_conteudo(io.BytesIO("Cronograma revisado".encode())).sha256
+                conn.execute("UPDATE documentos SET sha256 = ? WHERE nome_arquivo = 'notas.txt'", (sha256,))
+                conn.commit()
+            assert indexar(database, workers=1) == {"ok": 1}
+            assert consultar(database, "revisado")[0] == 1
+            database.engine.dispose()
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_extrair_docx_e_texto()
+    test_backfill_incremental_e_tarefa_do_upload()
+    print("✅ Extração e indexação de documentos OK")
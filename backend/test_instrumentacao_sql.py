@@ -0,0 +1,159 @@
+"""
+Teste da instrumentação das consultas SQL (app/db/instrumentacao.py)
+
+Confere a normalização dos fingerprints, a agregação por requisição, o log
+de consultas lentas e o detector de N+1 nos modos avisar e erro. As rotas
+de listagem (meus-projetos, documentos do projeto) rodam em modo erro com
+muitos itens: um N+1 nelas faz este teste falhar.
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import Response
+
+from app.api.routes import documentos as documentos_routes
+from app.api.routes import projetos as projetos_routes
+from app.db import instrumentacao
+from app.db.instrumentacao import ConsultasRepetidasError, escopo_consultas, fingerprint
+from app.db.session import AsyncConnection
+from conftest import criar_banco, popular_documentos, popular_projetos
+
+
+class ColetorLog(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.mensagens = []
+
+    def emit(self, record):
+        self.mensagens.append(record.getMessage())
+
+
+def com_log(funcao):
+    """Executa `funcao` e retorna (resultado, mensagens do log da instrumentação)"""
+    coletor = ColetorLog()
+    logger = logging.getLogger(instrumentacao.__name__)
+    logger.addHandler(coletor)
+    try:
+        return funcao(), coletor.mensagens
+    finally:
+        logger.removeHandler(coletor)
+
+
+def com_configuracao(funcao, **valores):
+    anteriores = {nome: getattr(instrumentacao, nome) for nome in valores}
+    for nome, valor in valores.items():
+        setattr(instrumentacao, nome, valor)
+    try:
+        return funcao()
+    finally:
+        for nome, valor in anteriores.items():
+            setattr(instrumentacao, nome, valor)
+
+
+def test_fingerprint():
+    assert fingerprint("SELECT *\n  FROM alunos   WHERE id = 10") == "SELECT * FROM alunos WHERE id = ?"
+    assert fingerprint("SELECT * FROM alunos WHERE email = 'o''brien@x' -- comentário") == \
+        "SELECT * FROM alunos WHERE email = ?"
+    assert fingerprint("SELECT id FROM projetos WHERE id IN (?, ?, ?)") == \
+        fingerprint("SELECT id FROM projetos WHERE id IN (?,?)") == "SELECT id FROM projetos WHERE id IN (?...)"
+    assert fingerprint("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?);") == \
+        "INSERT INTO t (a, b) VALUES (?...)..."
+    assert fingerprint("SELECT * FROM ix_tabela2 WHERE x = %s LIMIT 5 /* bloco */") == \
+        "SELECT * FROM ix_tabela2 WHERE x = ? LIMIT ?"
+
+
+def test_agregacao_por_requisicao_e_consulta_lenta():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+
+        def consultar():
+            with escopo_consultas("GET /teste") as consultas:
+                with database.connect() as conn:
+                    for i in range(4):
+                        conn.execute("SELECT nome FROM alunos WHERE id = ?", (i,))
+                    conn.execute("SELECT COUNT(*) FROM projetos")
+            return consultas
+
+        consultas, mensagens = com_log(lambda: com_configuracao(consultar, SQL_LENTA_MS=0))
+        database.engine.dispose()
+
+    instrucao = "SELECT nome FROM alunos WHERE id = ?"
+    assert consultas.total == 5 and consultas.tempo > 0
+    assert consultas.por_fingerprint[instrucao][0] == 4
+    assert consultas.repetidas(limite=3) == [(instrucao, 4, consultas.por_fingerprint[instrucao][1])]
+    lentas = [m for m in mensagens if m.startswith("🐢")]
+    assert len(lentas) == 5 and "em GET /teste: SELECT COUNT(*) FROM projetos" in lentas[-1]
+
+
+def test_n_mais_1_avisar_e_erro():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+
+        def loop(vezes):
+            with escopo_consultas("GET /loop"):
+                with database.connect() as conn:
+                    for i in range(vezes):
+                        conn.execute("SELECT * FROM atividades WHERE projeto_id = ?", (i,))
+
+        _, mensagens = com_log(lambda: com_configuracao(lambda: loop(4), SQL_REPETICOES_MODO="avisar",
+                                                        SQL_REPETICOES_LIMITE=3))
+        avisos = [m for m in mensagens if "N+1" in m]
+        assert len(avisos) == 1 and avisos[0].startswith("⚠️ Possível N+1 em GET /loop: 4 execuções")
+        assert avisos[0].endswith("SELECT * FROM atividades WHERE projeto_id = ?")
+
+        # Dentro do limite: nenhum aviso
+        _, mensagens = com_log(lambda: com_configuracao(lambda: loop(3), SQL_REPETICOES_MODO="avisar",
+                                                        SQL_REPETICOES_LIMITE=3))
+        assert not [m for m in mensagens if "N+1" in m]
+
+        try:
+            com_configuracao(lambda: loop(4), SQL_REPETICOES_MODO="erro", SQL_REPETICOES_LIMITE=3)
+            assert False, "N+1 não detectado"
+        except ConsultasRepetidasError as e:
+            assert "GET /loop" in str(e) and "atividades" in str(e)
+        database.engine.dispose()
+
+
+async def executar_rota(database, rota, **kwargs):
+    conn = AsyncConnection(database.connect())
+    try:
+        with escopo_consultas(rota.__name__) as consultas:
+            resultado = await rota(conn=conn, **kwargs)
+    finally:
+        await conn.close()
+    return resultado, consultas
+
+
+def test_rotas_de_listagem_sem_n_mais_1():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        aluno_id = popular_projetos(database, 15, atividades_por_projeto=2)
+        projeto_id = popular_documentos(database, 15, comentarios_por_documento=2)
+
+        def executar():
+            projetos, consultas_projetos = asyncio.run(executar_rota(
+                database, projetos_routes.meus_projetos, current_user={"user_id": aluno_id, "user_type": "aluno"}))
+            documentos, consultas_documentos = asyncio.run(executar_rota(
+                database, documentos_routes.listar_documentos, projeto_id=projeto_id, response=Response(),
+                current_user={"user_id": 1, "user_type": "admin"}, limite=None, offset=0, limite_comentarios=None))
+            return projetos, documentos, consultas_projetos, consultas_documentos
+
+        projetos, documentos, consultas_projetos, consultas_documentos = com_configuracao(
+            executar, SQL_REPETICOES_MODO="erro", SQL_REPETICOES_LIMITE=3)
+        database.engine.dispose()
+
+    assert len(projetos) == 15 and len(documentos) == 15
+    assert consultas_projetos.total == 2
+    assert not consultas_documentos.repetidas(limite=1)
+
+
+if __name__ == "__main__":
+    test_fingerprint()
+    test_agregacao_por_requisicao_e_consulta_lenta()
+    test_n_mais_1_avisar_e_erro()
+    test_rotas_de_listagem_sem_n_mais_1()
+    print("✅ Todos os testes de instrumentação SQL passaram")
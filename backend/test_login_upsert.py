@@ -0,0 +1,143 @@
+"""
+Teste do cadastro automático no primeiro login (auth.get_or_create_user)
+
+Confere que o primeiro login cria o usuário e os seguintes o encontram,
+que primeiros logins simultâneos do mesmo email não duplicam o cadastro
+(índice único + INSERT ... ON CONFLICT) e que logins repetidos dentro do
+TTL são servidos pelo cache, sem voltar ao banco. Sem o índice único o
+cadastro usa INSERT simples, decidido uma vez pelo estado da migração.
+O is_coordenador do orientador vai ao INSERT como bool (coluna Boolean no
+PostgreSQL, que recusa inteiros; o SQLite aceitaria os dois).
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.api.routes import auth
+from app.core.cache import TTLCache, usuarios_cache
+from app.db.migrations import aplicar_migracoes
+from app.db.session import Cursor
+from conftest import criar_banco
+
+
+def usuario(email):
+    return {"email": email, "display_name": "Fulano de Tal", "mobile_phone": "", "department": "Computação"}
+
+
+def test_primeiro_login_cria_e_depois_encontra():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        aplicar_migracoes(database)
+        usuarios_cache.invalidate()
+
+        async def executar():
+            aluno = await auth.get_or_create_user(usuario("fulano@alunos.ibmec.edu.br"), db=database)
+            assert aluno["is_new_user"] and aluno["user_type"] == "aluno"
+            assert aluno["matricula"] == "FULANO"
+            professor = await auth.get_or_create_user(usuario("ciclano@professor.ibmec.edu.br"), db=database)
+            assert professor["is_new_user"] and professor["user_type"] == "professor"
+            usuarios_cache.invalidate()
+            de_novo = await auth.get_or_create_user(usuario("fulano@alunos.ibmec.edu.br"), db=database)
+            assert not de_novo["is_new_user"] and de_novo["id"] == aluno["id"]
+        asyncio.run(executar())
+
+
+def test_primeiros_logins_simultaneos():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        aplicar_migracoes(database)
+        dados = auth.dados_aluno(usuario("simultaneo@alunos.ibmec.edu.br"))
+        with ThreadPoolExecutor(8) as executor:
+            resultados = list(executor.map(lambda _: auth.buscar_ou_criar_usuario("alunos", dados, database),
+                                           range(16)))
+        assert len({user["id"] for user, _ in resultados}) == 1
+        assert sum(criado for _, criado in resultados) == 1
+        with database.connect() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM alunos WHERE email = ?", (dados["email"],)).fetchone()[0]
+        assert total == 1
+
+
+def test_cache_de_usuarios():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        aplicar_migracoes(database)
+        usuarios_cache.invalidate()
+        consultas = []
+        original = auth.buscar_ou_criar_usuario
+
+        def contar(*args):
+            consultas.append(args[0])
+            return original(*args)
+
+        async def executar():
+            auth.buscar_ou_criar_usuario = contar
+            try:
+                for _ in range(5):
+                    user = await auth.get_or_create_user(usuario("repetido@alunos.ibmec.edu.br"), db=database)
+                    assert user["email"] == "repetido@alunos.ibmec.edu.br"
+                    assert not user["is_new_user"] or len(consultas) == 1
+                usuarios_cache.invalidate()  # perfis.py invalida ao editar o perfil
+                await auth.get_or_create_user(usuario("repetido@alunos.ibmec.edu.br"), db=database)
+            finally:
+                auth.buscar_ou_criar_usuario = original
+        asyncio.run(executar())
+        assert len(consultas) == 2
+
+
+def test_sem_indice_unico_insere_sem_on_conflict():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)  # sem aplicar_migracoes: sem o índice único em email
+        assert not auth.upsert_disponivel("alunos", database)
+        user, criado = auth.buscar_ou_criar_usuario("alunos", auth.dados_aluno(usuario("novo@alunos.ibmec.edu.br")),
+                                                    database)
+        assert criado and user["email"] == "novo@alunos.ibmec.edu.br"
+        aplicar_migracoes(database)
+        assert not auth.upsert_disponivel("alunos", database)  # decidido uma vez por processo
+        database.engine.dispose()
+
+
+def test_cache_de_usuarios_limitado():
+    cache = TTLCache(ttl=60, tamanho=2)
+    cache.set("a", chave="a@x")
+    cache.set("b", chave="b@x")
+    assert cache.get("a@x") == "a"  # "a" passa a ser o mais recente
+    cache.set("c", chave="c@x")
+    assert len(cache) == 2
+    assert cache.get("b@x") is None and cache.get("a@x") == "a" and cache.get("c@x") == "c"
+    assert usuarios_cache.tamanho
+
+
+def test_is_coordenador_inserido_como_bool():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        aplicar_migracoes(database)
+        parametros = []
+        original = Cursor.execute
+
+        def registrar(self, sql, params=()):
+            if sql.startswith("INSERT INTO orientadores"):
+                parametros.append(dict(zip(sql[sql.index("(") + 1:sql.index(")")].split(", "), params)))
+            return original(self, sql, params)
+
+        Cursor.execute = registrar
+        try:
+            for email in ("professor.comum@professor.ibmec.edu.br", "coord.professor@professor.ibmec.edu.br"):
+                auth.buscar_ou_criar_usuario("orientadores", auth.dados_professor(usuario(email)), database)
+        finally:
+            Cursor.execute = original
+        assert [p["is_coordenador"] for p in parametros] == [False, True]
+        assert all(type(p["is_coordenador"]) is bool for p in parametros)
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    test_primeiro_login_cria_e_depois_encontra()
+    test_primeiros_logins_simultaneos()
+    test_cache_de_usuarios()
+    test_sem_indice_unico_insere_sem_on_conflict()
+    test_cache_de_usuarios_limitado()
+    test_is_coordenador_inserido_como_bool()
+    print("✅ Todos os testes de login passaram")
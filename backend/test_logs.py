@@ -0,0 +1,106 @@
+"""
+Teste dos logs estruturados (app/core/logs.py)
+
+Confere que o handler de fila não bloqueia (descarta e conta com a fila
+cheia), que a thread de escrita produz uma linha JSON por registro com o id
+da requisição e os campos de `extra=`, e que o RequisicaoIdMiddleware
+propaga o X-Request-ID recebido ou gera um novo.
+"""
+import asyncio
+import io
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueListener
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.logs import (FilaHandler, FormatadorJSON, RequisicaoIdMiddleware, id_requisicao,
+                           niveis_por_modulo)
+
+
+def logger_de_teste(nome: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(nome)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_fila_cheia_descarta_sem_bloquear():
+    handler = FilaHandler(queue.Queue(2))
+    logger = logger_de_teste("teste.logs.fila", handler)
+    for i in range(5):
+        logger.info("mensagem %d", i)
+    assert handler.queue.qsize() == 2 and handler.descartados == 3
+    assert handler.queue.get_nowait().msg == "mensagem 0"
+
+
+def test_linha_json_com_request_id_e_extra():
+    saida = io.StringIO()
+    destino = logging.StreamHandler(saida)
+    destino.setFormatter(FormatadorJSON())
+    handler = FilaHandler(queue.Queue(100))
+    listener = QueueListener(handler.queue, destino)
+    listener.start()
+    logger = logger_de_teste("teste.logs.json", handler)
+
+    token = id_requisicao.set("abc123")
+    try:
+        logger.info("✅ Login processado: %s", "Aluno", extra={"user_id": 7})
+        try:
+            raise ValueError("falhou")
+        except ValueError:
+            logger.exception("💥 Erro")
+    finally:
+        id_requisicao.reset(token)
+    logger.warning("fora de requisição")
+    listener.stop()
+
+    linhas = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+    assert [linha["mensagem"] for linha in linhas] == ["✅ Login processado: Aluno", "💥 Erro", "fora de requisição"]
+    assert linhas[0]["request_id"] == "abc123" and linhas[0]["user_id"] == 7
+    assert linhas[0]["nivel"] == "INFO" and linhas[0]["logger"] == "teste.logs.json"
+    assert "ValueError: falhou" in linhas[1]["excecao"]
+    assert "request_id" not in linhas[2]
+
+
+def test_niveis_por_modulo():
+    assert niveis_por_modulo("httpx=warning, app.db.instrumentacao=DEBUG,,invalido") == {
+        "httpx": "WARNING", "app.db.instrumentacao": "DEBUG"}
+
+
+def test_middleware_request_id():
+    handler = FilaHandler(queue.Queue(100))
+    logger = logger_de_teste("teste.logs.middleware", handler)
+
+    async def rota(request):
+        logger.info("dentro da rota")
+        return PlainTextResponse("ok")
+
+    app = RequisicaoIdMiddleware(Starlette(routes=[Route("/", rota)]))
+
+    async def pedir():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as client:
+            return await client.get("/", headers={"X-Request-ID": "recebido-1"}), await client.get("/")
+
+    recebido, gerado = asyncio.run(pedir())
+    assert recebido.headers["x-request-id"] == "recebido-1"
+    assert len(gerado.headers["x-request-id"]) == 32
+    ids = [handler.queue.get_nowait().request_id for _ in range(2)]
+    assert ids == ["recebido-1", gerado.headers["x-request-id"]]
+    assert id_requisicao.get() is None
+
+
+if __name__ == "__main__":
+    test_fila_cheia_descarta_sem_bloquear()
+    test_linha_json_com_request_id_e_extra()
+    test_niveis_por_modulo()
+    test_middleware_request_id()
+    print("✅ Todos os testes de logs passaram")
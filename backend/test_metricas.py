@@ -0,0 +1,147 @@
+"""
+Teste das métricas por rota (app/core/metricas.py)
+
+Monta uma aplicação pequena com o MetricasMiddleware e rotas que consultam
+um banco SQLite temporário, e confere os rótulos (router, template da rota,
+método, status), a contagem de consultas por requisição e o formato de
+texto do Prometheus exposto em /metrics.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi import APIRouter, FastAPI, HTTPException
+
+from app.core import metricas
+from app.core.metricas import Contador, Histograma, MetricasMiddleware, rotulo_router
+from app.db.session import AsyncConnection
+from conftest import criar_banco
+
+
+def criar_app(database) -> FastAPI:
+    router = APIRouter(prefix="/testemetricas")
+
+    @router.get("/{item_id}")
+    async def detalhe(item_id: int):
+        conn = AsyncConnection(database.connect())
+        try:
+            for _ in range(3):
+                await conn.execute("SELECT COUNT(*) FROM alunos WHERE id >= ?", (item_id,))
+        finally:
+            await conn.close()
+        return {"id": item_id, "texto": "x" * 500}
+
+    @router.get("/falha/erro")
+    async def falha():
+        raise HTTPException(status_code=404, detail="não encontrado")
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.add_middleware(MetricasMiddleware)
+    return app
+
+
+async def pedir(app, *caminhos):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as client:
+        return [await client.get(caminho) for caminho in caminhos]
+
+
+def test_rotulo_router():
+    assert rotulo_router("/api/v1/projetos/{projeto_id}/atividades") == "projetos"
+    assert rotulo_router("/api/v1/auth/callback") == "auth"
+    assert rotulo_router("/uploads/{caminho:path}") == "uploads"
+    assert rotulo_router("/") == "raiz"
+
+
+def test_metricas_por_rota_e_consultas():
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = criar_app(criar_banco(diretorio))
+        respostas = asyncio.run(pedir(app, "/api/v1/testemetricas/1", "/api/v1/testemetricas/2",
+                                      "/api/v1/testemetricas/falha/erro", "/api/v1/testemetricas/nada/aqui",
+                                      "/sondagem-qualquer"))
+        assert [r.status_code for r in respostas] == [200, 200, 404, 404, 404]
+
+    rotulos = {"router": "testemetricas", "method": "GET", "route": "/api/v1/testemetricas/{item_id}"}
+    assert metricas.requisicoes_total.valor(status="200", **rotulos) == 2
+    assert metricas.duracao_requisicao.contagem(**rotulos) == 2
+    assert metricas.consultas_por_requisicao.soma(**rotulos) == 6
+    assert metricas.tempo_banco_por_requisicao.soma(**rotulos) > 0
+    assert metricas.tamanho_resposta.soma(**rotulos) > 1000
+    assert metricas.requisicoes_total.valor(
+        status="404", router="testemetricas", method="GET", route="/api/v1/testemetricas/falha/erro") == 1
+    # Caminho sem rota não vira uma série própria, nem de rota nem de router
+    assert metricas.requisicoes_total.valor(
+        status="404", router="desconhecida", method="GET", route="desconhecida") == 2
+    assert "sondagem-qualquer" not in metricas.exportar_metricas()
+    assert metricas.requisicoes_em_andamento.valor() == 0
+    assert metricas.consultas_total.valor(router="testemetricas") == 6
+
+    texto = metricas.exportar_metricas()
+    assert "# TYPE http_request_duration_seconds histogram" in texto
+    assert ('http_requests_total{router="testemetricas",method="GET",'
+            'route="/api/v1/testemetricas/{item_id}",status="200"} 2') in texto
+    assert ('db_queries_per_request_bucket{router="testemetricas",method="GET",'
+            'route="/api/v1/testemetricas/{item_id}",le="3"} 2') in texto
+    assert 'auth_token_cache_total{resultado="acerto"}' in texto
+
+
+def test_formato_histograma_e_escape():
+    histograma = Histograma("teste_segundos", "Teste", ("rota",), (0.1, 1))
+    for valor in (0.05, 0.1, 0.5, 3):
+        histograma.observe(valor, rota='a"b')
+    linhas = histograma.exportar()
+    assert linhas[:2] == ["# HELP teste_segundos Teste", "# TYPE teste_segundos histogram"]
+    assert linhas[2:] == [
+        'teste_segundos_bucket{rota="a\\"b",le="0.1"} 2',
+        'teste_segundos_bucket{rota="a\\"b",le="1"} 3',
+        'teste_segundos_bucket{rota="a\\"b",le="+Inf"} 4',
+        'teste_segundos_sum{rota="a\\"b"} 3.65',
+        'teste_segundos_count{rota="a\\"b"} 4',
+    ]
+    contador = Contador("teste_total", "Sem rótulos")
+    contador.inc()
+    contador.inc(2)
+    assert contador.exportar()[-1] == "teste_total 3"
+
+
+def test_endpoint_metrics():
+    # Mesma montagem do main.py (middleware + router de /metrics) sem importar o main, que
+    # configura e migra o database.db do repositório
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "online"}
+
+    app.include_router(metricas.router)
+    app.add_middleware(MetricasMiddleware)
+
+    async def coletar(token=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as client:
+            await client.get("/health")
+            return await client.get("/metrics", headers=headers)
+
+    response = asyncio.run(coletar())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{router="health",method="GET",route="/health",status="200"}' in response.text
+    assert 'route="/metrics"' not in response.text
+
+    anterior, metricas.METRICAS_TOKEN = metricas.METRICAS_TOKEN, "segredo"
+    try:
+        assert asyncio.run(coletar()).status_code == 401
+        assert asyncio.run(coletar("segredo")).status_code == 200
+    finally:
+        metricas.METRICAS_TOKEN = anterior
+
+
+if __name__ == "__main__":
+    test_rotulo_router()
+    test_metricas_por_rota_e_consultas()
+    test_formato_histograma_e_escape()
+    test_endpoint_metrics()
+    print("✅ Todos os testes de métricas passaram")
@@ -0,0 +1,167 @@
+"""
+Teste da migração em lote (migrar_postgres.py)
+
+Migra um banco SQLite com dados sintéticos para outro banco com o schema da
+aplicação (no destino SQLite o caminho é o executemany com ON CONFLICT; o
+COPY só roda com PostgreSQL) e confere as contagens e o conteúdo. Depois
+simula uma interrupção entre o commit e o checkpoint e confere que a
+retomada não duplica linhas, que o checkpoint de um destino não é usado
+para outro e que uma tabela marcada como migrada mas ausente no destino é
+migrada de novo. A ordenação por dependências é testada com o
+ciclo alunos <-> projetos dos modelos.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine
+
+from app.db.session import Database
+from conftest import criar_bancos, criar_destino_vazio
+from migrar_postgres import Checkpoint, migrar, ordenar_por_dependencias, planejar, conectar_origem
+
+TABELAS = ("orientadores", "alunos", "projetos", "atividades", "documentos", "comentarios", "configuracoes")
+
+
+def conteudo(database, tabela: str):
+    with database.connect() as conn:
+        return [tuple(linha) for linha in conn.execute(f"SELECT * FROM {tabela} ORDER BY 1").fetchall()]
+
+
+def test_ordenar_por_dependencias():
+    dependencias = {
+        "orientadores": {},
+        "alunos": {"projetos": ("projeto_id",), "orientadores": ("orientador_id",)},
+        "projetos": {"alunos": ("aluno_id",), "orientadores": ("orientador_id",)},
+        "documentos": {"projetos": ("projeto_id",)},
+        "comentarios": {"documentos": ("documento_id",)},
+        "configuracoes": {},
+    }
+    anulaveis = {"alunos": {"projeto_id", "orientador_id"}, "projetos": {"aluno_id", "orientador_id"}}
+    niveis, adiadas = ordenar_por_dependencias(dependencias, anulaveis)
+    assert niveis == [["configuracoes", "orientadores"], ["alunos"], ["projetos"], ["documentos"], ["comentarios"]]
+    assert adiadas == {"alunos": ("projeto_id",)}
+    try:
+        ordenar_por_dependencias({"a": {"b": ("b_id",)}, "b": {"a": ("a_id",)}}, {})
+        assert False, "ciclo sem coluna anulável aceito"
+    except RuntimeError:
+        pass
+
+
+def test_migracao_completa_e_retomada():
+    with tempfile.TemporaryDirectory() as diretorio:
+        origem, destino, origem_caminho = criar_bancos(diretorio)
+        caminho_checkpoint = os.path.join(diretorio, "checkpoint.json")
+        mensagens = []
+
+        resultados = migrar(origem_caminho, destino, Checkpoint(caminho_checkpoint), lote=37, paralelo=2,
+                            progresso=mensagens.append)
+        for tabela in TABELAS:
+            assert conteudo(destino, tabela) == conteudo(origem, tabela), tabela
+            assert resultados[tabela]["concluida"]
+        assert resultados["comentarios"]["linhas"] == resultados["comentarios"]["gravadas"] == 700
+        assert any("comentarios: 700 linhas" in m and "/s)" in m for m in mensagens)
+
+        origem_conn = conectar_origem(origem_caminho)
+        nomes = [plano.nome for nivel in planejar(origem_conn, destino) for plano in nivel]
+        origem_conn.close()
+        assert not [nome for nome in nomes if nome.startswith(("busca_", "sqlite_"))]
+        assert nomes.index("projetos") < nomes.index("documentos") < nomes.index("comentarios")
+
+        # Interrupção: o checkpoint ficou no 300º comentário, mas o destino já tinha gravado até o 450º
+        with destino.connect() as conn:
+            primeiro = conn.execute("SELECT MIN(id) FROM comentarios").fetchone()[0]
+            conn.execute("DELETE FROM comentarios WHERE id >= ?", (primeiro + 450,))
+            conn.commit()
+        with open(caminho_checkpoint) as f:
+            estado = json.load(f)
+        estado["comentarios"] = {"ultimo": primeiro + 299, "linhas": 300, "gravadas": 300}
+        with open(caminho_checkpoint, "w") as f:
+            json.dump(estado, f)
+
+        mensagens.clear()
+        resultados = migrar(origem_caminho, destino, Checkpoint(caminho_checkpoint), lote=37, paralelo=2,
+                            progresso=mensagens.append)
+        assert conteudo(destino, "comentarios") == conteudo(origem, "comentarios")
+        assert resultados["comentarios"]["linhas"] == 700
+        assert resultados["comentarios"]["gravadas"] == 300 + 250  # 150 repetidas descartadas pelo ON CONFLICT
+        assert any(f"retomando depois de id = {primeiro + 299}" in m for m in mensagens)
+        assert any("alunos: já migrada" in m for m in mensagens)
+
+        # --recomecar com --conflito atualizar: a origem sobrescreve o destino
+        with destino.connect() as conn:
+            conn.execute("UPDATE alunos SET nome = 'Alterado no destino' WHERE id = 1")
+            conn.commit()
+        migrar(origem_caminho, destino, Checkpoint(caminho_checkpoint, recomecar=True), conflito="atualizar",
+               progresso=lambda *_: None)
+        assert conteudo(destino, "alunos") == conteudo(origem, "alunos")
+        origem.engine.dispose()
+        destino.engine.dispose()
+
+
+def test_checkpoint_de_outro_destino():
+    with tempfile.TemporaryDirectory() as diretorio:
+        origem, destino, origem_caminho = criar_bancos(diretorio)
+        caminho_checkpoint = os.path.join(diretorio, "checkpoint.json")
+        migrar(origem_caminho, destino, Checkpoint(caminho_checkpoint), progresso=lambda *_: None)
+
+        # Mesma origem e mesmo checkpoint para um destino novo: recusado
+        outro = criar_destino_vazio(os.path.join(diretorio, "outro"))
+        try:
+            migrar(origem_caminho, outro, Checkpoint(caminho_checkpoint), progresso=lambda *_: None)
+            assert False, "checkpoint de outro destino aceito"
+        except RuntimeError as e:
+            assert "--recomecar" in str(e) and "destino" in str(e)
+        assert conteudo(outro, "orientadores") == []
+
+        migrar(origem_caminho, outro, Checkpoint(caminho_checkpoint, recomecar=True), progresso=lambda *_: None)
+        for tabela in TABELAS:
+            assert conteudo(outro, tabela) == conteudo(origem, tabela), tabela
+
+        # Destino esvaziado por fora: o MAX da chave não alcança o checkpoint e a tabela é refeita
+        with outro.connect() as conn:
+            conn.execute("DELETE FROM comentarios")
+            conn.commit()
+        mensagens = []
+        resultados = migrar(origem_caminho, outro, Checkpoint(caminho_checkpoint), progresso=mensagens.append)
+        assert conteudo(outro, "comentarios") == conteudo(origem, "comentarios")
+        assert resultados["comentarios"]["linhas"] == resultados["comentarios"]["gravadas"] == 700
+        assert any("comentarios: o checkpoint vai até id" in m for m in mensagens)
+        assert any("alunos: já migrada" in m for m in mensagens)
+        for database in (origem, destino, outro):
+            database.engine.dispose()
+
+
+def test_cli_nao_semeia_o_destino():
+    """O destino da CLI recebe configuracoes e orientadores só da origem, mesmo rodando em backend/ com os JSON"""
+    backend = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as diretorio:
+        origem, destino, origem_caminho = criar_bancos(diretorio)
+        with origem.connect() as conn:
+            conn.execute("UPDATE configuracoes SET valor = ?", (json.dumps({"editado": "na origem"}),))
+            conn.commit()
+        caminho_destino = os.path.join(diretorio, "cli", "database.db")
+        os.makedirs(os.path.dirname(caminho_destino))
+        ambiente = {chave: valor for chave, valor in os.environ.items() if chave != "DATABASE_URL"}
+        saida = subprocess.run(
+            [sys.executable, "migrar_postgres.py", "--origem", origem_caminho, "--destino", f"sqlite:///{caminho_destino}",
+             "--checkpoint", os.path.join(diretorio, "cli.json")],
+            cwd=backend, env=ambiente, capture_output=True, text=True)
+        assert saida.returncode == 0, saida.stdout + saida.stderr
+
+        cli = Database(create_engine(f"sqlite:///{caminho_destino}"))
+        assert conteudo(cli, "configuracoes") == conteudo(origem, "configuracoes")
+        assert conteudo(cli, "orientadores") == conteudo(origem, "orientadores")
+        for database in (origem, destino, cli):
+            database.engine.dispose()
+
+
+if __name__ == "__main__":
+    test_ordenar_por_dependencias()
+    test_migracao_completa_e_retomada()
+    test_checkpoint_de_outro_destino()
+    test_cli_nao_semeia_o_destino()
+    print("✅ Todos os testes da migração em lote passaram")
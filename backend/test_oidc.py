@@ -0,0 +1,64 @@
+"""
+Teste do cache dos metadados OIDC (app/core/oidc.py)
+
+O documento de descoberta do tenant é buscado uma vez e servido do cache
+até o TTL; se a descoberta falhar, o login usa os endpoints padrão e a
+falha fica em cache por alguns segundos antes de uma nova tentativa.
+"""
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from app.core import http_cliente
+from app.core.oidc import falhas_cache, metadados_cache, metadados_oidc, metadados_padrao
+
+
+def executar_com_provedor(resposta, chamadas):
+    def tratar(request):
+        chamadas.append(str(request.url))
+        return resposta(request)
+
+    async def executar():
+        metadados_cache.invalidate()
+        falhas_cache.invalidate()
+        http_cliente._cliente = httpx.AsyncClient(transport=httpx.MockTransport(tratar))
+        try:
+            return [await metadados_oidc("tenant-teste") for _ in range(3)]
+        finally:
+            await http_cliente.encerrar_cliente_http()
+    return asyncio.run(executar())
+
+
+def test_descoberta_em_cache():
+    chamadas = []
+    documento = {"authorization_endpoint": "https://idp/authorize", "token_endpoint": "https://idp/token"}
+    resultados = executar_com_provedor(lambda request: httpx.Response(200, json=documento), chamadas)
+    assert resultados == [documento] * 3
+    assert len(chamadas) == 1
+    assert chamadas[0].endswith("/tenant-teste/v2.0/.well-known/openid-configuration")
+
+
+def test_descoberta_indisponivel():
+    chamadas = []
+    resultados = executar_com_provedor(lambda request: httpx.Response(503), chamadas)
+    assert resultados == [metadados_padrao("tenant-teste")] * 3
+    assert len(chamadas) == 1  # a falha fica em cache: as outras chamadas não esperam o provedor
+    assert resultados[0]["token_endpoint"].endswith("/tenant-teste/oauth2/v2.0/token")
+
+    # Com a falha expirada, cada chamada tenta a descoberta de novo
+    ttl, falhas_cache.ttl = falhas_cache.ttl, 0
+    try:
+        chamadas.clear()
+        executar_com_provedor(lambda request: httpx.Response(503), chamadas)
+    finally:
+        falhas_cache.ttl = ttl
+    assert len(chamadas) == 3
+
+
+if __name__ == "__main__":
+    test_descoberta_em_cache()
+    test_descoberta_indisponivel()
+    print("✅ Todos os testes de OIDC passaram")
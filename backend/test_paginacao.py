@@ -0,0 +1,139 @@
+"""
+Teste da paginação por cursor (keyset) das listagens do admin
+
+Percorre as páginas de /todos-projetos, /todos-pendentes e /todos-ativos e
+confere que o resultado é a mesma lista da resposta sem paginação (incluindo
+datas repetidas e nulas), que inserções no meio do percurso não duplicam
+nem pulam linhas e que o cursor inválido é recusado.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException
+
+from app.api.routes.projetos import listar_todos_projetos, todos_projetos_ativos, todos_projetos_pendentes
+from app.db.migrations import aplicar_migracoes
+from app.db.session import AsyncConnection
+from conftest import criar_banco
+
+ADMIN = {"user_type": "admin", "user_id": 1}
+
+
+def popular(database, total: int):
+    with database.connect() as conn:
+        aluno_id = conn.execute(
+            "INSERT INTO alunos (nome, matricula, email) VALUES ('Aluno', '1', 'aluno@teste') RETURNING id"
+        ).fetchone()[0]
+        orientador_id = conn.execute("SELECT MIN(id) FROM orientadores").fetchone()[0]
+        linhas = []
+        for i in range(total):
+            status = "ativo" if i % 3 == 0 else "pendente"
+            # Datas repetidas a cada 4 projetos e algumas nulas
+            data = None if i % 10 == 9 else f"2024-01-{i // 4 + 1:02d}T00:00:00"
+            linhas.append((f"P{i}", f"Projeto {i}", orientador_id, aluno_id, status, data,
+                           data if status == "ativo" else None))
+        conn.cursor().executemany("""
+            INSERT INTO projetos (codigo, titulo, orientador_id, aluno_id, status, data_submissao, data_aprovacao)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, linhas)
+        conn.commit()
+
+
+def percorrer(database, rota, limite, ao_virar_pagina=None):
+    async def executar():
+        ids, cursor_pagina, paginas = [], None, 0
+        with database.connect() as conn:
+            while True:
+                response = await rota(limite=limite, cursor_pagina=cursor_pagina, estimar_total=paginas == 0,
+                                      current_user=ADMIN, conn=AsyncConnection(conn))
+                pagina = json.loads(response.body)
+                if paginas == 0:
+                    estimativa = int(response.headers["X-Total-Count-Estimate"])
+                ids += [p["id"] for p in pagina]
+                paginas += 1
+                cursor_pagina = response.headers.get("X-Next-Cursor")
+                if not cursor_pagina:
+                    return ids, paginas, estimativa
+                assert len(pagina) == limite
+                if ao_virar_pagina:
+                    ao_virar_pagina(conn)
+    return asyncio.run(executar())
+
+
+def listar_tudo(database, rota):
+    async def executar():
+        with database.connect() as conn:
+            response = await rota(limite=None, cursor_pagina=None, estimar_total=False,
+                                  current_user=ADMIN, conn=AsyncConnection(conn))
+            return json.loads(response.body)
+    return asyncio.run(executar())
+
+
+def ordenar(projetos, coluna):
+    # Ordem das páginas: data mais recente primeiro, nulas no fim, empate pelo id
+    com_data = sorted((p for p in projetos if p[coluna]), key=lambda p: (p[coluna], p["id"]), reverse=True)
+    sem_data = sorted((p for p in projetos if not p[coluna]), key=lambda p: p["id"], reverse=True)
+    return [p["id"] for p in com_data + sem_data]
+
+
+def test_paginas_cobrem_a_lista_inteira():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        aplicar_migracoes(database)
+        popular(database, 95)
+        for rota, coluna in ((listar_todos_projetos, "data_submissao"),
+                             (todos_projetos_pendentes, "data_submissao"),
+                             (todos_projetos_ativos, "data_aprovacao")):
+            todos = listar_tudo(database, rota)
+            ids, paginas, estimativa = percorrer(database, rota, limite=7)
+            assert ids == ordenar(todos, coluna), rota.__name__
+            assert paginas == -(-len(todos) // 7) and estimativa == len(todos)
+        database.engine.dispose()
+
+
+def test_insercoes_durante_o_percurso_nao_deslocam_paginas():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        aplicar_migracoes(database)
+        popular(database, 40)
+        antes = [p["id"] for p in listar_tudo(database, listar_todos_projetos) if p["data_submissao"]]
+
+        def inserir_mais_recente(conn):
+            conn.execute("""
+                INSERT INTO projetos (codigo, titulo, orientador_id, aluno_id, status, data_submissao)
+                SELECT 'N', 'Novo', orientador_id, aluno_id, 'pendente', '2099-01-01' FROM projetos LIMIT 1
+            """)
+            conn.commit()
+
+        ids, _, _ = percorrer(database, listar_todos_projetos, limite=5, ao_virar_pagina=inserir_mais_recente)
+        assert len(ids) == len(set(ids))
+        assert [i for i in ids if i in set(antes)] == ordenar(
+            [p for p in listar_tudo(database, listar_todos_projetos) if p["id"] in set(antes)], "data_submissao"
+        )
+        assert set(antes) <= set(ids)
+        database.engine.dispose()
+
+
+def test_cursor_invalido():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        with database.connect() as conn:
+            try:
+                asyncio.run(listar_todos_projetos(limite=5, cursor_pagina="nao-e-cursor",
+                                                  estimar_total=False, current_user=ADMIN,
+                                                  conn=AsyncConnection(conn)))
+                assert False
+            except HTTPException as e:
+                assert e.status_code == 400
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    test_paginas_cobrem_a_lista_inteira()
+    test_insercoes_durante_o_percurso_nao_deslocam_paginas()
+    test_cursor_invalido()
+    print("✅ Paginação por cursor OK")
@@ -0,0 +1,34 @@
+"""
+Teste do pool de conexões depois de um fork (app/db/session.py)
+
+Com preload_app o gunicorn cria os workers por fork depois do startup ter
+usado o banco. O processo filho não pode reaproveitar as conexões que
+herdou no pool: confere que ele começa com o pool vazio e que o pai
+continua com as suas.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import database
+
+
+def test_filho_nao_herda_conexoes_do_pool():
+    conn = database.connect()
+    conn.execute("SELECT 1").fetchone()
+    conn.close()
+    assert database.engine.pool.checkedin() >= 1
+
+    pid = os.fork()
+    if pid == 0:
+        # Filho: sai com 0 só se o pool herdado foi descartado
+        os._exit(0 if database.engine.pool.checkedin() == 0 else 1)
+    _, estado = os.waitpid(pid, 0)
+    assert os.WIFEXITED(estado) and os.WEXITSTATUS(estado) == 0
+    assert database.engine.pool.checkedin() >= 1
+    database.engine.dispose()
+
+
+if __name__ == "__main__":
+    test_filho_nao_herda_conexoes_do_pool()
+    print("✅ Todos os testes do pool após fork passaram")
@@ -0,0 +1,114 @@
+"""
+Teste de quantidade de consultas por rota (regressão de N+1)
+
+Cria um banco SQLite temporário com o schema de database_setup.py, chama as
+rotas diretamente com uma conexão do pool e conta os SELECTs executados.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import Response
+
+from app.db.migrations import recalcular_resumo_documentos
+from app.api.routes import documentos as documentos_routes
+from app.api.routes import projetos as projetos_routes
+from conftest import criar_banco, executar_contando, popular_documentos, popular_projetos
+
+
+def contar_meus_projetos(total_projetos: int):
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        aluno_id = popular_projetos(database, total_projetos, atividades_por_projeto=3)
+        usuario = {"user_id": aluno_id, "user_type": "aluno"}
+        resultado, consultas = asyncio.run(
+            executar_contando(database, projetos_routes.meus_projetos, current_user=usuario)
+        )
+        database.engine.dispose()
+    return resultado, consultas
+
+
+def test_meus_projetos_quantidade_constante_de_consultas():
+    poucos, consultas_poucos = contar_meus_projetos(1)
+    muitos, consultas_muitos = contar_meus_projetos(20)
+
+    assert len(poucos) == 1 and len(muitos) == 20
+    assert consultas_poucos == consultas_muitos == 2
+    for projeto in muitos:
+        titulos = [a["titulo"] for a in projeto["atividades"]]
+        indice = projeto["titulo"].split()[-1]
+        assert titulos == [f"Atividade {indice}.{j}" for j in range(3)]
+        assert "projeto_id" not in projeto["atividades"][0]
+
+
+def contar_listar_documentos(total_documentos: int, **paginacao):
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        projeto_id = popular_documentos(database, total_documentos, comentarios_por_documento=4)
+        usuario = {"user_id": 1, "user_type": "admin"}
+        response = Response()
+        parametros = {"limite": None, "offset": 0, "limite_comentarios": None}
+        parametros.update(paginacao)
+        resultado, consultas = asyncio.run(executar_contando(
+            database, documentos_routes.listar_documentos,
+            projeto_id=projeto_id, response=response, current_user=usuario, **parametros
+        ))
+        database.engine.dispose()
+    return resultado, consultas, response
+
+
+def test_listar_documentos_quantidade_constante_de_consultas():
+    poucos, consultas_poucos, _ = contar_listar_documentos(1)
+    muitos, consultas_muitos, _ = contar_listar_documentos(25)
+
+    assert len(poucos) == 1 and len(muitos) == 25
+    assert consultas_poucos == consultas_muitos == 3
+    for doc in muitos:
+        indice = doc["nome_arquivo"][3:-4]
+        assert [c["comentario"] for c in doc["comentarios"]] == [f"Comentário {indice}.{j}" for j in range(4)]
+        assert doc["comentarios"][0]["usuario_nome"] == "Aluno Teste"
+        assert doc["comentarios_total"] == 4
+
+
+def test_listar_documentos_paginado():
+    pagina, _, response = contar_listar_documentos(25, limite=10, offset=20, limite_comentarios=2)
+
+    assert response.headers["X-Total-Count"] == "25"
+    assert [doc["nome_arquivo"] for doc in pagina] == [f"doc{i}.pdf" for i in range(4, -1, -1)]
+    for doc in pagina:
+        indice = doc["nome_arquivo"][3:-4]
+        assert [c["comentario"] for c in doc["comentarios"]] == [f"Comentário {indice}.{j}" for j in (2, 3)]
+        assert doc["comentarios_total"] == 4
+
+
+def test_resumo_documentos_recalculado():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+        projeto_id = popular_documentos(database, 5, comentarios_por_documento=0)
+        with database.connect() as conn:
+            recalcular_resumo_documentos(conn)
+            conn.commit()
+            linha = conn.execute(
+                "SELECT aluno_id, documentos_count, ultima_postagem FROM projetos WHERE id = ?", (projeto_id,)
+            ).fetchone()
+        usuario = {"user_id": linha["aluno_id"], "user_type": "aluno"}
+        projetos, consultas = asyncio.run(
+            executar_contando(database, projetos_routes.meus_projetos, current_user=usuario)
+        )
+        database.engine.dispose()
+
+    assert linha["documentos_count"] == 5
+    assert linha["ultima_postagem"] == "2025-03-05T00:00:00"
+    assert projetos[0]["documentos_count"] == 5 and consultas == 2
+
+
+if __name__ == "__main__":
+    test_meus_projetos_quantidade_constante_de_consultas()
+    print("✅ /projetos/meus-projetos usa uma quantidade constante de consultas")
+    test_listar_documentos_quantidade_constante_de_consultas()
+    test_listar_documentos_paginado()
+    print("✅ /documentos/projeto/{id} carrega os comentários em lote, com paginação")
+    test_resumo_documentos_recalculado()
+    print("✅ Resumo de documentos por projeto recalculado a partir do histórico")
@@ -0,0 +1,54 @@
+"""
+Teste da serialização direta das linhas (app/core/respostas.py)
+
+Confere que resposta_linhas() gera o mesmo JSON do caminho antigo
+(dict(row) + jsonable_encoder), inclusive com acentos, nulos e a
+transformação por linha usada em /orientadores.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.routes.projetos import listar_orientadores
+from app.core.respostas import resposta_linhas, serializar_linhas
+from app.db.session import AsyncConnection
+from conftest import criar_banco
+
+
+def test_serializar_linhas():
+    corpo = serializar_linhas(["id", "nome", "nota"], [(1, "Iniciação Científica", None), (2, "José", 9.5)])
+    assert json.loads(corpo) == [{"id": 1, "nome": "Iniciação Científica", "nota": None},
+                                 {"id": 2, "nome": "José", "nota": 9.5}]
+
+
+def test_resposta_linhas_igual_ao_caminho_antigo():
+    with tempfile.TemporaryDirectory() as diretorio:
+        database = criar_banco(diretorio)
+
+        async def executar():
+            with database.connect() as conn:
+                antigo = jsonable_encoder([dict(row) for row in conn.execute("SELECT * FROM orientadores").fetchall()])
+                cursor = AsyncConnection(conn).cursor()
+                await cursor.execute("SELECT * FROM orientadores")
+                resposta = await resposta_linhas(cursor, headers={"X-Teste": "1"})
+                assert resposta.media_type == "application/json"
+                assert resposta.headers["X-Teste"] == "1"
+                assert json.loads(resposta.body) == antigo
+
+                orientadores = json.loads((await listar_orientadores(current_user={}, conn=AsyncConnection(conn))).body)
+                assert orientadores
+                for orientador in orientadores:
+                    esperado = orientador["areas_interesse"].split(",") if orientador["areas_interesse"] else []
+                    assert orientador["areas"] == esperado
+        asyncio.run(executar())
+
+
+if __name__ == "__main__":
+    test_serializar_linhas()
+    test_resposta_linhas_igual_ao_caminho_antigo()
+    print("✅ Todos os testes de serialização passaram")
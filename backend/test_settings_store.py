@@ -0,0 +1,62 @@
+"""
+Teste do armazenamento de configurações (período de inscrição e textos)
+
+Dois SettingsStore sobre o mesmo banco temporário simulam dois workers do
+gunicorn: a escrita feita em um deve aparecer no outro pela verificação de
+versão, sem leitura de arquivos.
+"""
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.settings_store import HOME_TEXTS, INSCRICAO_PERIODO, SettingsStore
+from app.db.migrations import aplicar_migracoes
+from conftest import criar_banco
+
+
+def test_configuracoes_propagadas_entre_workers():
+    with tempfile.TemporaryDirectory() as diretorio:
+        cwd = os.getcwd()
+        os.chdir(diretorio)
+        try:
+            with open("inscricao_periodo.json", "w") as f:
+                json.dump({"data_limite": "2025-06-08T17:13", "aberto": False}, f)
+            database = criar_banco(diretorio)
+            aplicar_migracoes(database)
+        finally:
+            os.chdir(cwd)
+
+        worker_a = SettingsStore(database, intervalo=0)
+        worker_b = SettingsStore(database, intervalo=3600)
+
+        # Importado do arquivo JSON antigo pela migração
+        assert worker_a.get_sync(INSCRICAO_PERIODO) == {"data_limite": "2025-06-08T17:13", "aberto": False}
+        assert worker_b.get_sync(HOME_TEXTS, {"titulo": "padrão"}) == {"titulo": "padrão"}
+
+        worker_b.set_sync(HOME_TEXTS, {"titulo": "Novo"})
+        worker_b.set_sync(HOME_TEXTS, {"titulo": "Novo 2"})
+        assert worker_a.get_sync(HOME_TEXTS) == {"titulo": "Novo 2"}
+
+        # Alterar o valor devolvido não altera o cache
+        textos = worker_a.get_sync(HOME_TEXTS)
+        textos["edicoes"] = []
+        assert worker_a.get_sync(HOME_TEXTS) == {"titulo": "Novo 2"}
+
+        # O worker B só verifica de novo quando o intervalo vence
+        worker_a.set_sync(INSCRICAO_PERIODO, {"data_limite": None, "aberto": True})
+        assert worker_b.get_sync(INSCRICAO_PERIODO)["aberto"] is False
+        worker_b._proxima_verificacao = 0
+        assert worker_b.get_sync(INSCRICAO_PERIODO)["aberto"] is True
+
+        with database.connect() as conn:
+            versao = conn.execute("SELECT versao FROM configuracoes WHERE chave = ?", (HOME_TEXTS,)).fetchone()[0]
+        database.engine.dispose()
+
+    assert versao == 2
+
+
+if __name__ == "__main__":
+    test_configuracoes_propagadas_entre_workers()
+    print("✅ Configurações servidas da memória e propagadas entre workers")
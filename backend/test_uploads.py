@@ -0,0 +1,96 @@
+"""
+Teste da gravação de uploads em blocos (app.core.uploads + blob_store)
+
+Pelo mesmo caminho das rotas (guardar_upload/guardar_conteudo): tamanho e
+SHA-256 calculados durante a cópia, o arquivo no store sem temporários
+sobrando, e que um arquivo acima do limite ou uma cópia interrompida não
+deixam nada no disco.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.blob_store import BLOBS_DIR, caminho_blob, guardar_conteudo, guardar_upload
+from app.core.uploads import UPLOAD_CHUNK_SIZE
+
+
+def arquivos_no_store() -> list:
+    return [nome for _, _, nomes in os.walk(BLOBS_DIR) for nome in nomes]
+
+
+class LeituraInterrompida(io.BytesIO):
+    """Entrega alguns blocos e falha, como uma conexão que cai no meio do upload"""
+
+    def read(self, tamanho=-1):
+        if self.tell() >= 2 * UPLOAD_CHUNK_SIZE:
+            raise ConnectionResetError("conexão perdida")
+        return super().read(tamanho)
+
+
+def test_upload_em_blocos_com_hash():
+    cwd = os.getcwd()
+    conteudo = os.urandom(2 * UPLOAD_CHUNK_SIZE + 1000)  # mais de um bloco
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            arquivo = UploadFile(io.BytesIO(conteudo), filename="relatorio.pdf")
+            salvo = asyncio.run(guardar_upload(arquivo, limite=10 * UPLOAD_CHUNK_SIZE))
+            with open(salvo.caminho, "rb") as f:
+                gravado = f.read()
+            restantes = arquivos_no_store()
+        finally:
+            os.chdir(cwd)
+
+    assert gravado == conteudo
+    assert salvo.tamanho == len(conteudo)
+    assert salvo.sha256 == hashlib.sha256(conteudo).hexdigest()
+    assert salvo.caminho == caminho_blob(salvo.sha256)
+    assert restantes == [salvo.sha256]
+
+
+def test_upload_acima_do_limite_nao_grava_nada():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            # Sem tamanho conhecido: o limite é aplicado durante a cópia
+            arquivo = UploadFile(io.BytesIO(b"x" * 5000), filename="grande.pdf")
+            # Com tamanho conhecido: recusado antes de ler
+            declarado = UploadFile(io.BytesIO(b"x" * 5000), filename="grande.pdf", size=5000)
+            for upload in (arquivo, declarado):
+                try:
+                    asyncio.run(guardar_upload(upload, limite=4096))
+                    assert False, "deveria recusar o arquivo"
+                except HTTPException as e:
+                    assert e.status_code == 413
+            assert arquivos_no_store() == []
+        finally:
+            os.chdir(cwd)
+
+
+def test_copia_interrompida_nao_deixa_temporario():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            try:
+                guardar_conteudo(LeituraInterrompida(os.urandom(3 * UPLOAD_CHUNK_SIZE)))
+                assert False, "a falha de leitura deveria propagar"
+            except ConnectionResetError:
+                pass
+            assert arquivos_no_store() == []
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_upload_em_blocos_com_hash()
+    test_upload_acima_do_limite_nao_grava_nada()
+    test_copia_interrompida_nao_deixa_temporario()
+    print("✅ Uploads gravados em blocos, com hash e limite de tamanho")
@@ -0,0 +1,78 @@
+"""
+Teste da verificação por faixas (verificar_migracao.py)
+
+Migra um banco com dados sintéticos com o migrar_postgres.py, confere que a
+verificação não acusa nada e depois altera o destino (linha apagada, coluna
+trocada, NULL virando texto vazio, booleano invertido, linha a mais) para
+conferir o relatório linha a linha e que só as faixas diferentes foram lidas.
+"""
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import criar_bancos
+from migrar_postgres import Checkpoint, migrar
+from verificar_migracao import Diferenca, formatar_diferenca, verificar
+
+
+def test_verificacao_por_faixas():
+    with tempfile.TemporaryDirectory() as diretorio:
+        origem, destino, origem_caminho = criar_bancos(diretorio)
+        migrar(origem_caminho, destino, Checkpoint(os.path.join(diretorio, "checkpoint.json")),
+               progresso=lambda *_: None)
+
+        resultados = verificar(origem_caminho, destino, bloco=100, folha=8, progresso=lambda *_: None)
+        assert all(not resultado["diferencas"] for resultado in resultados.values())
+        assert resultados["comentarios"]["linhas_origem"] == resultados["comentarios"]["linhas_destino"] == 700
+        assert resultados["comentarios"]["faixas"] == 7 and resultados["comentarios"]["faixas_lidas"] == 0
+
+        with destino.connect() as conn:
+            primeiro = conn.execute("SELECT MIN(id) FROM comentarios").fetchone()[0]
+            conn.execute("DELETE FROM comentarios WHERE id = ?", (primeiro + 10,))
+            conn.execute("UPDATE comentarios SET comentario = 'trocado' WHERE id = ?", (primeiro + 650,))
+            conn.execute("INSERT INTO comentarios (id, documento_id, usuario_id, usuario_tipo, comentario) "
+                         "SELECT id + 5000, documento_id, usuario_id, usuario_tipo, comentario "
+                         "FROM comentarios WHERE id = ?", (primeiro,))
+            aluno = conn.execute("SELECT MIN(id) FROM alunos WHERE telefone IS NULL").fetchone()[0]
+            conn.execute("UPDATE alunos SET telefone = '' WHERE id = ?", (aluno,))
+            coordenador = conn.execute("SELECT MIN(id) FROM orientadores WHERE is_coordenador = 1").fetchone()[0]
+            conn.execute("UPDATE orientadores SET is_coordenador = 0 WHERE id = ?", (coordenador,))
+            conn.commit()
+
+        mensagens = []
+        resultados = verificar(origem_caminho, destino, bloco=100, folha=8, paralelo=2,
+                               progresso=mensagens.append)
+        comentarios = resultados["comentarios"]
+        assert comentarios["diferencas"] == [
+            Diferenca("comentarios", primeiro + 10, "falta_no_destino"),
+            Diferenca("comentarios", primeiro + 650, "diferente",
+                      (("comentario", conteudo_origem(origem, primeiro + 650), "trocado"),)),
+            Diferenca("comentarios", primeiro + 5000, "so_no_destino"),
+        ]
+        assert comentarios["linhas_destino"] == 700 and comentarios["faixas_diferentes"] == 3
+        assert comentarios["faixas_lidas"] == 3  # uma folha por diferença, as outras faixas não são lidas
+        assert resultados["alunos"]["diferencas"] == [
+            Diferenca("alunos", aluno, "diferente", (("telefone", None, ""),))]
+        assert resultados["orientadores"]["diferencas"] == [
+            Diferenca("orientadores", coordenador, "diferente", (("is_coordenador", "1", "0"),))]
+        assert not resultados["projetos"]["diferencas"] and not resultados["configuracoes"]["diferencas"]
+        assert any(m.startswith("  ❌ comentarios: 700 / 700 linhas, 3 de") for m in mensagens)
+        assert formatar_diferenca(resultados["alunos"]["diferencas"][0], "id") == \
+            f"alunos id = {aluno}: telefone None → ''"
+
+        resultados = verificar(origem_caminho, destino, bloco=100, folha=8, max_diferencas=1,
+                               progresso=lambda *_: None)
+        assert len(resultados["comentarios"]["diferencas"]) == 1 and resultados["comentarios"]["truncado"]
+        origem.engine.dispose()
+        destino.engine.dispose()
+
+
+def conteudo_origem(database, comentario_id: int) -> str:
+    with database.connect() as conn:
+        return conn.execute("SELECT comentario FROM comentarios WHERE id = ?", (comentario_id,)).fetchone()[0]
+
+
+if __name__ == "__main__":
+    test_verificacao_por_faixas()
+    print("✅ Todos os testes da verificação da migração passaram")